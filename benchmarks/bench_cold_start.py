@@ -0,0 +1,105 @@
+"""
+Cold start of an inference worker: time-to-first-prediction and load memory
+of the .keras model against the serving SavedModel.
+
+Each path runs in a fresh interpreter after TensorFlow is imported:
+  notebook    load_model + compile + eager mode + model.predict, as in the
+              prediction notebook
+  keras       PredictPipeline on the .keras file (traces on the first call)
+  savedmodel  SavedModelPredictor on the serving SavedModel (warm-up included
+              in its load time)
+Load memory is the growth of the resident set size over the interpreter
+with TensorFlow imported, after the first prediction.
+
+Usage:
+    python -m benchmarks.bench_cold_start --repeats 3
+    python -m benchmarks.bench_cold_start --model-path artifacts/final_model.keras \\
+        --serving-path artifacts/serving_model --img-size 128
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+MODES = ('notebook', 'keras', 'savedmodel')
+
+_RUN = """
+import json, os, sys, time
+import numpy as np
+import tensorflow as tf
+mode, keras_path, serving_path, size, batch = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])
+rss_mb = lambda: int(open('/proc/self/statm').read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+images = np.random.default_rng(0).uniform(0, 255, (batch, size, size, 1)).astype(np.float32)
+base_mb = rss_mb()
+start = time.perf_counter()
+if mode == 'notebook':
+    model = tf.keras.models.load_model(keras_path)
+    model.compile(optimizer='adam', loss='binary_crossentropy', metrics=['accuracy'])
+    tf.config.run_functions_eagerly(True)
+    predict = lambda x: model.predict(x, verbose=0)
+elif mode == 'keras':
+    from src.pipeline.predict_pipeline import PredictPipeline
+    predict = PredictPipeline(keras_path, img_size=(size, size)).predict_batch
+else:
+    from src.pipeline.predict_pipeline import SavedModelPredictor
+    predict = SavedModelPredictor(serving_path, img_size=(size, size)).predict_batch
+load_s = time.perf_counter() - start
+predict(images)
+first_s = time.perf_counter() - start - load_s
+start = time.perf_counter()
+predict(images)
+steady_s = time.perf_counter() - start
+load_mb = rss_mb() - base_mb
+print(json.dumps({'load_s': load_s, 'first_s': first_s, 'steady_s': steady_s, 'load_mb': load_mb}))
+"""
+
+
+def run(mode: str, keras_path: str, serving_path: str, img_size: int, batch_size: int) -> dict:
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT), 'TF_CPP_MIN_LOG_LEVEL': '2'}
+    result = subprocess.run([sys.executable, '-c', _RUN, mode, keras_path, serving_path, str(img_size),
+                             str(batch_size)], capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def build_model(root: Path, img_size: int):
+    """Save an untrained model in both formats, as ModelTrainer.save_model does after training."""
+    from src.components.model_trainer import ModelTrainer
+
+    trainer = ModelTrainer(img_size=(img_size, img_size), weights_path=str(root / 'checkpoints' / 'w.weights.h5'))
+    keras_path, serving_path = root / 'final_model.keras', root / 'serving_model'
+    trainer.save_model(str(keras_path), str(serving_path))
+    return str(keras_path), str(serving_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model-path', default=None, help=".keras model, a fresh model is saved when unset")
+    parser.add_argument('--serving-path', default=None, help="Serving SavedModel of --model-path")
+    parser.add_argument('--img-size', type=int, default=128)
+    parser.add_argument('--batch-size', type=int, default=1, help="Images in the first prediction")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.model_path:
+            keras_path, serving_path = args.model_path, args.serving_path
+        else:
+            keras_path, serving_path = build_model(Path(tmp), args.img_size)
+
+        print(f"{'path':>10s} {'load':>8s} {'first':>8s} {'ready+first':>12s} {'steady':>8s} {'load mem':>9s}")
+        for mode in args.modes:
+            runs = [run(mode, keras_path, serving_path, args.img_size, args.batch_size) for _ in range(args.repeats)]
+            median = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+            print(f"{mode:>10s} {median['load_s']:7.2f}s {median['first_s'] * 1e3:6.0f}ms "
+                  f"{median['load_s'] + median['first_s']:11.2f}s {median['steady_s'] * 1e3:6.1f}ms "
+                  f"{median['load_mb']:6.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
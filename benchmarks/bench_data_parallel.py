@@ -0,0 +1,91 @@
+"""
+Measure the scaling efficiency of multi-worker data-parallel training on one machine.
+
+Each configuration runs as local worker processes with a localhost TF_CONFIG
+(src.pipeline.distributed.launch_local). Workers shard the batch DataFrame,
+train for a warm-up and a timed epoch with a fixed per-worker batch size, and
+the chief reports the global images/sec of the timed epoch.
+
+Usage:
+    python -m benchmarks.bench_data_parallel --workers 1 2 4 --images 512
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+import pandas as pd
+from benchmarks.synthetic import NIH_LABELS, make_metadata, write_pngs
+
+
+def run_worker(args) -> None:
+    import tensorflow as tf
+    from src.pipeline.distributed import worker_context
+
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    from src.components.data_ingestion import DataIngestionPipeline
+    from src.components.model_trainer import ModelTrainer
+
+    worker = worker_context()
+    df = pd.read_csv(Path(args.data_dir) / 'meta.csv')
+    ingestion = DataIngestionPipeline(batch_size=args.batch_size, backend='tf.data',
+                                      num_shards=worker.num_workers, shard_index=worker.index)
+    generators = ingestion.create_generators(df, df, Path(args.data_dir) / 'images', 1, NIH_LABELS)
+    trainer = ModelTrainer(weights_path=str(Path(args.data_dir) / 'ckpt' / 'model.weights.h5'),
+                           strategy=strategy, is_chief=worker.is_chief)
+
+    epoch_times = []
+
+    class EpochTimer(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            epoch_times.append(time.perf_counter() - self.start)
+
+    steps = generators['steps_per_epoch'] or len(df) // args.batch_size
+    trainer.model.fit(generators['train_generator'], epochs=2, steps_per_epoch=steps,
+                      callbacks=[EpochTimer()], verbose=0)
+    if worker.is_chief:
+        images = steps * args.batch_size * worker.num_workers
+        with open(args.result, 'w') as file:
+            json.dump({'images_per_sec': images / epoch_times[-1]}, file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--images', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=16, help="Per-worker batch size")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--data-dir', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return run_worker(args)
+
+    from src.pipeline.distributed import launch_local
+
+    with tempfile.TemporaryDirectory() as tmp:
+        df = make_metadata(args.images)
+        df.to_csv(Path(tmp) / 'meta.csv', index=False)
+        write_pngs(df['Image Index'], Path(tmp) / 'images', size=256)
+
+        baseline = None
+        for num_workers in args.workers:
+            result = Path(tmp) / f"result-{num_workers}.json"
+            command = [sys.executable, '-m', 'benchmarks.bench_data_parallel', '--worker',
+                       '--data-dir', tmp, '--result', str(result), '--batch-size', str(args.batch_size)]
+            if launch_local(num_workers, command):
+                print(f"{num_workers} workers: failed")
+                continue
+            with open(result) as file:
+                rate = json.load(file)['images_per_sec']
+            baseline = baseline or rate / num_workers
+            print(f"{num_workers} workers: {rate:8.1f} images/sec, "
+                  f"scaling efficiency {rate / (num_workers * baseline):6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Compare sequential 1 KB-chunk downloads with DatasetUtils.download_files, and
+check resuming against servers that support and refuse Range requests.
+
+Usage:
+    python -m benchmarks.bench_download --archives 4 --mb 16
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+import requests
+from benchmarks.synthetic import serve_directory
+from src.components.utils import DatasetUtils
+
+
+def legacy_download(url, save_path, chunk_size=1024):
+    """Single-connection download used before resumable downloads."""
+    with requests.get(url, stream=True) as response:
+        response.raise_for_status()
+        with open(save_path, 'wb') as file:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                file.write(chunk)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--archives', type=int, default=4)
+    parser.add_argument('--mb', type=int, default=16)
+    parser.add_argument('--bytes-per-second', type=float, default=16e6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        remote = tmp / 'remote'
+        remote.mkdir()
+        names = [f"images_{i + 1:02d}.tar.gz" for i in range(args.archives)]
+        for name in names:
+            (remote / name).write_bytes(os.urandom(args.mb << 20))
+        checksums = {name: DatasetUtils.file_sha256(remote / name) for name in names}
+        total_mb = args.archives * args.mb
+
+        server, url = serve_directory(remote, args.bytes_per_second)
+        try:
+            start = time.perf_counter()
+            for name in names:
+                legacy_download(f"{url}/{name}", tmp / f"legacy_{name}")
+            legacy_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            (tmp / 'pooled').mkdir()
+            DatasetUtils.download_files([(f"{url}/{name}", tmp / 'pooled' / name) for name in names],
+                                        max_workers=args.archives, checksums=checksums)
+            pooled_s = time.perf_counter() - start
+        finally:
+            server.shutdown()
+
+        print(f"sequential, 1 KB chunks : {total_mb / legacy_s:8.1f} MB/s")
+        print(f"pooled, {args.archives} workers      : {total_mb / pooled_s:8.1f} MB/s")
+
+        # Resume a half-written archive from servers with and without Range support
+        for support_range in (True, False):
+            server, url = serve_directory(remote, support_range=support_range)
+            target = tmp / f"resume_{support_range}" / names[0]
+            target.parent.mkdir()
+            part = target.with_name(target.name + '.part')
+            part.write_bytes((remote / names[0]).read_bytes()[:(args.mb << 20) // 2])
+            try:
+                transferred = DatasetUtils.download_file(f"{url}/{names[0]}", target,
+                                                         expected_sha256=checksums[names[0]])
+            finally:
+                server.shutdown()
+            assert DatasetUtils.file_sha256(target) == checksums[names[0]]
+            print(f"resume, range={'yes' if support_range else 'no '}      : "
+                  f"{transferred / 2**20:6.1f} MB transferred, checksum ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Time the streaming multi-label evaluator on a full-size prediction set and
+check its AUCs against scikit-learn's exact ones.
+
+Usage:
+    python -m benchmarks.bench_evaluation --rows 112120 --batch-size 256
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from sklearn.metrics import average_precision_score, roc_auc_score
+from benchmarks.synthetic import NIH_LABELS, make_metadata
+from src.components.data_transformations import encode_multi_hot
+from src.components.evaluation import MultiLabelEvaluator, evaluate_predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=112120)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--num-bins', type=int, default=1000)
+    args = parser.parse_args()
+
+    df = make_metadata(args.rows)
+    targets = encode_multi_hot(df['Finding Labels'], NIH_LABELS)
+    # Noisy scores that are informative about the targets
+    rng = np.random.default_rng(0)
+    logits = 1.5 * targets + rng.normal(size=targets.shape) - 2
+    probabilities = (1 / (1 + np.exp(-logits))).astype(np.float32)
+
+    evaluator = MultiLabelEvaluator(NIH_LABELS, args.num_bins)
+    start = time.perf_counter()
+    for i in range(0, args.rows, args.batch_size):
+        evaluator.update(targets[i:i + args.batch_size], probabilities[i:i + args.batch_size])
+    update_s = time.perf_counter() - start
+    start = time.perf_counter()
+    report = evaluator.result()
+    result_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exact_roc = np.array([roc_auc_score(targets[:, j], probabilities[:, j]) for j in range(len(NIH_LABELS))])
+    exact_pr = np.array([average_precision_score(targets[:, j], probabilities[:, j])
+                         for j in range(len(NIH_LABELS))])
+    sklearn_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        meta_csv = Path(tmp) / 'Data_Entry_2017_v2020.csv'
+        df.to_csv(meta_csv, index=False)
+        predictions = df[['Image Index']].copy()
+        predictions[NIH_LABELS] = probabilities
+        predictions.to_parquet(Path(tmp) / 'predictions.parquet', index=False)
+        start = time.perf_counter()
+        file_report = evaluate_predictions(Path(tmp) / 'predictions.parquet', meta_csv, args.num_bins)
+        file_s = time.perf_counter() - start
+        assert np.allclose(file_report['roc_auc'], report['roc_auc'])
+
+    state_kb = (evaluator.positives.nbytes + evaluator.negatives.nbytes) / 1024
+    print(f"{args.rows} images x {len(NIH_LABELS)} labels, batches of {args.batch_size}")
+    print(f"streaming updates        : {update_s * 1000:8.1f} ms ({state_kb:.0f} KiB of state)")
+    print(f"metrics from histograms  : {result_s * 1000:8.1f} ms")
+    print(f"sklearn exact ROC+PR AUC : {sklearn_s * 1000:8.1f} ms (all predictions in memory)")
+    print(f"CLI path, parquet file   : {file_s * 1000:8.1f} ms")
+    print(f"max |ROC-AUC error|      : {np.nanmax(np.abs(report['roc_auc'] - exact_roc)):.5f}")
+    print(f"max |PR-AUC error|       : {np.nanmax(np.abs(report['pr_auc'] - exact_pr)):.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Compare an epoch of full training with an epoch of head-only training on cached embeddings.
+
+Usage:
+    python -m benchmarks.bench_head_training --images 512 --epochs 2
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import NIH_LABELS, make_metadata, write_pngs
+from src.components.data_ingestion import DataIngestionPipeline
+from src.components.data_transformations import encode_multi_hot
+from src.components.feature_cache import FeatureCache
+from src.components.model_trainer import ModelTrainer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=512)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / 'images'
+        df = make_metadata(args.images)
+        write_pngs(df['Image Index'], image_dir, size=256)
+        ingestion = DataIngestionPipeline(batch_size=args.batch_size, backend='tf.data')
+        batch_df = ingestion.select_images(df, image_dir, 1)
+        targets = encode_multi_hot(batch_df['Finding Labels'], NIH_LABELS)
+
+        trainer = ModelTrainer(epochs=args.epochs, weights_path=f"{tmp}/ckpt/model.weights.h5")
+        generators = ingestion.create_generators(df, df, image_dir, 1, NIH_LABELS)
+        start = time.perf_counter()
+        trainer.train_batch(generators['train_generator'], generators['valid_generator'], 1)
+        full = (time.perf_counter() - start) / args.epochs
+
+        cache = FeatureCache(f"{tmp}/features", trainer.backbone_fingerprint(), trainer.feature_dim)
+        start = time.perf_counter()
+        cache.add(batch_df['Image Index'], trainer.extract_features(ingestion.create_ordered_dataset(batch_df, NIH_LABELS)))
+        extract = time.perf_counter() - start
+
+        start = time.perf_counter()
+        features = cache.read(batch_df['Image Index'])
+        trainer.train_head(features, targets, features, targets, 1, batch_size=args.batch_size)
+        head = (time.perf_counter() - start) / args.epochs
+
+        print(f"full training      : {full:8.2f} s/epoch ({len(batch_df)} images)")
+        print(f"feature extraction : {extract:8.2f} s (once)")
+        print(f"head-only training : {head:8.2f} s/epoch")
+
+
+if __name__ == "__main__":
+    main()
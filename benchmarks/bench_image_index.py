@@ -0,0 +1,84 @@
+"""
+Compare per-batch image path resolution: re-globbing the image directory
+versus lookups in the persistent image index.
+
+Empty files stand in for the PNGs of one extracted archive; the metadata has
+the size of the full NIH CSV split into train and test frames.
+
+Usage:
+    python -m benchmarks.bench_image_index --images 10000 --rows 112120
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.synthetic import make_metadata
+from src.components.data_ingestion import DataIngestionPipeline
+from src.components.image_index import ImageIndex
+
+
+def glob_and_apply(df, image_dir):
+    """Path resolution before the image index: glob, name set and a per-row apply."""
+    image_names = {img.name for img in image_dir.glob('*.png')}
+    batch_df = df[df['Image Index'].isin(image_names)].copy()
+    batch_df['image_path'] = batch_df['Image Index'].apply(lambda x: str(image_dir / x))
+    return batch_df
+
+
+def best_of(func, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=10000, help="Images in the extracted archive")
+    parser.add_argument('--rows', type=int, default=112120)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    df = make_metadata(args.rows)
+    split = int(len(df) * 0.8)
+    train_df, test_df = df.iloc[:split], df.iloc[split:]
+    names = df['Image Index'].sample(args.images, random_state=0).tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / 'images'
+        image_dir.mkdir()
+        for name in names:
+            (image_dir / name).touch()
+
+        def before():
+            return [glob_and_apply(frame, image_dir) for frame in (train_df, test_df)]
+
+        start = time.perf_counter()
+        index = ImageIndex(Path(tmp) / 'image_index.parquet')
+        index.add('images_01', image_dir, names)
+        add_s = time.perf_counter() - start
+        ingestion = DataIngestionPipeline(backend='tf.data', image_index=index)
+
+        def after():
+            return [ingestion.select_images(frame, image_dir, 1, ['images_01']) for frame in (train_df, test_df)]
+
+        expected, actual = before(), after()
+        for old, new in zip(expected, actual):
+            assert old.index.equals(new.index)
+            assert np.array_equal(old['image_path'].to_numpy(), new['image_path'].to_numpy())
+
+        before_s = best_of(before, args.repeats)
+        after_s = best_of(after, args.repeats)
+        reload_s = best_of(lambda: ImageIndex(Path(tmp) / 'image_index.parquet'), args.repeats)
+
+    print(f"glob + apply per batch  : {before_s * 1000:8.1f} ms")
+    print(f"image index per batch   : {after_s * 1000:8.1f} ms  ({before_s / after_s:.1f}x faster)")
+    print(f"index archive (one-off) : {add_s * 1000:8.1f} ms")
+    print(f"reload persisted index  : {reload_s * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
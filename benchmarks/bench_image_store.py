@@ -0,0 +1,48 @@
+"""
+Compare PNG decoding with reads from the memory-mapped image store.
+
+Usage:
+    python -m benchmarks.bench_image_store --images 512 --epochs 3
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import NIH_LABELS, make_metadata, write_pngs
+from benchmarks.bench_input_pipeline import images_per_second
+from src.components.data_ingestion import DataIngestionPipeline
+from src.components.image_store import ImageStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=512)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / 'images'
+        df = make_metadata(args.images).replace('No Finding', '')
+        paths = write_pngs(df['Image Index'], image_dir)
+
+        start = time.perf_counter()
+        store = ImageStore(Path(tmp) / 'image_store')
+        store.add_images(paths, 'images_01')
+        build_s = time.perf_counter() - start
+        print(f"store build          : {build_s:8.2f} s ({len(store)} images, decoded once)")
+
+        start = time.perf_counter()
+        store.get_batch(df['Image Index'].sample(args.batch_size, random_state=0))
+        print(f"random batch read    : {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+        for backend in ('tf.data', 'store'):
+            ingestion = DataIngestionPipeline(batch_size=args.batch_size, backend=backend,
+                                              image_store=store)
+            generators = ingestion.create_generators(df, df, image_dir, 1, NIH_LABELS)
+            rate = images_per_second(generators['train_generator'], args.epochs)
+            print(f"{backend:8s} epochs     : {rate:8.1f} images/sec (train, augmented)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Measure the import time of the entry-point modules with `python -X importtime`
+and enforce a budget.
+
+Each module is imported in a fresh interpreter. The run fails (exit code 1)
+when a module's median cumulative import time exceeds the budget, or when it
+pulls in a dependency that must stay lazy.
+
+Usage:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --budget-ms 300 --repeats 5
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ENTRY_MODULES = [
+    'src.pipeline.main',
+    'src.pipeline.distributed',
+    'src.pipeline.serving',
+    'src.pipeline.batch_predict',
+    'src.components.evaluation',
+]
+# Loaded only by the code paths that need them
+LAZY_DEPENDENCIES = ['tensorflow', 'keras', 'sklearn', 'mlflow', 'requests', 'tqdm']
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        Tuple: Cumulative import time in ms, its direct dependencies with their
+            times in ms, and the lazy dependencies that were loaded
+    """
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT)}
+    check = f"import sys; print(','.join(m for m in {LAZY_DEPENDENCIES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}; {check}"],
+                            capture_output=True, text=True, env=env, check=True)
+    total, children = 0.0, []
+    for match in _LINE.finditer(result.stderr):
+        cumulative, depth, name = int(match.group(2)) / 1000, len(match.group(3)) // 2, match.group(4)
+        if name == module:
+            total = cumulative
+        elif depth == 1:
+            children.append((name, cumulative))
+    loaded = [name for name in result.stdout.strip().split(',') if name]
+    return total, children, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=ENTRY_MODULES)
+    parser.add_argument('--budget-ms', type=float, default=1000.0, help="Allowed median import time per module")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=3, help="Heaviest direct dependencies to show")
+    args = parser.parse_args()
+
+    failures: Dict[str, str] = {}
+    for module in args.modules:
+        profiles = [import_profile(module) for _ in range(args.repeats)]
+        median = statistics.median(total for total, _, _ in profiles)
+        _, children, loaded = profiles[-1]
+        heaviest = ', '.join(f"{name} {ms:.0f}" for name, ms in sorted(children, key=lambda c: -c[1])[:args.top])
+        print(f"{module:30s} {median:8.1f} ms   ({heaviest})")
+        if median > args.budget_ms:
+            failures[module] = f"{median:.0f} ms exceeds the {args.budget_ms:.0f} ms budget"
+        if loaded:
+            failures[module] = f"imports {', '.join(loaded)} at import time"
+
+    if failures:
+        print()
+        for module, reason in failures.items():
+            print(f"FAIL {module}: {reason}")
+        sys.exit(1)
+    print(f"\nAll modules within {args.budget_ms:.0f} ms and free of {', '.join(LAZY_DEPENDENCIES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Compare images/sec of the ImageDataGenerator and tf.data input backends.
+
+Usage:
+    python -m benchmarks.bench_input_pipeline --images 512 --epochs 2
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import NIH_LABELS, make_metadata, write_pngs
+from src.components.data_ingestion import DataIngestionPipeline
+
+
+def images_per_second(generator, epochs: int) -> float:
+    n_images = 0
+    start = time.perf_counter()
+    for _ in range(epochs):
+        if hasattr(generator, 'take'):
+            for images, _ in generator:
+                n_images += len(images)
+        else:
+            for i in range(len(generator)):
+                n_images += len(generator[i][0])
+            generator.on_epoch_end()
+    return n_images / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=512)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = Path(tmp) / 'images'
+        df = make_metadata(args.images).replace('No Finding', '')
+        write_pngs(df['Image Index'], image_dir)
+
+        for backend in ('keras', 'tf.data'):
+            ingestion = DataIngestionPipeline(batch_size=args.batch_size, backend=backend)
+            generators = ingestion.create_generators(df, df, image_dir, 1, NIH_LABELS)
+            rate = images_per_second(generators['train_generator'], args.epochs)
+            print(f"{backend:8s}: {rate:8.1f} images/sec (train, augmented)")
+
+
+if __name__ == "__main__":
+    main()
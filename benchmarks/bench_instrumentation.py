@@ -0,0 +1,62 @@
+"""
+Measure the overhead of instrumentation spans, the step-timing callback hooks
+and the delivery stamp it adds to a tf.data training input.
+
+Usage:
+    python -m benchmarks.bench_instrumentation --iterations 20000
+"""
+import argparse
+import logging
+import time
+import tensorflow as tf
+from src.utils.instrumentation import StepTimingCallback, Tracer
+
+
+def per_call_us(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+    logging.getLogger("instrumentation").setLevel(logging.INFO)
+
+    for enabled in (False, True):
+        tracer = Tracer(enabled=enabled)
+
+        def one_span():
+            with tracer.span('bench', batch=1):
+                pass
+
+        cost = per_call_us(one_span, args.iterations)
+        tracer.drain()
+        print(f"span (enabled={enabled!s:5s})     : {cost:8.1f} us/span")
+
+    callback = StepTimingCallback(Tracer(enabled=False))
+    callback.time_input(tf.data.Dataset.range(1))
+    callback.on_epoch_begin(0)
+
+    def one_step():
+        callback.on_train_batch_begin(0)
+        callback.on_train_batch_end(0)
+
+    print(f"StepTimingCallback hooks  : {per_call_us(one_step, args.iterations):8.1f} us/step")
+
+    batches = tf.data.Dataset.range(args.iterations // 10).map(lambda i: (tf.fill([32, 8], i), i)).cache()
+    for stamped in (False, True):
+        dataset = StepTimingCallback(Tracer(enabled=False)).time_input(batches) if stamped else batches
+        for _ in dataset:
+            pass
+        start = time.perf_counter()
+        for _ in dataset:
+            pass
+        cost = (time.perf_counter() - start) / (args.iterations // 10) * 1e6
+        print(f"dataset (stamped={stamped!s:5s})  : {cost:8.1f} us/batch")
+
+
+if __name__ == "__main__":
+    main()
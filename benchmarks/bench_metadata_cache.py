@@ -0,0 +1,61 @@
+"""
+Time cold vs warm DataTransformations.process_pipeline with the metadata cache,
+then check that editing the CSV invalidates the cache entry and that a
+damaged entry is recomputed.
+
+Usage:
+    python -m benchmarks.bench_metadata_cache --rows 112120
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import make_metadata
+from src.components.data_transformations import DataTransformations
+
+
+def timed_run(csv_path, cache_dir, sample_size):
+    transformer = DataTransformations(meta_csv_path=str(csv_path), cache_dir=str(cache_dir))
+    start = time.perf_counter()
+    result = transformer.process_pipeline(sample_size)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=112120)
+    parser.add_argument('--sample-size', type=int, default=40000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'Data_Entry_2017_v2020.csv'
+        cache_dir = Path(tmp) / 'metadata_cache'
+        make_metadata(args.rows).to_csv(csv_path, index=False)
+
+        cold_s, (train, test, labels) = timed_run(csv_path, cache_dir, args.sample_size)
+        warm_s, (warm_train, warm_test, warm_labels) = timed_run(csv_path, cache_dir, args.sample_size)
+        assert warm_labels == labels
+        assert warm_train.index.equals(train.index) and warm_test.index.equals(test.index)
+        assert (warm_train[labels].to_numpy() == train[labels].to_numpy()).all()
+
+        # Editing the CSV must produce a new cache entry
+        with open(csv_path, 'a') as file:
+            file.write('99999999_000.png,Hernia,0,99999999,50,M,PA,1024,1024,0.143,0.143\n')
+        edited_s, _ = timed_run(csv_path, cache_dir, args.sample_size)
+        entries = [p for p in cache_dir.iterdir() if not p.name.startswith('.')]
+        assert len(entries) == 2, entries
+
+        # A damaged entry is a miss: it is recomputed and written again
+        newest = max(entries, key=lambda p: p.stat().st_mtime)
+        (newest / 'test.parquet').unlink()
+        repaired_s, _ = timed_run(csv_path, cache_dir, args.sample_size)
+        assert (newest / 'test.parquet').exists()
+
+    print(f"cold run          : {cold_s * 1000:9.1f} ms")
+    print(f"warm run          : {warm_s * 1000:9.1f} ms  ({cold_s / warm_s:.0f}x faster)")
+    print(f"after CSV edit    : {edited_s * 1000:9.1f} ms  (cache invalidated)")
+    print(f"damaged entry     : {repaired_s * 1000:9.1f} ms  (recomputed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare per-step MLflow logging cost of the synchronous and the background logger.
+
+Both paths log the same per-step metrics to a local file-store tracking URI;
+the caller-side time is what a training step would pay.
+
+Usage:
+    python -m benchmarks.bench_mlflow_logging --steps 500 --metrics 3
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import mlflow
+from mlflow import MlflowClient
+from src.utils import mlflow_utils
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--metrics', type=int, default=3, help="Metrics logged per step")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        mlflow.set_tracking_uri(Path(tmp).as_uri())
+        mlflow.set_experiment('bench_mlflow_logging')
+        names = [f"metric_{i}" for i in range(args.metrics)]
+
+        for mode in ('sync', 'async'):
+            with mlflow.start_run() as run:
+                logger = mlflow_utils.start_async_logging() if mode == 'async' else None
+                start = time.perf_counter()
+                for step in range(args.steps):
+                    mlflow_utils.log_metrics({name: step * 0.1 for name in names}, step=step)
+                caller = time.perf_counter() - start
+                if logger is not None:
+                    logger.flush()
+                total = time.perf_counter() - start
+                mlflow_utils.end_run()
+            logged = sum(len(MlflowClient().get_metric_history(run.info.run_id, name)) for name in names)
+            print(f"{mode:5s}: {caller / args.steps * 1e6:9.1f} us/step on the caller, "
+                  f"{total:6.2f}s until written, {logged} points logged")
+
+
+if __name__ == "__main__":
+    main()
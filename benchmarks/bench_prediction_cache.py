@@ -0,0 +1,88 @@
+"""
+Compare cached and uncached prediction latency, and check that replacing
+the model file while serving never serves or stores predictions under the
+wrong model: the running server keeps its loaded model's entries, and a
+restart on the new model gets no disk hits from the old one.
+
+Usage:
+    python -m benchmarks.bench_prediction_cache --model-path artifacts/final_model.keras
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+from benchmarks.load_test_server import synthetic_png
+from src.components.prediction_cache import PredictionCache
+from src.pipeline.predict_pipeline import decode_image, load_predictor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--model-path', default='artifacts/final_model.keras')
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path = Path(tmp) / Path(args.model_path).name
+        shutil.copy(args.model_path, model_path)
+        predictor = load_predictor(str(model_path))
+        cache = PredictionCache(predictor.fingerprint, max_entries=100, disk_dir=Path(tmp) / 'cache')
+        image = synthetic_png()
+
+        def score(data, predictor=predictor, cache=cache):
+            cached = cache.get(data)
+            if cached is not None:
+                return cached
+            probabilities = predictor.predict_batch(decode_image(data, predictor.img_size)[None])[0]
+            cache.put(data, probabilities, predictor.fingerprint)
+            return probabilities
+
+        score(image)
+        start = time.perf_counter()
+        for _ in range(20):
+            predictor.predict_batch(decode_image(image, predictor.img_size)[None])
+        uncached_ms = (time.perf_counter() - start) / 20 * 1000
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            score(image)
+        cached_us = (time.perf_counter() - start) / args.repeats * 1e6
+
+        # Replace the model file while serving with a retrained one (here: a shifted output bias)
+        v1 = score(image)
+        new_model = Path(tmp) / f"new_{model_path.name}"
+        weights = predictor.model.get_weights()
+        predictor.model.set_weights(weights[:-1] + [weights[-1] + 1.0])
+        predictor.model.save(new_model)
+        predictor.model.set_weights(weights)
+        os.replace(new_model, model_path)
+
+        # The running server still scores with the loaded model, so its entries stay valid
+        assert np.array_equal(score(image), v1)
+        assert np.allclose(predictor.predict_batch(decode_image(image, predictor.img_size)[None])[0], v1)
+        # An output captured under another fingerprint is never stored
+        cache.put(b'other image', v1, fingerprint='0' * 64)
+        assert cache.get(b'other image') is None
+        stats = cache.stats()
+        assert stats['stale_puts'] == 1
+
+        # A restart on the new model must not return the old model's disk entries
+        restarted = load_predictor(str(model_path))
+        restarted_cache = PredictionCache(restarted.fingerprint, max_entries=100, disk_dir=Path(tmp) / 'cache')
+        assert restarted.fingerprint != predictor.fingerprint
+        assert restarted_cache.get(image) is None and restarted_cache.stats()['disk_hits'] == 0
+        v2 = score(image, restarted, restarted_cache)
+        assert not np.allclose(v2, v1)
+        assert np.array_equal(restarted_cache.get(image), v2)
+
+    print(f"uncached decode + predict : {uncached_ms:8.2f} ms")
+    print(f"cache hit                 : {cached_us:8.1f} us")
+    print(f"counters                  : {stats}")
+    print("model replaced while serving: no stale entries served or stored")
+
+
+if __name__ == "__main__":
+    main()
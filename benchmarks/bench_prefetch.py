@@ -0,0 +1,70 @@
+"""
+Time a multi-archive DataPipeline run with and without archive prefetching,
+and with one or several download workers at one archive per batch.
+
+Synthetic archives are served from a throttled local HTTP server and training
+is replaced by a fixed sleep, so the run shows how much of the fetch time is
+hidden behind training.
+
+Usage:
+    python -m benchmarks.bench_prefetch --archives 4 --train-seconds 2
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import make_metadata, serve_directory, write_archive, write_pngs
+from src.pipeline.main import DataPipeline, PipelineConfig
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--archives', type=int, default=4)
+    parser.add_argument('--images-per-archive', type=int, default=32)
+    parser.add_argument('--train-seconds', type=float, default=2.0)
+    parser.add_argument('--bytes-per-second', type=float, default=4e6)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        df = make_metadata(max(4000, args.archives * args.images_per_archive))
+        csv_path = tmp / 'Data_Entry_2017_v2020.csv'
+        df.to_csv(csv_path, index=False)
+        (tmp / 'remote').mkdir()
+        for i in range(args.archives):
+            names = df['Image Index'][i * args.images_per_archive:(i + 1) * args.images_per_archive]
+            paths = write_pngs(names, tmp / 'png' / str(i))
+            write_archive(paths, tmp / 'remote' / f"images_{i + 1:02d}.gz")
+        server, base_url = serve_directory(tmp / 'remote', args.bytes_per_second)
+
+        try:
+            for depth, workers in ((0, 1), (1, 1), (1, args.archives)):
+                # Fresh working directory, so no run resumes from another's manifest
+                run_dir = tmp / f"run_{depth}_{workers}"
+                run_dir.mkdir()
+                os.chdir(run_dir)
+                config = PipelineConfig(
+                    meta_csv_path=csv_path,
+                    metadata_cache_dir=None,
+                    sample_size=len(df) * 3 // 4,
+                    links=[f"{base_url}/images_{i + 1:02d}.gz" for i in range(args.archives)],
+                    prefetch_depth=depth,
+                    download_workers=workers
+                )
+                pipeline = DataPipeline(config)
+                pipeline.model_trainer.train_batch = lambda *_, **__: time.sleep(args.train_seconds)
+                pipeline.model_trainer.save_model = lambda *_, **__: None
+
+                start = time.perf_counter()
+                pipeline.run()
+                print(f"prefetch_depth={depth}, download_workers={workers}: {time.perf_counter() - start:6.2f} s "
+                      f"({args.archives} archives, {args.train_seconds:.1f} s training each)")
+        finally:
+            os.chdir(cwd)
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
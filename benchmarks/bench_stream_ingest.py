@@ -0,0 +1,55 @@
+"""
+Compare extract-then-decode with streaming an archive into the image store.
+
+Usage:
+    python -m benchmarks.bench_stream_ingest --images 256
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import make_metadata, write_archive, write_pngs
+from src.components.image_store import ImageStore
+from src.components.utils import DatasetUtils
+
+
+def directory_bytes(path: Path) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--images', type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        names = make_metadata(args.images)['Image Index']
+        tar_path = write_archive(write_pngs(names, tmp / 'png'), tmp / 'images_01.tar.gz')
+        DatasetUtils.cleanup_files([tmp / 'png'])
+        archive_bytes = os.path.getsize(tar_path)
+
+        start = time.perf_counter()
+        extract_dir = tmp / 'extracted'
+        DatasetUtils.extract_tar_gz(tar_path, extract_dir)
+        temp_bytes = directory_bytes(extract_dir)
+        extracted_store = ImageStore(tmp / 'store_extract')
+        extracted_store.add_images(sorted((extract_dir / 'images').glob('*.png')), 'images_01')
+        DatasetUtils.cleanup_files([extract_dir])
+        extract_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        streamed_store = ImageStore(tmp / 'store_stream')
+        streamed_store.add_from_tar(tar_path, 'images_01')
+        stream_s = time.perf_counter() - start
+
+        assert (streamed_store.get_batch(names) == extracted_store.get_batch(names)).all()
+
+    print(f"archive size         : {archive_bytes / 1e6:8.1f} MB")
+    print(f"extract + decode     : {extract_s:8.2f} s, {temp_bytes / 1e6:8.1f} MB written and read back")
+    print(f"stream from tar      : {stream_s:8.2f} s, {0:8.1f} MB temporary files")
+
+
+if __name__ == "__main__":
+    main()
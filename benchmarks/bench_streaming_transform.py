@@ -0,0 +1,93 @@
+"""
+Peak memory and wall time of DataTransformations on a large metadata CSV:
+the in-memory path against the out-of-core path at several chunk sizes.
+
+Every run happens in a fresh interpreter so its peak RSS is its own. The
+"imports" row is the resident size of the interpreter with pandas loaded,
+which all other runs include. The label prevalence of each sample is
+compared to the in-memory sample.
+
+Usage:
+    python -m benchmarks.bench_streaming_transform --rows 2000000 --chunk-sizes 50000 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+import numpy as np
+from benchmarks.synthetic import NIH_LABELS, make_metadata
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+_RUN = """
+import json, resource, sys, time
+from src.components.data_transformations import DataTransformations
+csv_path, output_dir, sample_size, chunk_size = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+start = time.perf_counter()
+prevalence = None
+if chunk_size > 0:
+    import pandas as pd
+    transformer = DataTransformations(csv_path)
+    labels = transformer.stream_transform(sample_size, output_dir, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    sample = pd.concat([pd.read_parquet(f"{output_dir}/{split}.parquet", columns=labels) for split in ('train', 'test')])
+    prevalence = sample.mean().to_dict()
+elif chunk_size == 0:
+    transformer = DataTransformations(csv_path)
+    transformer.load_metadata_file()
+    train, test, labels = transformer.transform_data(sample_size)
+    elapsed = time.perf_counter() - start
+    prevalence = (train[labels].sum() + test[labels].sum()).div(len(train) + len(test)).to_dict()
+else:
+    import pandas
+    elapsed = 0.0
+peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({'seconds': elapsed, 'peak_mb': peak_mb, 'prevalence': prevalence}))
+"""
+
+
+def write_csv(path: Path, rows: int, block: int = 250_000) -> None:
+    """Write the synthetic CSV in blocks so the benchmark process itself stays small."""
+    written = 0
+    while written < rows:
+        df = make_metadata(min(block, rows - written), seed=written)
+        df.to_csv(path, mode='a', header=written == 0, index=False)
+        written += len(df)
+
+
+def run(csv_path: Path, output_dir: Path, sample_size: int, chunk_size: int) -> dict:
+    env = {**os.environ, 'PYTHONPATH': str(REPO_ROOT)}
+    result = subprocess.run([sys.executable, '-c', _RUN, str(csv_path), str(output_dir), str(sample_size),
+                             str(chunk_size)], capture_output=True, text=True, env=env, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--sample-size', type=int, default=40000)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[50_000, 200_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / 'manifest.csv'
+        write_csv(csv_path, args.rows)
+        print(f"{args.rows} rows, {csv_path.stat().st_size / 2 ** 20:.0f} MiB CSV, sample of {args.sample_size}")
+
+        baseline = run(csv_path, Path(tmp), args.sample_size, -1)
+        print(f"{'imports':>18s}: {'':>8s}   peak {baseline['peak_mb']:7.0f} MiB")
+        reference = run(csv_path, Path(tmp), args.sample_size, 0)
+        print(f"{'in memory':>18s}: {reference['seconds']:7.1f}s   peak {reference['peak_mb']:7.0f} MiB")
+        expected = np.array([reference['prevalence'][label] for label in NIH_LABELS])
+        for chunk_size in args.chunk_sizes:
+            result = run(csv_path, Path(tmp) / f"chunks_{chunk_size}", args.sample_size, chunk_size)
+            observed = np.array([result['prevalence'][label] for label in NIH_LABELS])
+            print(f"{f'chunks of {chunk_size}':>18s}: {result['seconds']:7.1f}s   peak {result['peak_mb']:7.0f} MiB"
+                  f"   max prevalence difference {np.abs(observed - expected).max():.4f}")
+
+
+if __name__ == "__main__":
+    main()
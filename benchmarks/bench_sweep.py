@@ -0,0 +1,64 @@
+"""
+Time a hyperparameter sweep on synthetic data: the one-off data preparation,
+and the whole sweep with sequential and parallel training processes.
+
+Running src.pipeline.main once per configuration repeats the preparation for
+every configuration; the sweep runner does it once.
+
+Usage:
+    python -m benchmarks.bench_sweep --configs 4 --parallel 1 2
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from benchmarks.synthetic import make_metadata, serve_directory, write_archive, write_pngs
+from src.pipeline.main import PipelineConfig
+from src.pipeline.sweep import SweepRunner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=4000)
+    parser.add_argument('--sample-size', type=int, default=3000)
+    parser.add_argument('--images', type=int, default=400)
+    parser.add_argument('--image-size', type=int, default=256, help="Width and height of the synthetic PNGs")
+    parser.add_argument('--img-size', type=int, default=64, help="Model input size")
+    parser.add_argument('--configs', type=int, default=4, help="Learning rates in the grid")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--parallel', type=int, nargs='+', default=[1, 2])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        df = make_metadata(args.rows)
+        df.to_csv(root / 'meta.csv', index=False)
+        (root / 'serve').mkdir()
+        paths = write_pngs(df['Image Index'][:args.images], root / 'png', size=args.image_size)
+        write_archive(paths, root / 'serve' / 'images_01.tar.gz')
+        server, url = serve_directory(root / 'serve')
+        grid = {'learning_rate': [1e-3 / 2 ** i for i in range(args.configs)],
+                'img_size': [(args.img_size, args.img_size)]}
+        try:
+            for parallel in args.parallel:
+                config = PipelineConfig(links=[f"{url}/images_01.tar.gz"], meta_csv_path=root / 'meta.csv',
+                                        metadata_cache_dir=None, sample_size=args.sample_size, epochs=args.epochs,
+                                        image_store_dir=root / f"store_{parallel}")
+                runner = SweepRunner(config, grid, parallel=parallel, output_dir=root / f"sweep_{parallel}")
+                start = time.perf_counter()
+                runner.prepare_data()
+                prepare_s = time.perf_counter() - start
+
+                start = time.perf_counter()
+                summary = runner.run()
+                total_s = time.perf_counter() - start
+                assert (summary['status'] == 'ok').all(), summary['status'].tolist()
+                print(f"parallel={parallel}: preparation {prepare_s:6.1f}s once "
+                      f"(x{args.configs} = {prepare_s * args.configs:6.1f}s per-config), "
+                      f"sweep of {args.configs} configs {total_s:6.1f}s")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
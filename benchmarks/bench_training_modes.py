@@ -0,0 +1,61 @@
+"""
+Compare the training step time of ModelTrainer's performance modes on synthetic 128x128 inputs.
+
+Each mode trains for a warm-up epoch (tracing and XLA compilation) and a
+timed epoch; the loss of the timed epoch is printed to check numerics.
+
+Usage:
+    python -m benchmarks.bench_training_modes --steps 20 --batch-size 32
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+import tensorflow as tf
+from src.components.model_trainer import ModelTrainer
+
+MODES = {
+    'baseline (float32)': {},
+    'jit_compile': {'jit_compile': True},
+    'mixed_bfloat16': {'mixed_precision': 'mixed_bfloat16'},
+    'mixed_bfloat16 + jit': {'mixed_precision': 'mixed_bfloat16', 'jit_compile': True},
+    'steps_per_execution=8': {'steps_per_execution': 8},
+}
+
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--modes', nargs='*', default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    images = rng.uniform(0, 255, (args.batch_size * 4, 128, 128, 1)).astype(np.float32)
+    targets = (rng.random((len(images), 14)) < 0.1).astype(np.float32)
+    dataset = (tf.data.Dataset.from_tensor_slices((images, targets))
+               .batch(args.batch_size, drop_remainder=True).repeat().prefetch(tf.data.AUTOTUNE))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for name in args.modes:
+            trainer = ModelTrainer(weights_path=f"{tmp}/{len(name)}/model.weights.h5", **MODES[name])
+            timer = EpochTimer()
+            history = trainer.model.fit(dataset, epochs=2, steps_per_epoch=args.steps,
+                                        callbacks=[timer], verbose=0)
+            step_ms = timer.elapsed / args.steps * 1000
+            baseline = baseline or step_ms
+            print(f"{name:24s}: {step_ms:8.1f} ms/step ({baseline / step_ms:4.2f}x)  "
+                  f"loss {history.history['loss'][-1]:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Load-test a running inference server (python -m src.pipeline.serving).
+
+Usage:
+    python -m benchmarks.load_test_server --url http://127.0.0.1:8080 --concurrency 32 --duration 20
+"""
+import argparse
+import io
+import threading
+import time
+import numpy as np
+import requests
+from PIL import Image
+
+
+def synthetic_png(size: int = 1024, seed: int = 0) -> bytes:
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (size, size), dtype=np.uint8)).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20.0)
+    parser.add_argument('--image', help="Image to send; a synthetic 1024x1024 PNG by default")
+    args = parser.parse_args()
+
+    payload = open(args.image, 'rb').read() if args.image else synthetic_png()
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def client():
+        session = requests.Session()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.post(f"{args.url}/predict", data=payload,
+                                        headers={'Content-Type': 'application/octet-stream'})
+                response.raise_for_status()
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (0.0, 0.0)
+    print(f"client : {len(latencies) / elapsed:8.1f} req/s  p50 {p50:7.1f} ms  p99 {p99:7.1f} ms  "
+          f"errors {len(errors)}")
+    server = requests.get(f"{args.url}/metrics").json()
+    print(f"server : {server['requests_per_sec']:8.1f} req/s  p50 {server['p50_ms']:7.1f} ms  "
+          f"p99 {server['p99_ms']:7.1f} ms  mean batch {server['mean_batch_size']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+End-to-end pipeline benchmark on a synthetic NIH-shaped dataset, with no network access.
+
+Builds a synthetic Data_Entry_2017_v2020.csv and grayscale PNG tarballs,
+serves them from a local HTTP stand-in and times each pipeline stage
+separately: metadata processing, download, extraction, input pipeline
+throughput, training step time and inference latency. Results are written as
+JSON and can be compared with a stored baseline; the exit code is 1 when a
+metric regressed by more than the threshold.
+
+Usage:
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --output results.json --baseline benchmarks/baseline.json --threshold 0.15
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+import numpy as np
+from benchmarks.bench_input_pipeline import images_per_second
+from benchmarks.synthetic import make_metadata, serve_directory, write_archive, write_pngs
+
+
+class Results:
+    """Named metrics with a unit and the direction that counts as better."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str) -> None:
+        self.metrics[name] = {'value': float(value), 'unit': unit, 'better': better}
+        print(f"{name:36s} {value:12.3f} {unit}")
+
+
+def build_dataset(root: Path, args) -> List[Path]:
+    """Write the metadata CSV and archives; return the archive paths."""
+    df = make_metadata(args.rows, seed=args.seed)
+    df.to_csv(root / 'Data_Entry_2017_v2020.csv', index=False)
+    archives = []
+    for i in range(args.archives):
+        names = df['Image Index'][i * args.images_per_archive:(i + 1) * args.images_per_archive]
+        paths = write_pngs(names, root / f"png_{i + 1:02d}", size=args.image_size, seed=args.seed + i)
+        archives.append(write_archive(paths, root / 'serve' / f"images_{i + 1:02d}.tar.gz"))
+    return archives
+
+
+def run_suite(args) -> Dict:
+    import tensorflow as tf
+    from src.components.data_ingestion import DataIngestionPipeline
+    from src.components.data_transformations import DataTransformations
+    from src.components.model_trainer import ModelTrainer
+    from src.components.utils import DatasetUtils
+    from src.pipeline.predict_pipeline import PredictPipeline
+
+    results = Results()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        (root / 'serve').mkdir()
+        (root / 'downloads').mkdir()
+        archives = build_dataset(root, args)
+
+        # Metadata processing
+        start = time.perf_counter()
+        train_df, test_df, labels = DataTransformations(
+            str(root / 'Data_Entry_2017_v2020.csv'), random_state=args.seed
+        ).process_pipeline(args.sample_size)
+        results.add('metadata.process_pipeline_s', time.perf_counter() - start, 's', 'lower')
+
+        # Download from the local stand-in
+        server, url = serve_directory(root / 'serve', bytes_per_second=args.bandwidth)
+        try:
+            downloaded = 0
+            start = time.perf_counter()
+            for archive in archives:
+                downloaded += DatasetUtils.download_file(f"{url}/{archive.name}", root / 'downloads' / archive.name)
+            elapsed = time.perf_counter() - start
+        finally:
+            server.shutdown()
+        results.add('download.mb_per_s', downloaded / 1e6 / elapsed, 'MB/s', 'higher')
+
+        # Extraction
+        image_dir = root / 'nih' / 'images'
+        start = time.perf_counter()
+        for archive in archives:
+            DatasetUtils.extract_tar_gz(root / 'downloads' / archive.name, root / 'nih')
+        elapsed = time.perf_counter() - start
+        n_images = args.archives * args.images_per_archive
+        results.add('extract.images_per_s', n_images / elapsed, 'images/s', 'higher')
+
+        # Input pipeline throughput
+        generators = {}
+        for backend in args.backends:
+            ingestion = DataIngestionPipeline(batch_size=args.batch_size, backend=backend, seed=args.seed)
+            generators[backend] = ingestion.create_generators(train_df, test_df, image_dir, 1, labels)
+            rate = images_per_second(generators[backend]['train_generator'], epochs=1)
+            results.add(f"ingestion.{backend}.images_per_s", rate, 'images/s', 'higher')
+
+        # Training step time of the last epoch, excluding validation
+        class StepTimer(tf.keras.callbacks.Callback):
+            def on_epoch_begin(self, epoch, logs=None):
+                self.steps = []
+
+            def on_train_batch_begin(self, batch, logs=None):
+                self.start = time.perf_counter()
+
+            def on_train_batch_end(self, batch, logs=None):
+                self.steps.append(time.perf_counter() - self.start)
+
+            @property
+            def ms_per_step(self) -> float:
+                return float(np.median(self.steps)) * 1000
+
+        trainer = ModelTrainer(img_size=(128, 128), epochs=args.epochs,
+                               weights_path=str(root / 'checkpoints' / 'best_model.weights.h5'))
+        timer = StepTimer()
+        batches = generators[args.backends[-1]]
+        trainer.train_batch(batches['train_generator'], batches['valid_generator'], 1, callbacks=[timer])
+        results.add('train.ms_per_step', timer.ms_per_step, 'ms', 'lower')
+
+        # Inference latency and throughput
+        model_path = root / 'artifacts' / 'final_model.keras'
+        trainer.save_model(str(model_path), serving_path=str(root / 'artifacts' / 'serving_model'))
+        predictor = PredictPipeline(str(model_path))
+        sample = next(image_dir.glob('*.png')).read_bytes()
+        predictor.predict([sample])
+        latencies = []
+        for _ in range(args.inference_requests):
+            start = time.perf_counter()
+            predictor.predict([sample])
+            latencies.append(time.perf_counter() - start)
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        results.add('inference.p50_ms', p50, 'ms', 'lower')
+        results.add('inference.p99_ms', p99, 'ms', 'lower')
+        batch = np.random.default_rng(args.seed).uniform(0, 255, (args.batch_size, 128, 128, 1)).astype(np.float32)
+        predictor.predict_batch(batch)
+        start = time.perf_counter()
+        for _ in range(5):
+            predictor.predict_batch(batch)
+        results.add('inference.batch_images_per_s', 5 * args.batch_size / (time.perf_counter() - start),
+                    'images/s', 'higher')
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'tensorflow': tf.__version__,
+            'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        },
+        'metrics': results.metrics,
+    }
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """
+    Compare metrics with a baseline.
+
+    Args:
+        results: Output of run_suite
+        baseline: Earlier output of run_suite
+        threshold: Allowed relative slowdown, e.g. 0.1 for 10%
+
+    Returns:
+        List[str]: Names of the regressed metrics
+    """
+    regressions = []
+    print(f"\n{'metric':36s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, base in baseline['metrics'].items():
+        current = results['metrics'].get(name)
+        if current is None or base['value'] == 0:
+            continue
+        change = current['value'] / base['value'] - 1
+        worse = -change if base['better'] == 'higher' else change
+        flag = ''
+        if worse > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f"{name:36s} {base['value']:12.3f} {current['value']:12.3f} {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=4000, help="Rows of the synthetic metadata CSV")
+    parser.add_argument('--sample-size', type=int, default=3000)
+    parser.add_argument('--archives', type=int, default=2)
+    parser.add_argument('--images-per-archive', type=int, default=200)
+    parser.add_argument('--image-size', type=int, default=256, help="Width and height of the synthetic PNGs")
+    parser.add_argument('--bandwidth', type=float, default=None, help="Throttle of the HTTP stand-in, bytes/sec")
+    parser.add_argument('--backends', nargs='+', default=['keras', 'tf.data'], choices=['keras', 'tf.data'])
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--inference-requests', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', default=None, help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    results = run_suite(args)
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} metrics regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Synthetic NIH-shaped data used by the benchmark scripts."""
+import numpy as np
+import pandas as pd
+
+# Approximate label frequencies of the NIH ChestX-ray14 metadata
+NIH_LABEL_FREQUENCIES = {
+    'Infiltration': 0.177,
+    'Effusion': 0.119,
+    'Atelectasis': 0.103,
+    'Nodule': 0.056,
+    'Mass': 0.052,
+    'Pneumothorax': 0.047,
+    'Consolidation': 0.042,
+    'Pleural_Thickening': 0.030,
+    'Cardiomegaly': 0.025,
+    'Emphysema': 0.022,
+    'Edema': 0.021,
+    'Fibrosis': 0.015,
+    'Pneumonia': 0.013,
+    'Hernia': 0.002,
+}
+NIH_LABELS = list(NIH_LABEL_FREQUENCIES)
+
+
+def make_metadata(n_rows: int = 112120, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a DataFrame with the columns of Data_Entry_2017_v2020.csv.
+
+    Args:
+        n_rows (int): Number of image rows
+        seed (int): Random seed
+
+    Returns:
+        pd.DataFrame: Synthetic metadata
+    """
+    rng = np.random.default_rng(seed)
+    freqs = np.array(list(NIH_LABEL_FREQUENCIES.values()))
+    hits = rng.random((n_rows, len(NIH_LABELS))) < freqs
+    labels = np.array(NIH_LABELS, dtype=object)
+    findings = ['|'.join(labels[row]) or 'No Finding' for row in hits]
+
+    patient_ids = np.arange(n_rows) // 8 + 1
+    follow_ups = np.arange(n_rows) % 8
+    return pd.DataFrame({
+        'Image Index': [f"{p:08d}_{f:03d}.png" for p, f in zip(patient_ids, follow_ups)],
+        'Finding Labels': findings,
+        'Follow-up #': follow_ups,
+        'Patient ID': patient_ids,
+        'Patient Age': rng.integers(1, 95, size=n_rows),
+        'Patient Sex': rng.choice(['M', 'F'], size=n_rows),
+        'View Position': rng.choice(['PA', 'AP'], size=n_rows),
+        'OriginalImage[Width': 1024,
+        'Height]': 1024,
+        'OriginalImagePixelSpacing[x': 0.143,
+        'y]': 0.143,
+    })
+
+
+def write_pngs(names, out_dir, size: int = 1024, seed: int = 0):
+    """
+    Write grayscale PNGs that roughly resemble radiographs in size and entropy.
+
+    Args:
+        names: Image file names to create
+        out_dir: Destination directory
+        size (int): Width and height in pixels
+        seed (int): Random seed
+
+    Returns:
+        List[Path]: Paths of the written images
+    """
+    from pathlib import Path
+    from PIL import Image
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    paths = []
+    for name in names:
+        coarse = Image.fromarray(rng.integers(0, 256, (32, 32), dtype=np.uint8))
+        image = np.asarray(coarse.resize((size, size), Image.BILINEAR), dtype=np.int16)
+        image = np.clip(image + rng.integers(-8, 9, image.shape), 0, 255).astype(np.uint8)
+        path = out_dir / name
+        Image.fromarray(image).save(path)
+        paths.append(path)
+    return paths
+
+
+def write_archive(paths, tar_path):
+    """
+    Pack images into an NIH-style .tar.gz with an 'images/' prefix.
+
+    Args:
+        paths: Image files to pack
+        tar_path: Destination archive
+    """
+    import tarfile
+    from pathlib import Path
+
+    with tarfile.open(tar_path, 'w:gz') as tar:
+        for path in paths:
+            tar.add(path, arcname=f"images/{Path(path).name}")
+    return tar_path
+
+
+def serve_directory(directory, bytes_per_second: float = None, support_range: bool = True):
+    """
+    Serve a directory over HTTP on localhost in a background thread.
+
+    Args:
+        directory: Directory to serve
+        bytes_per_second (float): Per-connection throttle emulating a remote host
+        support_range (bool): Answer 'Range: bytes=N-' requests with 206 responses
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: Server (call shutdown() when done) and base URL
+    """
+    import functools
+    import os
+    import threading
+    import time
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            range_header = self.headers.get('Range')
+            if not support_range or not range_header:
+                return super().do_GET()
+            path = self.translate_path(self.path)
+            size = os.path.getsize(path)
+            start = int(range_header.split('=')[1].split('-')[0])
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{size}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Range', f"bytes {start}-{size - 1}/{size}")
+            self.send_header('Content-Length', str(size - start))
+            self.end_headers()
+            with open(path, 'rb') as source:
+                source.seek(start)
+                self.copyfile(source, self.wfile)
+
+        def copyfile(self, source, outputfile):
+            if not bytes_per_second:
+                return super().copyfile(source, outputfile)
+            chunk_size = 64 * 1024
+            for chunk in iter(lambda: source.read(chunk_size), b''):
+                outputfile.write(chunk)
+                time.sleep(len(chunk) / bytes_per_second)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(Handler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
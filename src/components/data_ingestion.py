@@ -1,47 +1,226 @@
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
+import math
 import pandas as pd
 import numpy as np
+import tensorflow as tf
 from tensorflow.keras.preprocessing.image import ImageDataGenerator
 from pathlib import Path
+from src.components.data_transformations import encode_multi_hot
+from src.components.image_index import ImageIndex
+from src.components.image_store import ImageStore
+from src.components import label_sampler
+from src.components.label_sampler import LabelBalancedSampler, LabelIndex
 from src.exception import CustomException
-from src.logger import logging
+from src.logger import configure_logging, logging
+from src.utils.instrumentation import span
 import sys
 
+# Augmentation settings shared by the Keras and tf.data backends
+ROTATION_RANGE = 40
+WIDTH_SHIFT_RANGE = 0.2
+HEIGHT_SHIFT_RANGE = 0.2
+ZOOM_RANGE = 0.2
+
+BACKENDS = ('keras', 'tf.data', 'store')
+
+
 class DataIngestionPipeline:
-    """Handles data ingestion and augmentation in batches."""
+    """
+    Handles data ingestion and augmentation in batches.
+
+    With num_shards > 1 every worker of a data-parallel cluster keeps only
+    every num_shards-th row of each batch, starting at shard_index, and
+    batch_size is the per-worker batch size.
+
+    With an image_index, file paths of extracted images are looked up in it
+    instead of scanning the image directory for every batch.
+
+    With a sampling_temperature, training batches are drawn by a
+    LabelBalancedSampler instead of shuffling the rows uniformly, so rare
+    labels show up in every archive batch (math.inf balances the labels).
+    """
     
-    def __init__(self, img_size: Tuple[int, int] = (128, 128), batch_size: int = 32):
+    def __init__(self, img_size: Tuple[int, int] = (128, 128), batch_size: int = 32,
+                 backend: str = 'keras', seed: int = 42,
+                 image_store: Optional[ImageStore] = None,
+                 image_index: Optional[ImageIndex] = None,
+                 num_shards: int = 1, shard_index: int = 0,
+                 sampling_temperature: Optional[float] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown input backend '{backend}', expected one of {BACKENDS}")
+        if backend == 'store' and image_store is None:
+            raise ValueError("The 'store' input backend needs an image_store")
+        if num_shards > 1 and backend == 'keras':
+            raise ValueError("Sharded input needs the 'tf.data' or 'store' backend")
         self.img_size = img_size
         self.batch_size = batch_size
+        self.backend = backend
+        self.seed = seed
+        self.image_store = image_store
+        self.image_index = image_index
+        self.num_shards = num_shards
+        self.shard_index = shard_index
+        self.sampling_temperature = sampling_temperature
         self.datagen = self._create_data_generator()
         
     def _create_data_generator(self) -> ImageDataGenerator:
         """Create and configure the ImageDataGenerator."""
         return ImageDataGenerator(
-            rotation_range=40,
-            width_shift_range=0.2,
-            height_shift_range=0.2,
-            zoom_range=0.2,
+            rotation_range=ROTATION_RANGE,
+            width_shift_range=WIDTH_SHIFT_RANGE,
+            height_shift_range=HEIGHT_SHIFT_RANGE,
+            zoom_range=ZOOM_RANGE,
             horizontal_flip=True,
             fill_mode='nearest',
             validation_split=0.2
         )
     
+    def _load_image(self, path: tf.Tensor, label: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+        """Decode a PNG to grayscale and resize it to img_size."""
+        image = tf.io.decode_png(tf.io.read_file(path), channels=1)
+        image = tf.image.resize(image, self.img_size, method='nearest')
+        return tf.cast(image, tf.float32), label
+
+    def _read_store_batch(self, positions: tf.Tensor, labels: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+        """Gather a batch of pre-decoded images from the image store."""
+        images = tf.numpy_function(self.image_store.read, [positions], tf.uint8)
+        images = tf.reshape(images, [-1, *self.image_store.img_size, 1])
+        if self.image_store.img_size != tuple(self.img_size):
+            images = tf.image.resize(images, self.img_size, method='nearest')
+        return tf.cast(images, tf.float32), labels
+
+    def _augment_batch(self, images: tf.Tensor, labels: tf.Tensor,
+                       seed: tf.Tensor) -> Tuple[tf.Tensor, tf.Tensor]:
+        """
+        Apply random rotation, shift, zoom and horizontal flip to a whole batch.
+
+        The per-image affine matrices are composed like ImageDataGenerator does
+        (rotation, then shift, then zoom, around the image centre) and applied in
+        a single projective transform with nearest fill. Random draws are stateless,
+        so a given seed always yields the same augmentation.
+        """
+        n = tf.shape(images)[0]
+        height = tf.cast(tf.shape(images)[1], tf.float32)
+        width = tf.cast(tf.shape(images)[2], tf.float32)
+        seeds = tf.random.experimental.stateless_split(seed, num=5)
+
+        def uniform(i, low, high):
+            return tf.random.stateless_uniform([n], seeds[i], minval=low, maxval=high)
+
+        theta = uniform(0, -ROTATION_RANGE, ROTATION_RANGE) * (math.pi / 180)
+        tx = uniform(1, -WIDTH_SHIFT_RANGE, WIDTH_SHIFT_RANGE) * width
+        ty = uniform(2, -HEIGHT_SHIFT_RANGE, HEIGHT_SHIFT_RANGE) * height
+        zoom = tf.random.stateless_uniform([n, 2], seeds[3], minval=1 - ZOOM_RANGE, maxval=1 + ZOOM_RANGE)
+        flip = tf.random.stateless_uniform([n], seeds[4]) < 0.5
+
+        zeros = tf.zeros([n])
+        cos, sin = tf.cos(theta), tf.sin(theta)
+        zx, zy = zoom[:, 0], zoom[:, 1]
+        cx, cy = (width - 1) / 2, (height - 1) / 2
+
+        # Output-to-input mapping: centre^-1 . rotation . shift . zoom . centre
+        a0 = cos * zx
+        a1 = -sin * zy
+        b0 = sin * zx
+        b1 = cos * zy
+        a2 = cos * tx - sin * ty + cx - a0 * cx - a1 * cy
+        b2 = sin * tx + cos * ty + cy - b0 * cx - b1 * cy
+        transforms = tf.stack([a0, a1, a2, b0, b1, b2, zeros, zeros], axis=1)
+
+        images = tf.raw_ops.ImageProjectiveTransformV3(
+            images=images,
+            transforms=transforms,
+            output_shape=tf.shape(images)[1:3],
+            fill_value=0.0,
+            interpolation='BILINEAR',
+            fill_mode='NEAREST'
+        )
+        images = tf.where(flip[:, None, None, None], tf.reverse(images, axis=[2]), images)
+        return images, labels
+
+    def _create_dataset(self, df: pd.DataFrame, labels: List[str], training: bool) -> tf.data.Dataset:
+        """
+        Build a tf.data pipeline over the images of a DataFrame.
+
+        With the tf.data backend PNGs are decoded in parallel; with the store
+        backend whole batches are gathered from the image store. Training batches
+        are augmented as a whole and the result is prefetched. Validation batches
+        are not augmented.
+        """
+        targets = encode_multi_hot(df['Finding Labels'], labels)
+        if self.backend == 'store':
+            sources = df['store_position'].to_numpy()
+        else:
+            sources = df['image_path'].to_numpy()
+        sampled = training and self.sampling_temperature is not None
+        if sampled:
+            dataset = self._sampled_batches(sources, targets, labels)
+        else:
+            dataset = tf.data.Dataset.from_tensor_slices((sources, targets))
+            if training:
+                dataset = dataset.shuffle(len(df), seed=self.seed, reshuffle_each_iteration=True)
+        if self.backend == 'store':
+            if not sampled:
+                dataset = dataset.batch(self.batch_size)
+            dataset = dataset.map(self._read_store_batch, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+        else:
+            if sampled:
+                dataset = dataset.unbatch()
+            dataset = dataset.map(self._load_image, num_parallel_calls=tf.data.AUTOTUNE, deterministic=True)
+            dataset = dataset.batch(self.batch_size)
+        if training:
+            seeds = tf.data.Dataset.random(seed=self.seed, rerandomize_each_iteration=True).batch(2)
+            dataset = tf.data.Dataset.zip((dataset, seeds)).map(
+                lambda batch, seed: self._augment_batch(batch[0], batch[1], seed),
+                num_parallel_calls=tf.data.AUTOTUNE,
+                deterministic=True
+            )
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def _sampled_batches(self, sources: np.ndarray, targets: np.ndarray,
+                         labels: List[str]) -> tf.data.Dataset:
+        """(sources, targets) batches of the rows a LabelBalancedSampler draws, one epoch per iteration."""
+        sampler = LabelBalancedSampler(LabelIndex(targets, labels), self.batch_size, self.sampling_temperature,
+                                       seed=self.seed + self.shard_index)
+        sources, targets = tf.constant(sources), tf.constant(targets)
+        dataset = tf.data.Dataset.from_generator(
+            lambda: iter(sampler), output_signature=tf.TensorSpec([self.batch_size], tf.int32)
+        )
+        return dataset.map(lambda rows: (tf.gather(sources, rows), tf.gather(targets, rows)))
+
+    def _shard(self, df: pd.DataFrame, labels: List[str], training: bool) -> Tuple[tf.data.Dataset, int]:
+        """
+        Build this worker's repeated dataset over its shard of df.
+
+        Every worker runs the same number of steps, derived from the smallest
+        shard, so collective ops stay in lockstep.
+        """
+        steps = max(len(df) // self.num_shards // self.batch_size, 1)
+        dataset = self._create_dataset(df.iloc[self.shard_index::self.num_shards], labels, training).repeat()
+        options = tf.data.Options()
+        # Rows are already sharded by worker, so tf.distribute must not shard again
+        options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+        return dataset.with_options(options), steps
+
+    def _indexed_images(self, image_dir: Path) -> ImageIndex:
+        """The image index, or without one a one-off index of the PNGs in image_dir."""
+        if self.image_index is not None:
+            return self.image_index
+        return ImageIndex.from_directory(image_dir)
+
     def _update_image_paths(self, 
                            df: pd.DataFrame, 
                            image_dir: Path, 
-                           batch_num: int) -> pd.DataFrame:
+                           batch_num: int,
+                           archives: Optional[List[str]] = None,
+                           index: Optional[ImageIndex] = None) -> pd.DataFrame:
         """Update image paths for the current batch."""
         try:
-            # Filter dataframe for current batch images
-            batch_images = list(image_dir.glob('*.png'))  #  extension
-            image_names = {img.name for img in batch_images}
-            
-            # Update paths only for images present in the current batch
-            batch_df = df[df['Image Index'].isin(image_names)].copy()
-            batch_df['image_path'] = batch_df['Image Index'].apply(
-                lambda x: str(image_dir / x)
-            )
+            index = index or self._indexed_images(image_dir)
+            # A one-off directory index has no archive names to filter on
+            if self.image_index is None:
+                archives = None
+            batch_df = index.select(df, archives)
             
             logging.info(f"Batch {batch_num}: Found {len(batch_df)} matching images")
             return batch_df
@@ -50,17 +229,43 @@ def _update_image_paths(self,
             logging.error(f"Error updating image paths for batch {batch_num}")
             raise CustomException(e, sys)
 
+    def _select_stored_images(self,
+                              df: pd.DataFrame,
+                              batch_num: int,
+                              archives: Optional[List[str]] = None) -> pd.DataFrame:
+        """Select the rows whose images are in the image store."""
+        try:
+            positions = self.image_store.locate(df['Image Index'], archives)
+            found = positions >= 0
+            batch_df = df[found].copy()
+            batch_df['store_position'] = positions[found]
+            
+            logging.info(f"Batch {batch_num}: Found {len(batch_df)} stored images")
+            return batch_df
+            
+        except Exception as e:
+            logging.error(f"Error selecting stored images for batch {batch_num}")
+            raise CustomException(e, sys)
+
     def create_generators(self, 
                          train_df: pd.DataFrame,
                          test_df: pd.DataFrame,
                          image_dir: Path,
                          batch_num: int,
-                         labels: List[str]) -> Dict:
-        """Create data generators for the current batch."""
+                         labels: List[str],
+                         archives: Optional[List[str]] = None) -> Dict:
+        """
+        Create data generators for the current batch.
+        
+        With the store backend image_dir is unused and rows are taken from the
+        image store, restricted to the given archives when set.
+        """
         try:
             # Update paths for current batch
-            batch_train = self._update_image_paths(train_df, image_dir, batch_num)
-            batch_test = self._update_image_paths(test_df, image_dir, batch_num)
+            with span("path_matching", batch=batch_num):
+                index = None if self.backend == 'store' else self._indexed_images(image_dir)
+                batch_train = self.select_images(train_df, image_dir, batch_num, archives, index)
+                batch_test = self.select_images(test_df, image_dir, batch_num, archives, index)
             
             if len(batch_train) == 0 or len(batch_test) == 0:
                 logging.warning(f"No images found for batch {batch_num}")
@@ -71,34 +276,48 @@ def create_generators(self,
                 df['newLabel'] = df['Finding Labels'].str.split('|')
             
             # Create generators
-            train_gen = self.datagen.flow_from_dataframe(
-                dataframe=batch_train,
-                directory=None,
-                x_col='image_path',
-                y_col='newLabel',
-                class_mode='categorical',
-                classes=labels,
-                target_size=self.img_size,
-                color_mode='grayscale',
-                batch_size=self.batch_size
-            )
-            
-            valid_gen = self.datagen.flow_from_dataframe(
-                dataframe=batch_test,
-                directory=None,
-                x_col='image_path',
-                y_col='newLabel',
-                class_mode='categorical',
-                classes=labels,
-                target_size=self.img_size,
-                color_mode='grayscale',
-                batch_size=self.batch_size
-            )
+            with span("create_generators", batch=batch_num, backend=self.backend):
+                steps_per_epoch = validation_steps = None
+                if self.num_shards > 1:
+                    train_gen, steps_per_epoch = self._shard(batch_train, labels, training=True)
+                    valid_gen, validation_steps = self._shard(batch_test, labels, training=False)
+                elif self.backend in ('tf.data', 'store'):
+                    train_gen = self._create_dataset(batch_train, labels, training=True)
+                    valid_gen = self._create_dataset(batch_test, labels, training=False)
+                else:
+                    train_gen = self.datagen.flow_from_dataframe(
+                        dataframe=batch_train,
+                        directory=None,
+                        x_col='image_path',
+                        y_col='newLabel',
+                        class_mode='categorical',
+                        classes=labels,
+                        target_size=self.img_size,
+                        color_mode='grayscale',
+                        batch_size=self.batch_size
+                    )
+                    if self.sampling_temperature is not None:
+                        train_gen = label_sampler.BalancedSequence(train_gen, self.sampling_temperature,
+                                                                   seed=self.seed)
+                
+                    valid_gen = self.datagen.flow_from_dataframe(
+                        dataframe=batch_test,
+                        directory=None,
+                        x_col='image_path',
+                        y_col='newLabel',
+                        class_mode='categorical',
+                        classes=labels,
+                        target_size=self.img_size,
+                        color_mode='grayscale',
+                        batch_size=self.batch_size
+                    )
             
             logging.info(f"Created generators for batch {batch_num}")
             return {
                 'train_generator': train_gen,
                 'valid_generator': valid_gen,
+                'steps_per_epoch': steps_per_epoch,
+                'validation_steps': validation_steps,
                 'batch_train': batch_train,
                 'batch_test': batch_test
             }
@@ -107,7 +326,53 @@ def create_generators(self,
             logging.error(f"Failed to create generators for batch {batch_num}")
             raise CustomException(e, sys)
 
+    def select_images(self,
+                      df: pd.DataFrame,
+                      image_dir: Path,
+                      batch_num: int,
+                      archives: Optional[List[str]] = None,
+                      index: Optional[ImageIndex] = None) -> pd.DataFrame:
+        """
+        Select the rows whose images are available, with their path or store position.
+
+        Args:
+            df: Metadata rows
+            image_dir: Directory of the extracted images, scanned only without an image index
+            batch_num: Batch number for logging
+            archives: Only select images from these archives
+            index: Image index to use instead of the pipeline's own
+        """
+        if self.backend == 'store':
+            return self._select_stored_images(df, batch_num, archives)
+        return self._update_image_paths(df, image_dir, batch_num, archives, index)
+
+    def create_ordered_dataset(self, df: pd.DataFrame, labels: List[str]) -> tf.data.Dataset:
+        """Unaugmented, unshuffled (images, targets) batches over rows from select_images."""
+        return self._create_dataset(df, labels, training=False)
+
+    def create_eval_dataset(self,
+                            df: pd.DataFrame,
+                            image_dir: Path,
+                            labels: List[str],
+                            archives: Optional[List[str]] = None) -> Optional[tf.data.Dataset]:
+        """
+        Create an unaugmented, unshuffled dataset of (images, targets) batches.
+        
+        Used for evaluation and calibration data. The keras backend reads the
+        images with tf.data decoding as well.
+        """
+        try:
+            eval_df = self.select_images(df, image_dir, 0, archives)
+            if len(eval_df) == 0:
+                logging.warning("No images found for evaluation dataset")
+                return None
+            return self._create_dataset(eval_df, labels, training=False)
+        except Exception as e:
+            logging.error("Failed to create evaluation dataset")
+            raise CustomException(e, sys)
+
 if __name__ == "__main__":
+    configure_logging()
     train_df = pd.read_csv("./dataset/Data_Entry_2017_v2020.csv")[:100]
     test_df = pd.read_csv("./dataset/Data_Entry_2017_v2020.csv")[100:200]
     labels = train_df['Finding Labels'].str.split('|').explode().unique().tolist()
@@ -1,12 +1,41 @@
-from typing import Tuple, List
+from typing import Tuple, List, Optional, Union
+import tempfile
 import pandas as pd
 import numpy as np
 from collections import Counter
-from sklearn.model_selection import train_test_split
+from pathlib import Path
+from src.components.metadata_cache import MetadataCache
 from src.exception import CustomException
 from src.logger import logging
 import sys
 
+
+def encode_multi_hot(findings: pd.Series, labels: List[str], dtype=np.float32) -> np.ndarray:
+    """
+    Encode pipe-separated findings into a multi-hot matrix in one vectorized pass.
+
+    Each finding string is split on '|' and every token is looked up in a
+    label-to-index table, so a label only matches when it is a whole token
+    (no substring matches between labels).
+
+    Args:
+        findings (pd.Series): 'Finding Labels' column
+        labels (List[str]): Ordered labels, one matrix column per label
+        dtype: NumPy dtype of the returned matrix
+
+    Returns:
+        np.ndarray: C-contiguous (len(findings), len(labels)) matrix
+    """
+    tokens = findings.reset_index(drop=True).str.split('|').explode()
+    rows = tokens.index.to_numpy()
+    cols = pd.Index(labels).get_indexer(tokens.to_numpy())
+    valid = cols >= 0
+
+    matrix = np.zeros((len(findings), len(labels)), dtype=dtype)
+    matrix[rows[valid], cols[valid]] = 1
+    return matrix
+
+
 class DataTransformations:
     """
     A class to handle data transformations for the lung cancer detection project.
@@ -15,14 +44,21 @@ class DataTransformations:
         meta_csv_path (str): Path to the metadata CSV file
         random_state (int): Random state for reproducibility
         test_size (float): Proportion of dataset to include in the test split
+        cache_dir (str): Directory of the metadata cache, None to disable caching
+        chunk_size (int): Rows read at a time in the out-of-core mode, None to
+            load the whole CSV into memory
     """
 
-    def __init__(self, meta_csv_path: str, random_state: int = 42, test_size: float = 0.25):
+    def __init__(self, meta_csv_path: str, random_state: int = 42, test_size: float = 0.25,
+                 cache_dir: Optional[str] = None, chunk_size: Optional[int] = None):
         self.meta_csv_path = meta_csv_path
         self.random_state = random_state
         self.test_size = test_size
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
         self.data_df = None
         self.all_labels = None
+        self.label_matrix = None
 
     def load_metadata_file(self) -> pd.DataFrame:
         """
@@ -67,9 +103,12 @@ def _compute_sample_weights(self) -> np.ndarray:
         Returns:
             np.ndarray: Array of sample weights
         """
-        weights = (self.data_df['Finding Labels']
-                  .map(lambda x: len(x.split('|')) if len(x)>0 else 0)
-                  .values + 4e-2)
+        if self.label_matrix is not None:
+            weights = self.label_matrix.sum(axis=1, dtype=np.float64) + 4e-2
+        else:
+            weights = (self.data_df['Finding Labels']
+                      .map(lambda x: len(x.split('|')) if len(x)>0 else 0)
+                      .values + 4e-2)
         return weights / weights.sum()
 
     def transform_data(self, sample_size: int = 40000) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
@@ -82,26 +121,32 @@ def transform_data(self, sample_size: int = 40000) -> Tuple[pd.DataFrame, pd.Dat
         Returns:
             Tuple[pd.DataFrame, pd.DataFrame, List[str]]: Train data, test data, and labels
         """
+        # sklearn takes seconds to import, so it is only loaded for the split
+        from sklearn.model_selection import train_test_split
+
         try:
             # Replace 'No Finding' with empty string
             self.data_df.replace('No Finding', '', inplace=True)
             
-            # Extract labels and perform one-hot encoding
+            # Extract labels and perform multi-hot encoding
             all_labels = self._extract_labels()
-            for label in all_labels[1:]:  # Skip empty label
-                self.data_df[label] = self.data_df['Finding Labels'].map(
-                    lambda finding: 1.0 if label in finding else 0
-                )
+            self.label_matrix = encode_multi_hot(self.data_df['Finding Labels'], all_labels)
+            self.data_df = pd.concat(
+                [self.data_df,
+                 pd.DataFrame(self.label_matrix, index=self.data_df.index, columns=all_labels)],
+                axis=1
+            )
             
             # Sample data with weights
             weights = self._compute_sample_weights()
-            self.data_df = self.data_df.sample(sample_size, weights=weights)
+            sampled_df = self.data_df.sample(sample_size, weights=weights,
+                                             random_state=self.random_state)
+            positions = self.data_df.index.get_indexer(sampled_df.index)
+            self.data_df = sampled_df
+            self.label_matrix = self.label_matrix[positions]
             
-            # Create disease vectors
-            self.data_df['disease_vec'] = self.data_df.apply(
-                lambda x: [x[all_labels[1:]].values], 
-                axis=1
-            ).map(lambda x: x[0])
+            # Create disease vectors as row views into the label matrix
+            self.data_df['disease_vec'] = list(self.label_matrix)
             
             # Split data
             train, test = train_test_split(
@@ -118,12 +163,212 @@ def transform_data(self, sample_size: int = 40000) -> Tuple[pd.DataFrame, pd.Dat
             logging.error("Failed to transform data")
             raise CustomException(e, sys)
 
-    def process_pipeline(self) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+    def _reservoir_sample(self, sample_size: int, chunk_size: int) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Draw the weighted sample and count the labels in one pass over the CSV.
+
+        Uses weighted reservoir sampling (Efraimidis-Spirakis A-Res): every row
+        gets the key log(u) / w, with u uniform and w the weight of
+        _compute_sample_weights, and the sample_size largest keys are kept.
+        The result has the distribution of weighted sampling without
+        replacement, like DataFrame.sample, but not the same rows for a seed.
+        Only the keys, row positions and stratum codes of the reservoir are
+        held between chunks.
+
+        Args:
+            sample_size (int): Number of samples to draw
+            chunk_size (int): Rows read at a time
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, List[str]]: Sorted row positions of the
+            sample, their stratum codes and the labels ordered by frequency
+        """
+        rng = np.random.default_rng(self.random_state)
+        label_counts = Counter()
+        strata = {}
+        keys = np.empty(0, dtype=np.float64)
+        positions = np.empty(0, dtype=np.int64)
+        codes = np.empty(0, dtype=np.int64)
+        num_rows = 0
+
+        for chunk in pd.read_csv(self.meta_csv_path, usecols=['Finding Labels'], chunksize=chunk_size):
+            findings = chunk['Finding Labels'].replace('No Finding', '').reset_index(drop=True)
+            tokens = findings.str.split('|').explode()
+            tokens = tokens[tokens != '']
+            token_codes, uniques = pd.factorize(tokens)
+            label_counts.update(dict(zip(uniques, np.bincount(token_codes, minlength=len(uniques)).tolist())))
+
+            # Labels per row, counting a label repeated within a row once like the multi-hot matrix
+            pairs = np.unique(tokens.index.to_numpy() * max(len(uniques), 1) + token_codes)
+            label_totals = np.bincount(pairs // max(len(uniques), 1), minlength=len(chunk))
+            weights = label_totals + 4e-2
+            chunk_keys = np.log1p(-rng.random(len(chunk))) / weights
+
+            stratum_keys = findings.str[:4]
+            for stratum in stratum_keys.unique():
+                strata.setdefault(stratum, len(strata))
+            keys = np.concatenate([keys, chunk_keys])
+            positions = np.concatenate([positions, np.arange(num_rows, num_rows + len(chunk))])
+            codes = np.concatenate([codes, stratum_keys.map(strata).to_numpy(np.int64)])
+            num_rows += len(chunk)
+
+            if len(keys) > sample_size:
+                keep = np.argpartition(keys, len(keys) - sample_size)[len(keys) - sample_size:]
+                keys, positions, codes = keys[keep], positions[keep], codes[keep]
+
+        if sample_size > num_rows:
+            raise ValueError(f"Cannot take a sample of {sample_size} rows from {num_rows} rows")
+        labels = [label for label, _ in label_counts.most_common()]
+        order = np.argsort(positions)
+        logging.info(f"Sampled {sample_size} of {num_rows} rows, {len(labels)} labels")
+        return positions[order], codes[order], labels
+
+    def _stratified_test_mask(self, codes: np.ndarray) -> np.ndarray:
+        """
+        Assign every sampled row to the train or test split, stratified by code.
+
+        Each stratum contributes test_size of its rows, rounded so the test
+        split has ceil(test_size * n) rows in total as in train_test_split.
+
+        Args:
+            codes (np.ndarray): Stratum code per sampled row
+
+        Returns:
+            np.ndarray: Boolean mask of the test rows
+        """
+        rng = np.random.default_rng(self.random_state)
+        num_test = int(np.ceil(self.test_size * len(codes)))
+        _, inverse, sizes = np.unique(codes, return_inverse=True, return_counts=True)
+
+        quotas = self.test_size * sizes
+        test_counts = np.floor(quotas).astype(np.int64)
+        shuffled = rng.permutation(len(sizes))
+        by_remainder = shuffled[np.argsort(test_counts[shuffled] - quotas[shuffled], kind='stable')]
+        test_counts[by_remainder[:num_test - test_counts.sum()]] += 1
+
+        order = rng.permutation(len(codes))
+        order = order[np.argsort(inverse[order], kind='stable')]
+        ranks = np.arange(len(codes)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        test_mask = np.zeros(len(codes), dtype=bool)
+        test_mask[order] = ranks < test_counts[inverse[order]]
+        return test_mask
+
+    def stream_transform(self, sample_size: int, output_dir: Union[str, Path],
+                         chunk_size: Optional[int] = None) -> List[str]:
+        """
+        Transform a metadata CSV larger than memory into train/test Parquet files.
+
+        The CSV is read twice in chunks: once to count the labels and draw the
+        weighted sample (see _reservoir_sample), and once to encode the sampled
+        rows of each chunk and append them to output_dir/train.parquet or
+        output_dir/test.parquet. Peak memory is bounded by the chunk size plus
+        a few integers per sampled row, not by the size of the CSV. The rows
+        are written in CSV order, indexed by their position in the CSV, with
+        the same columns as transform_data minus 'disease_vec'.
+
+        Args:
+            sample_size (int): Number of samples to use
+            output_dir (Union[str, Path]): Directory of the Parquet files
+            chunk_size (Optional[int]): Rows read at a time, default self.chunk_size
+
+        Returns:
+            List[str]: Labels, in the order of the label columns
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        chunk_size = chunk_size or self.chunk_size or 100_000
+        writers = {}
+        try:
+            positions, codes, all_labels = self._reservoir_sample(sample_size, chunk_size)
+            test_mask = self._stratified_test_mask(codes)
+            output_dir = Path(output_dir)
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+            schema = None
+            for chunk in pd.read_csv(self.meta_csv_path, chunksize=chunk_size):
+                start, stop = np.searchsorted(positions, [chunk.index[0], chunk.index[0] + len(chunk)])
+                if start == stop:
+                    continue
+                rows = chunk.loc[positions[start:stop]].replace('No Finding', '')
+                matrix = encode_multi_hot(rows['Finding Labels'], all_labels)
+                rows = pd.concat([rows, pd.DataFrame(matrix, index=rows.index, columns=all_labels)], axis=1)
+
+                for split, mask in (('train', ~test_mask[start:stop]), ('test', test_mask[start:stop])):
+                    if not mask.any():
+                        continue
+                    table = pa.Table.from_pandas(rows[mask])
+                    # Chunks can infer different dtypes for a column; the first chunk's schema wins
+                    if schema is None:
+                        schema = table.schema
+                    if split not in writers:
+                        writers[split] = pq.ParquetWriter(output_dir / f"{split}.parquet", schema)
+                    writers[split].write_table(table.cast(schema))
+
+            for split in ('train', 'test'):
+                if split in writers:
+                    writers.pop(split).close()
+                else:
+                    pq.write_table(schema.empty_table(), output_dir / f"{split}.parquet")
+            logging.info(f"Data transformed in chunks of {chunk_size} rows. "
+                         f"Train: {int((~test_mask).sum())}, Test: {int(test_mask.sum())}")
+            return all_labels
+
+        except Exception as e:
+            logging.error("Failed to transform data in chunks")
+            raise CustomException(e, sys)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+    def _process_in_chunks(self, sample_size: int) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
+        """Run stream_transform into a cache entry, or a temporary one without a cache, and load it."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if self.cache_dir is None:
+                cache, key = MetadataCache(tmp_dir), 'split'
+            else:
+                cache = MetadataCache(self.cache_dir)
+                key = cache.cache_key(self.meta_csv_path, sample_size, self.test_size, self.random_state,
+                                      sampler='reservoir')
+                cached = cache.load(key)
+                if cached is not None:
+                    self.all_labels = cached[2]
+                    return cached
+
+            staging_dir = cache.staging_dir(key)
+            all_labels = self.stream_transform(sample_size, staging_dir)
+            cache.commit(key, staging_dir, all_labels)
+            self.all_labels = all_labels
+            return cache.load(key)
+
+    def process_pipeline(self, sample_size: int = 40000) -> Tuple[pd.DataFrame, pd.DataFrame, List[str]]:
         """
         Execute the complete data processing pipeline.
         
+        When a cache directory is set, the result is keyed by the CSV content hash
+        and the transformation parameters, and a warm run loads it from disk.
+        With chunk_size set, the CSV is never loaded whole (see stream_transform).
+        
+        Args:
+            sample_size (int): Number of samples to use
+        
         Returns:
             Tuple[pd.DataFrame, pd.DataFrame, List[str]]: Processed train data, test data, and labels
         """
+        if self.chunk_size is not None:
+            return self._process_in_chunks(sample_size)
+        if self.cache_dir is None:
+            self.load_metadata_file()
+            return self.transform_data(sample_size)
+
+        cache = MetadataCache(self.cache_dir)
+        key = cache.cache_key(self.meta_csv_path, sample_size, self.test_size, self.random_state)
+        cached = cache.load(key)
+        if cached is not None:
+            self.all_labels = cached[2]
+            return cached
+
         self.load_metadata_file()
-        return self.transform_data()
\ No newline at end of file
+        train, test, all_labels = self.transform_data(sample_size)
+        cache.save(key, train, test, all_labels)
+        return train, test, all_labels
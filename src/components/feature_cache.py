@@ -0,0 +1,108 @@
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, Union
+import numpy as np
+import pandas as pd
+from src.components.shard_store import ShardStore
+from src.exception import CustomException
+from src.logger import logging
+
+
+class FeatureCache:
+    """
+    Memory-mapped store of pooled backbone embeddings.
+
+    Embeddings are appended as float32 .npy shards of shape (n, dim) in a
+    ShardStore, whose index maps each 'Image Index' to its shard and row, like
+    the image store.
+    Each cache lives in a directory named after the fingerprint of the backbone
+    weights that produced it, so a cache is never read with another backbone.
+
+    Attributes:
+        cache_dir (Path): Directory of this backbone's embeddings
+        fingerprint (str): Hash of the backbone weights
+        dim (int): Embedding size
+    """
+
+    INDEX_COLUMNS = {'Image Index': object, 'shard': object, 'row': np.int64}
+
+    def __init__(self, root_dir: Union[str, Path], fingerprint: str, dim: int):
+        self.fingerprint = fingerprint
+        self.dim = dim
+        self.cache_dir = Path(root_dir) / fingerprint[:16]
+        self._check_metadata()
+        self._store = ShardStore(self.cache_dir, self.INDEX_COLUMNS)
+
+    @property
+    def index(self) -> pd.DataFrame:
+        """'Image Index', shard and row of every cached embedding"""
+        return self._store.index
+
+    def _check_metadata(self) -> None:
+        """Create the cache metadata or check it matches the backbone."""
+        meta_path = self.cache_dir / 'cache.json'
+        if meta_path.exists():
+            with open(meta_path) as file:
+                meta = json.load(file)
+            if meta['fingerprint'] != self.fingerprint or meta['dim'] != self.dim:
+                raise ValueError(f"Feature cache {self.cache_dir} belongs to another backbone")
+        else:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(meta_path, 'w') as file:
+                json.dump({'fingerprint': self.fingerprint, 'dim': self.dim}, file)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def locate(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Map image names to index positions.
+
+        Args:
+            names: Image names ('Image Index' values)
+
+        Returns:
+            np.ndarray: int64 positions into the index, -1 for images without embeddings
+        """
+        return self._store.locate(names)
+
+    def add(self, names: Iterable[str], features: np.ndarray) -> None:
+        """
+        Append the embeddings of a set of images as a new shard.
+
+        Args:
+            names: Image names, one per row of features
+            features: float32 array of shape (n, dim)
+        """
+        try:
+            names = list(names)
+            features = np.asarray(features, dtype=np.float32)
+            if features.shape != (len(names), self.dim):
+                raise ValueError(f"Expected features of shape ({len(names)}, {self.dim}), got {features.shape}")
+            if not names:
+                return
+            shard = f"{int(self.index['shard'].max()) + 1 if len(self.index) else 0:05d}"
+            self._store.write_shard(shard, features)
+            self._store.update_index(pd.DataFrame({'Image Index': names, 'shard': shard,
+                                                   'row': np.arange(len(names), dtype=np.int64)}))
+            logging.info(f"Cached {len(names)} embeddings in {self.cache_dir}")
+
+        except Exception as e:
+            logging.error("Failed to write feature cache shard")
+            raise CustomException(e, sys)
+
+    def read(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Gather the embeddings of images from the memory-mapped shards.
+
+        Args:
+            names: Image names, all present in the cache
+
+        Returns:
+            np.ndarray: float32 array of shape (len(names), dim)
+        """
+        positions = self.locate(names)
+        if (positions < 0).any():
+            raise KeyError("Some images have no cached embedding")
+        return self._store.gather(positions, (self.dim,), np.float32)
@@ -0,0 +1,165 @@
+import os
+import re
+import sys
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+import numpy as np
+import pandas as pd
+from src.exception import CustomException
+from src.logger import logging
+
+
+class ImageIndex:
+    """
+    Persistent index of extracted images.
+
+    Maps each 'Image Index' to its file path and source archive. Entries are
+    added per archive as it is extracted, from the member names the extraction
+    already produced, and removed when the archive's files are cleaned up, so
+    finding the rows of a batch needs no directory scan. The index is rewritten
+    atomically as parquet after every change and reloaded on restart.
+
+    Attributes:
+        path (Optional[Path]): Parquet file of the index, None to keep it in memory
+        entries (pd.DataFrame): One row per image with INDEX_COLUMNS
+    """
+
+    INDEX_COLUMNS = ['Image Index', 'image_path', 'archive', 'archive_num']
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            entries = pd.read_parquet(self.path)
+            logging.info(f"Loaded image index {self.path} with {len(entries)} images")
+        else:
+            entries = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in
+                                    zip(self.INDEX_COLUMNS, [object, object, object, np.int64])})
+        # Entries and their name lookup are swapped together, so readers in
+        # other threads never see one without the other
+        self._state = (entries, pd.Index(entries['Image Index']))
+
+    @property
+    def entries(self) -> pd.DataFrame:
+        return self._state[0]
+
+    @classmethod
+    def from_directory(cls, image_dir: Union[str, Path], archive: str = '') -> "ImageIndex":
+        """In-memory index of the PNGs currently in a directory."""
+        index = cls()
+        index.add(archive, image_dir, [path.name for path in Path(image_dir).glob('*.png')])
+        return index
+
+    @staticmethod
+    def archive_number(archive: str) -> int:
+        """Number of an archive name like 'images_03', -1 when it has none."""
+        match = re.search(r'(\d+)$', archive)
+        return int(match.group(1)) if match else -1
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}")
+        self.entries.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+
+    def _replace(self, entries: pd.DataFrame) -> None:
+        entries = entries.reset_index(drop=True)
+        self._state = (entries, pd.Index(entries['Image Index']))
+        self._save()
+
+    def has_archive(self, archive: str) -> bool:
+        """Whether images of an archive are indexed."""
+        return bool((self.entries['archive'] == archive).any())
+
+    def add(self, archive: str, image_dir: Union[str, Path], names: Iterable[str]) -> int:
+        """
+        Index the images of an extracted archive, replacing earlier entries of it.
+
+        Args:
+            archive: Name of the archive, e.g. 'images_01'
+            image_dir: Directory the images were extracted to
+            names: File names of the extracted images
+
+        Returns:
+            int: Number of images indexed
+        """
+        try:
+            names = pd.Series(list(names), dtype=object)
+            names = names[names.str.endswith('.png')]
+            added = pd.DataFrame({
+                'Image Index': names.to_numpy(),
+                'image_path': (str(image_dir) + os.sep + names).to_numpy(),
+                'archive': archive,
+                'archive_num': np.int64(self.archive_number(archive))
+            })
+            with self._lock:
+                kept = self.entries[self.entries['archive'] != archive]
+                self._replace(pd.concat([kept, added], ignore_index=True)
+                              .drop_duplicates('Image Index', keep='last'))
+            logging.info(f"Indexed {len(added)} images of {archive}")
+            return len(added)
+
+        except Exception as e:
+            logging.error(f"Failed to index images of {archive}")
+            raise CustomException(e, sys)
+
+    def remove(self, archives: List[str]) -> None:
+        """Drop the entries of archives whose files were removed."""
+        try:
+            with self._lock:
+                removed = self.entries['archive'].isin(archives)
+                if removed.any():
+                    self._replace(self.entries[~removed])
+        except Exception as e:
+            logging.error(f"Failed to remove {archives} from the image index")
+            raise CustomException(e, sys)
+
+    def locate(self, names: Iterable[str], archives: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Map image names to index positions.
+
+        Args:
+            names: Image names ('Image Index' values)
+            archives: Only consider images from these archives
+
+        Returns:
+            np.ndarray: int64 positions into entries, -1 for images not available
+        """
+        return self._locate(self._state, names, archives)
+
+    @staticmethod
+    def _locate(state, names: Iterable[str], archives: Optional[List[str]]) -> np.ndarray:
+        entries, lookup = state
+        positions = lookup.get_indexer(pd.Index(names)).astype(np.int64)
+        if archives is not None:
+            found = positions >= 0
+            in_archives = np.zeros(len(positions), dtype=bool)
+            in_archives[found] = np.isin(entries['archive'].to_numpy()[positions[found]], archives)
+            positions[~in_archives] = -1
+        return positions
+
+    def available(self, df: pd.DataFrame, archives: Optional[List[str]] = None) -> np.ndarray:
+        """Boolean mask of the rows of df whose images are extracted right now."""
+        return self.locate(df['Image Index'], archives) >= 0
+
+    def select(self, df: pd.DataFrame, archives: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Rows of df whose images are available, with 'image_path' and 'archive_num'.
+
+        The join is a single hash lookup of all names, and df's row order and
+        index are kept.
+        """
+        state = self._state
+        entries = state[0]
+        positions = self._locate(state, df['Image Index'], archives)
+        found = positions >= 0
+        selected = df[found].copy()
+        selected['image_path'] = entries['image_path'].to_numpy()[positions[found]]
+        selected['archive_num'] = entries['archive_num'].to_numpy()[positions[found]]
+        return selected
@@ -0,0 +1,199 @@
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from PIL import Image
+from src.components.shard_store import ShardStore
+from src.components.utils import DatasetUtils
+from src.exception import CustomException
+from src.logger import logging
+
+
+class ImageStore:
+    """
+    Sharded, memory-mapped store of pre-decoded grayscale images.
+
+    Images are decoded and resized once into uint8 .npy shards of shape
+    (n, height, width). An index maps each 'Image Index' to its shard and row,
+    and reads go through read-only memory maps, so repeated epochs and runs do
+    no PNG decoding and resident memory is bounded by the page cache.
+
+    Attributes:
+        store_dir (Path): Root directory of the store
+        img_size (Tuple[int, int]): Height and width of the stored images
+        shard_size (int): Maximum number of images per shard
+        num_workers (int): Threads used to decode images
+    """
+
+    INDEX_COLUMNS = {'Image Index': object, 'archive': object, 'shard': object, 'row': np.int64}
+
+    def __init__(self, store_dir: Union[str, Path], img_size: Tuple[int, int] = (128, 128),
+                 shard_size: int = 4096, num_workers: Optional[int] = None):
+        self.store_dir = Path(store_dir)
+        self.img_size = tuple(img_size)
+        self.shard_size = shard_size
+        self.num_workers = num_workers or os.cpu_count()
+        self._check_metadata()
+        self._store = ShardStore(self.store_dir, self.INDEX_COLUMNS)
+
+    @property
+    def index(self) -> pd.DataFrame:
+        """'Image Index', archive, shard and row of every stored image"""
+        return self._store.index
+
+    def _check_metadata(self) -> None:
+        """Create the store metadata or check it matches img_size."""
+        meta_path = self.store_dir / 'store.json'
+        if meta_path.exists():
+            with open(meta_path) as file:
+                stored_size = tuple(json.load(file)['img_size'])
+            if stored_size != self.img_size:
+                raise ValueError(
+                    f"Image store {self.store_dir} holds {stored_size} images, not {self.img_size}"
+                )
+        else:
+            self.store_dir.mkdir(parents=True, exist_ok=True)
+            with open(meta_path, 'w') as file:
+                json.dump({'img_size': list(self.img_size)}, file)
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def has_archive(self, archive: str) -> bool:
+        """Whether the images of an archive are already in the store."""
+        return bool((self.index['archive'] == archive).any())
+
+    def _decode(self, source: Union[str, Path, bytes]) -> np.ndarray:
+        """Decode a PNG path or byte string to a resized uint8 array."""
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        with Image.open(source) as image:
+            image = image.convert('L').resize(self.img_size[::-1], Image.NEAREST)
+            return np.asarray(image, dtype=np.uint8)
+
+    def add_encoded(self, items: Iterable[Tuple[str, Union[str, Path, bytes]]], archive: str) -> int:
+        """
+        Decode images into new shards of the store.
+
+        Args:
+            items: (image name, PNG path or bytes) pairs, consumed lazily
+            archive: Name of the archive the images come from
+
+        Returns:
+            int: Number of images added
+        """
+        try:
+            height, width = self.img_size
+            buffer = np.empty((self.shard_size, height, width), dtype=np.uint8)
+            names: List[str] = []
+            records = []
+            items = iter(items)
+
+            def flush():
+                shard = f"{archive}-{len(records):03d}"
+                self._store.write_shard(shard, buffer[:len(names)])
+                records.append(pd.DataFrame({
+                    'Image Index': names.copy(),
+                    'archive': archive,
+                    'shard': shard,
+                    'row': np.arange(len(names), dtype=np.int64)
+                }))
+                names.clear()
+
+            with ThreadPoolExecutor(self.num_workers) as pool:
+                while True:
+                    chunk = list(islice(items, self.num_workers * 8))
+                    if not chunk:
+                        break
+                    decoded = pool.map(self._decode, [source for _, source in chunk])
+                    for (name, _), image in zip(chunk, decoded):
+                        buffer[len(names)] = image
+                        names.append(name)
+                        if len(names) == self.shard_size:
+                            flush()
+                if names:
+                    flush()
+
+            if records:
+                self._store.update_index(pd.concat(records, ignore_index=True),
+                                         keep=self.index['archive'] != archive)
+            count = sum(len(record) for record in records)
+            logging.info(f"Added {count} images from {archive} to image store {self.store_dir}")
+            return count
+
+        except Exception as e:
+            logging.error(f"Failed to add {archive} to image store")
+            raise CustomException(e, sys)
+
+    def add_images(self, paths: Iterable[Union[str, Path]], archive: str) -> int:
+        """
+        Decode PNG files into new shards of the store.
+
+        Args:
+            paths: PNG files, named by their 'Image Index'
+            archive: Name of the archive the images come from
+
+        Returns:
+            int: Number of images added
+        """
+        return self.add_encoded(((Path(path).name, path) for path in paths), archive)
+
+    def add_from_tar(self, tar_path: Union[str, Path], archive: str) -> int:
+        """
+        Decode the PNGs of a tar.gz straight from the compressed stream.
+
+        Nothing is extracted to disk; members are read in one sequential pass
+        and stored under their base name, which is their 'Image Index'.
+
+        Args:
+            tar_path: NIH image archive
+            archive: Name of the archive
+
+        Returns:
+            int: Number of images added
+        """
+        return self.add_encoded(DatasetUtils.iter_tar_files(tar_path), archive)
+
+    def locate(self, names: Iterable[str], archives: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Map image names to store positions.
+
+        Args:
+            names: Image names ('Image Index' values)
+            archives: Only consider images from these archives
+
+        Returns:
+            np.ndarray: int64 positions into the index, -1 for missing images
+        """
+        positions = self._store.locate(names)
+        if archives is not None:
+            found = positions >= 0
+            in_archives = np.zeros(len(positions), dtype=bool)
+            in_archives[found] = np.isin(self.index['archive'].to_numpy()[positions[found]], archives)
+            positions[~in_archives] = -1
+        return positions
+
+    def read(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Read images by store position from the memory-mapped shards.
+
+        Args:
+            positions: Positions returned by locate
+
+        Returns:
+            np.ndarray: uint8 array of shape (len(positions), height, width)
+        """
+        return self._store.gather(positions, self.img_size, np.uint8)
+
+    def get_batch(self, names: Iterable[str]) -> np.ndarray:
+        """Read images by 'Image Index'."""
+        positions = self.locate(names)
+        if (positions < 0).any():
+            raise KeyError("Some images are not in the image store")
+        return self.read(positions)
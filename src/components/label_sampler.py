@@ -0,0 +1,147 @@
+import math
+from typing import Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from src.components.data_transformations import encode_multi_hot
+
+NO_FINDING = 'No Finding'
+
+
+class LabelIndex:
+    """
+    Inverted index from each label to the rows that carry it.
+
+    The row ids of all labels are stored back to back in one int32 array,
+    label by label, with an offset per label (a CSR layout), so the rows of a
+    label are a slice and the k-th row of a label is a single lookup. Rows
+    without any label form an extra 'No Finding' class.
+
+    Attributes:
+        classes (List[str]): Labels, followed by 'No Finding' when any row has no label
+        counts (np.ndarray): int64 number of rows per class
+        offsets (np.ndarray): int64 start of each class in row_ids
+        row_ids (np.ndarray): int32 row positions, grouped by class
+        num_rows (int): Rows of the indexed data
+    """
+
+    def __init__(self, matrix: np.ndarray, labels: List[str]):
+        matrix = np.asarray(matrix)
+        rows, cols = np.nonzero(matrix)
+        empty = np.flatnonzero(~matrix.any(axis=1))
+        self.classes = list(labels)
+        if len(empty):
+            self.classes.append(NO_FINDING)
+            rows = np.concatenate([rows, empty])
+            cols = np.concatenate([cols, np.full(len(empty), len(labels))])
+
+        order = np.argsort(cols, kind='stable')
+        self.row_ids = rows[order].astype(np.int32)
+        self.counts = np.bincount(cols, minlength=len(self.classes)).astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)[:-1]]).astype(np.int64)
+        self.num_rows = len(matrix)
+
+    @classmethod
+    def from_findings(cls, findings: pd.Series, labels: List[str]) -> "LabelIndex":
+        """Index a 'Finding Labels' column in its current row order."""
+        return cls(encode_multi_hot(findings, labels, dtype=np.uint8), labels)
+
+    def rows(self, label: str) -> np.ndarray:
+        """Row positions carrying a label, as a view into row_ids."""
+        position = self.classes.index(label)
+        start = self.offsets[position]
+        return self.row_ids[start:start + self.counts[position]]
+
+
+class LabelBalancedSampler:
+    """
+    Draws training batches with rebalanced label frequencies from a LabelIndex.
+
+    Every row of a batch is drawn by picking a class, with probability
+    proportional to count ** (1 / temperature), and then a uniformly random
+    row of that class. temperature=1 follows the label frequencies, larger
+    values flatten them and math.inf gives every class the same share of each
+    batch. Rows are drawn with replacement, so a rare label's rows repeat
+    within an epoch. A batch costs O(batch_size) regardless of the data size.
+
+    Attributes:
+        index (LabelIndex): Rows per class
+        batch_size (int): Rows per batch
+        temperature (float): Flattening of the class frequencies
+        steps (int): Batches per epoch, by default as many as a pass over the rows
+        probabilities (np.ndarray): Sampling probability per class
+    """
+
+    def __init__(self, index: LabelIndex, batch_size: int = 32, temperature: float = math.inf,
+                 seed: int = 42, steps: Optional[int] = None):
+        if temperature <= 0:
+            raise ValueError(f"temperature must be positive, got {temperature}")
+        self.index = index
+        self.batch_size = batch_size
+        self.temperature = temperature
+        self.steps = steps or max(math.ceil(index.num_rows / batch_size), 1)
+        self.rng = np.random.default_rng(seed)
+
+        counts = index.counts.astype(np.float64)
+        weights = (counts > 0).astype(np.float64) if math.isinf(temperature) else counts ** (1 / temperature)
+        self.probabilities = weights / weights.sum()
+        self._cumulative = np.cumsum(self.probabilities)
+        self._cumulative[-1] = 1.0
+
+    def sample_batch(self) -> np.ndarray:
+        """int32 row positions of one batch."""
+        classes = np.searchsorted(self._cumulative, self.rng.random(self.batch_size), side='right')
+        picks = (self.rng.random(self.batch_size) * self.index.counts[classes]).astype(np.int64)
+        return self.index.row_ids[self.index.offsets[classes] + picks]
+
+    def __len__(self) -> int:
+        return self.steps
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        """The batches of one epoch."""
+        for _ in range(self.steps):
+            yield self.sample_batch()
+
+
+def _balanced_sequence_class() -> type:
+    import tensorflow as tf
+
+    class BalancedSequence(tf.keras.utils.Sequence):
+        """
+        Keras Sequence of label-balanced batches from an ImageDataGenerator iterator.
+
+        The iterator loads and augments the images; the sampler only chooses
+        which of the iterator's rows make up each batch.
+
+        Attributes:
+            iterator: DataFrameIterator from flow_from_dataframe
+            sampler (LabelBalancedSampler): Sampler over the iterator's rows
+        """
+
+        def __init__(self, iterator, temperature: float = math.inf, seed: int = 42):
+            super().__init__()
+            # Rows whose labels are all outside the classes were dropped by the
+            # iterator, so the index is built from the labels it kept
+            matrix = np.zeros((iterator.n, len(iterator.class_indices)), dtype=np.uint8)
+            for row, classes in enumerate(iterator.classes):
+                matrix[row, classes] = 1
+            labels = sorted(iterator.class_indices, key=iterator.class_indices.get)
+            self.iterator = iterator
+            self.sampler = LabelBalancedSampler(LabelIndex(matrix, labels), iterator.batch_size,
+                                                temperature, seed)
+
+        def __len__(self) -> int:
+            return len(self.sampler)
+
+        def __getitem__(self, index: int):
+            return self.iterator._get_batches_of_transformed_samples(self.sampler.sample_batch())
+
+    return BalancedSequence
+
+
+def __getattr__(name: str):
+    # The Keras Sequence is defined on first access, so the sampler itself
+    # works without importing TensorFlow
+    if name == 'BalancedSequence':
+        globals()[name] = _balanced_sequence_class()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from src.exception import CustomException
+from src.logger import logging
+
+
+class MetadataCache:
+    """
+    Versioned on-disk cache for the output of DataTransformations.
+
+    Each entry lives in its own directory named after the cache key and holds
+    the train/test splits as Parquet, their multi-hot label matrices as .npz
+    and a manifest with the label order. Entries written chunk by chunk leave
+    out the .npz and the matrices are read from the label columns instead.
+
+    Attributes:
+        cache_dir (Path): Root directory of the cache entries
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def file_hash(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+        """
+        Compute the SHA-256 of a file's content.
+
+        Args:
+            path: File to hash
+            chunk_size: Bytes read per iteration
+
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def cache_key(self, csv_path: Union[str, Path], sample_size: int,
+                  test_size: float, random_state: int, sampler: Optional[str] = None) -> str:
+        """
+        Build the cache key from the CSV content and the transformation parameters.
+
+        Args:
+            sampler: Name of a non-default sampling method, which draws a different sample
+
+        Returns:
+            str: Cache key
+        """
+        params = {
+            'version': self.VERSION,
+            'csv_sha256': self.file_hash(csv_path),
+            'sample_size': sample_size,
+            'test_size': test_size,
+            'random_state': random_state,
+        }
+        if sampler is not None:
+            params['sampler'] = sampler
+        payload = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def load(self, key: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, List[str]]]:
+        """
+        Load a cache entry.
+
+        An entry that cannot be read, e.g. with a missing Parquet or .npz file
+        or a corrupt manifest, is removed and treated as a miss, so the caller
+        recomputes and rewrites it.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Tuple[pd.DataFrame, pd.DataFrame, List[str]]]: Train data, test data
+            and labels, or None on a cache miss
+        """
+        entry_dir = self.cache_dir / key
+        manifest_path = entry_dir / 'manifest.json'
+        if not manifest_path.exists():
+            return None
+        try:
+            with open(manifest_path) as file:
+                manifest = json.load(file)
+            if manifest.get('version') != self.VERSION:
+                return None
+
+            labels = manifest['labels']
+            train = pd.read_parquet(entry_dir / 'train.parquet')
+            test = pd.read_parquet(entry_dir / 'test.parquet')
+            if (entry_dir / 'labels.npz').exists():
+                matrices = np.load(entry_dir / 'labels.npz')
+                train_matrix, test_matrix = matrices['train'], matrices['test']
+            else:
+                # Entries written chunk by chunk only hold the label columns
+                train_matrix = train[labels].to_numpy(np.float32)
+                test_matrix = test[labels].to_numpy(np.float32)
+            train['disease_vec'] = list(train_matrix)
+            test['disease_vec'] = list(test_matrix)
+            logging.info(f"Loaded cached metadata {key}. Train: {train.shape}, Test: {test.shape}")
+            return train, test, labels
+        except Exception as e:
+            logging.warning(f"Discarding unreadable cached metadata {key}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+    def save(self, key: str, train: pd.DataFrame, test: pd.DataFrame, labels: List[str]) -> None:
+        """
+        Write a cache entry atomically.
+
+        Args:
+            key: Cache key
+            train: Train split
+            test: Test split
+            labels: Ordered label list
+        """
+        try:
+            tmp_dir = self.staging_dir(key)
+            train.drop(columns='disease_vec').to_parquet(tmp_dir / 'train.parquet')
+            test.drop(columns='disease_vec').to_parquet(tmp_dir / 'test.parquet')
+            np.savez(
+                tmp_dir / 'labels.npz',
+                train=train[labels].to_numpy(np.float32),
+                test=test[labels].to_numpy(np.float32)
+            )
+            self.commit(key, tmp_dir, labels)
+        except Exception as e:
+            logging.error(f"Failed to cache metadata {key}")
+            raise CustomException(e, sys)
+
+    def staging_dir(self, key: str) -> Path:
+        """
+        Create a hidden directory next to the entries to write a new entry into.
+
+        The entry becomes visible to load() only after commit().
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Path: Empty staging directory
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=f".{key}-", dir=self.cache_dir))
+
+    def commit(self, key: str, tmp_dir: Path, labels: List[str]) -> None:
+        """
+        Write the manifest of a staged entry and move it into place atomically.
+
+        Args:
+            key: Cache key
+            tmp_dir: Directory from staging_dir holding train.parquet and test.parquet
+            labels: Ordered label list
+        """
+        with open(Path(tmp_dir) / 'manifest.json', 'w') as file:
+            json.dump({'version': self.VERSION, 'labels': labels}, file)
+
+        entry_dir = self.cache_dir / key
+        if entry_dir.exists():
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+        logging.info(f"Cached metadata at {entry_dir}")
@@ -0,0 +1,243 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from src.exception import CustomException
+from src.logger import configure_logging, logging
+
+VARIANTS = ('float32', 'float16', 'int8')
+
+
+class TFLiteExporter:
+    """
+    Converts the trained Keras model into TFLite variants for CPU inference.
+
+    Attributes:
+        model (tf.keras.Model): Trained model
+        output_dir (Path): Directory of the exported .tflite files
+    """
+
+    def __init__(self, model: tf.keras.Model, output_dir: Union[str, Path] = "artifacts/tflite"):
+        self.model = model
+        self.output_dir = Path(output_dir)
+
+    def export(self, variant: str, representative_images: Optional[np.ndarray] = None) -> Path:
+        """
+        Export one TFLite variant.
+
+        Args:
+            variant: 'float32', 'float16' (weights in float16) or 'int8'
+                (full-integer weights, activations and input/output)
+            representative_images: float32 (n, height, width, 1) calibration
+                images, required for 'int8'
+
+        Returns:
+            Path: Path of the written .tflite file
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Unknown TFLite variant '{variant}', expected one of {VARIANTS}")
+        if variant == 'int8' and representative_images is None:
+            raise ValueError("int8 quantization needs representative_images")
+        try:
+            converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+            if variant == 'float16':
+                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                converter.target_spec.supported_types = [tf.float16]
+            elif variant == 'int8':
+                def representative_dataset():
+                    for image in representative_images:
+                        yield [image[None].astype(np.float32)]
+
+                converter.optimizations = [tf.lite.Optimize.DEFAULT]
+                converter.representative_dataset = representative_dataset
+                converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+                converter.inference_input_type = tf.int8
+                converter.inference_output_type = tf.int8
+
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            path = self.output_dir / f"model_{variant}.tflite"
+            path.write_bytes(converter.convert())
+            logging.info(f"Exported {variant} TFLite model to {path} ({path.stat().st_size / 1e6:.1f} MB)")
+            return path
+        except Exception as e:
+            logging.error(f"Failed to export {variant} TFLite model")
+            raise CustomException(e, sys)
+
+
+def export_serving_model(model: tf.keras.Model, export_dir: Union[str, Path],
+                         img_size: Tuple[int, int] = (128, 128)) -> Path:
+    """
+    Export a SavedModel with a single traced inference function.
+
+    The `serve` function, also the 'serving_default' signature, takes a
+    float32 (batch, height, width, 1) 'images' tensor and returns float32
+    probabilities. Loading it with tf.saved_model.load restores the graph
+    as is, without rebuilding, compiling or retracing the Keras model. The
+    directory is replaced atomically.
+
+    Args:
+        model: Trained model
+        export_dir: SavedModel directory
+        img_size: Model input height and width
+
+    Returns:
+        Path: export_dir
+    """
+    try:
+        export_dir = Path(export_dir)
+        module = tf.Module()
+        # Only the weights are tracked, not the Keras model: restoring its
+        # per-layer functions would cost more than the traced graph saves
+        module.weights = list(model.weights)
+        module.serve = tf.function(
+            lambda images: tf.cast(model(images, training=False), tf.float32),
+            input_signature=[tf.TensorSpec([None, *img_size, 1], tf.float32, name='images')]
+        )
+
+        tmp_dir = export_dir.with_name(f".{export_dir.name}.tmp")
+        export_dir.parent.mkdir(parents=True, exist_ok=True)
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tf.saved_model.save(module, str(tmp_dir),
+                            signatures={'serving_default': module.serve.get_concrete_function()})
+        if export_dir.exists():
+            shutil.rmtree(export_dir)
+        os.replace(tmp_dir, export_dir)
+        logging.info(f"Exported serving SavedModel to {export_dir}")
+        return export_dir
+    except Exception as e:
+        logging.error(f"Failed to export serving model to {export_dir}")
+        raise CustomException(e, sys)
+
+
+def collect_images(dataset: tf.data.Dataset, max_images: int) -> Dict[str, np.ndarray]:
+    """Take up to max_images (images, targets) from a batched dataset."""
+    images, targets, count = [], [], 0
+    for batch_images, batch_targets in dataset:
+        images.append(batch_images.numpy())
+        targets.append(batch_targets.numpy())
+        count += len(images[-1])
+        if count >= max_images:
+            break
+    return {'images': np.concatenate(images)[:max_images], 'targets': np.concatenate(targets)[:max_images]}
+
+
+def per_label_auc(targets: np.ndarray, probabilities: np.ndarray) -> np.ndarray:
+    """ROC-AUC per label, NaN where a label has a single class."""
+    from sklearn.metrics import roc_auc_score
+
+    aucs = np.full(targets.shape[1], np.nan)
+    for i in range(targets.shape[1]):
+        if 0 < targets[:, i].sum() < len(targets):
+            aucs[i] = roc_auc_score(targets[:, i], probabilities[:, i])
+    return aucs
+
+
+def compare_variants(predictors: Dict[str, object], images: np.ndarray, targets: np.ndarray,
+                     model_paths: Dict[str, Union[str, Path]], batch_size: int = 32,
+                     repeats: int = 20) -> pd.DataFrame:
+    """
+    Compare model size, latency, throughput and AUC drift of inference backends.
+
+    Args:
+        predictors: Backend name to predictor (PredictPipeline or TFLitePredictor);
+            the first entry is the reference for AUC drift
+        images: Evaluation images
+        targets: Multi-hot targets of the images
+        model_paths: Backend name to model file, for the size column
+        batch_size: Batch size for the throughput measurement
+        repeats: Single-image predictions timed for the latency median
+
+    Returns:
+        pd.DataFrame: One row per backend
+    """
+    rows, reference = [], None
+    for name, predictor in predictors.items():
+        predictor.predict_batch(images[:1])
+        latencies = []
+        for i in range(repeats):
+            start = time.perf_counter()
+            predictor.predict_batch(images[i % len(images)][None])
+            latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        probabilities = np.concatenate([
+            predictor.predict_batch(images[i:i + batch_size]) for i in range(0, len(images), batch_size)
+        ])
+        throughput = len(images) / (time.perf_counter() - start)
+
+        aucs = per_label_auc(targets, probabilities)
+        if reference is None:
+            reference = aucs
+        drift = np.abs(aucs - reference)
+        rows.append({
+            'variant': name,
+            'size_mb': os.path.getsize(model_paths[name]) / 1e6,
+            'latency_ms_p50': float(np.median(latencies) * 1000),
+            'throughput_img_s': throughput,
+            'mean_auc': float(np.nanmean(aucs)) if not np.isnan(aucs).all() else float('nan'),
+            'max_auc_drift': float(np.nanmax(drift)) if not np.isnan(drift).all() else float('nan'),
+            'per_label_auc': aucs.tolist(),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    """Export TFLite variants of the trained model and compare them"""
+    from src.components.data_ingestion import DataIngestionPipeline
+    from src.components.data_transformations import DataTransformations
+    from src.pipeline.predict_pipeline import PredictPipeline, TFLitePredictor
+
+    parser = argparse.ArgumentParser(description="TFLite export and comparison")
+    parser.add_argument("--model-path", default="artifacts/final_model.keras")
+    parser.add_argument("--meta-csv", default="dataset/Data_Entry_2017_v2020.csv")
+    parser.add_argument("--metadata-cache-dir", default="artifacts/metadata_cache")
+    parser.add_argument("--sample-size", type=int, default=40000)
+    parser.add_argument("--image-dir", default="nih_images/images")
+    parser.add_argument("--output-dir", default="artifacts/tflite")
+    parser.add_argument("--img-size", type=int, nargs=2, default=(128, 128))
+    parser.add_argument("--variants", nargs="+", choices=VARIANTS, default=list(VARIANTS))
+    parser.add_argument("--num-calibration", type=int, default=200)
+    parser.add_argument("--num-eval", type=int, default=1000)
+    args = parser.parse_args()
+    configure_logging()
+
+    try:
+        img_size = tuple(args.img_size)
+        train_df, test_df, labels = DataTransformations(
+            args.meta_csv, cache_dir=args.metadata_cache_dir or None
+        ).process_pipeline(args.sample_size)
+        ingestion = DataIngestionPipeline(img_size=img_size)
+        calibration = collect_images(
+            ingestion.create_eval_dataset(train_df.sample(frac=1, random_state=0), Path(args.image_dir), labels),
+            args.num_calibration
+        )
+        evaluation = collect_images(
+            ingestion.create_eval_dataset(test_df, Path(args.image_dir), labels), args.num_eval
+        )
+
+        keras_predictor = PredictPipeline(args.model_path, img_size=img_size, labels=labels)
+        exporter = TFLiteExporter(keras_predictor.model, args.output_dir)
+        predictors, paths = {'keras': keras_predictor}, {'keras': args.model_path}
+        for variant in args.variants:
+            paths[variant] = exporter.export(variant, calibration['images'])
+            predictors[variant] = TFLitePredictor(paths[variant], img_size=img_size, labels=labels)
+
+        report = compare_variants(predictors, evaluation['images'], evaluation['targets'], paths)
+        report_path = Path(args.output_dir) / "comparison.json"
+        report_path.write_text(json.dumps({'labels': labels, 'variants': report.to_dict('records')}, indent=2))
+        logging.info(f"TFLite comparison written to {report_path}")
+        print(report.drop(columns='per_label_auc').to_string(index=False))
+    except Exception as e:
+        logging.error("TFLite export failed")
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    main()
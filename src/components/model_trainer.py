@@ -1,15 +1,21 @@
 
 ###Loss Function: I will use sigmoid activation function, we convert the multi-label problem into multiple binary classification problems, where each class is predicted independently, and we apply binary crossentropy loss to optimize the model's performance.
+import contextlib
+import hashlib
 import os
+import shutil
 import sys
-from typing import Tuple
+import tempfile
+from typing import List, Optional, Tuple
+import numpy as np
 import tensorflow as tf
 from tensorflow.keras import Sequential
 from tensorflow.keras.layers import (
-    GlobalAveragePooling2D, Dropout, Flatten, Dense
+    GlobalAveragePooling2D, Dropout, Flatten, Dense, Input
 )
 from tensorflow.keras.applications import MobileNet
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
+from src.components.model_export import export_serving_model
 from src.exception import CustomException
 from src.logger import logging
 
@@ -17,27 +23,87 @@
 class ModelTrainer:
     """
     Handles model creation, training on batches, and saving weights.
+
+    Performance modes are opt-in: jit_compile compiles the train step with
+    XLA, mixed_precision builds the model under a 'mixed_bfloat16' or
+    'mixed_float16' policy (variables and the sigmoid output stay float32,
+    float16 adds dynamic loss scaling) and steps_per_execution runs several
+    steps per graph call.
+
+    With a tf.distribute strategy the model is built in the strategy's scope.
+    Every worker runs the same callbacks, but only the chief writes to
+    weights_path and the final model path; the other workers write to
+    temporary files, as MultiWorkerMirroredStrategy requires.
     """
 
+    MIXED_PRECISION_POLICIES = ('mixed_bfloat16', 'mixed_float16')
+
     def __init__(self, img_size: Tuple[int, int] = (128, 128), epochs: int = 5,
-                 n_class: int = 14, learning_rate: float = 1e-3,
-                 weights_path: str = "checkpoints/best_model.weights.h5"):
+                 n_class: int = 14, learning_rate: float = 1e-3, dropout: float = 0.3,
+                 weights_path: str = "checkpoints/best_model.weights.h5",
+                 jit_compile: bool = False, mixed_precision: Optional[str] = None,
+                 steps_per_execution: int = 1,
+                 strategy: Optional[tf.distribute.Strategy] = None, is_chief: bool = True):
+        if mixed_precision is not None and mixed_precision not in self.MIXED_PRECISION_POLICIES:
+            raise ValueError(f"mixed_precision must be one of {self.MIXED_PRECISION_POLICIES}")
         self.img_size = img_size
         self.epochs = epochs
         self.n_class = n_class
         self.learning_rate = learning_rate
+        self.dropout = dropout
         self.weights_path = weights_path
+        self.jit_compile = jit_compile
+        self.mixed_precision = mixed_precision
+        self.steps_per_execution = steps_per_execution
+        self.strategy = strategy
+        self.is_chief = is_chief
+        self._feature_extractor = None
+        self._head = None
         os.makedirs(os.path.dirname(self.weights_path), exist_ok=True)
 
         # Build or load model
-        self.model = self._build_model()
-        if os.path.exists(self.weights_path):
-            logging.info(f"Loading existing weights from {self.weights_path}")
-            self.model.load_weights(self.weights_path)
+        with self._scope():
+            self.model = self._build_model()
+            if os.path.exists(self.weights_path):
+                logging.info(f"Loading existing weights from {self.weights_path}")
+                self.model.load_weights(self.weights_path)
+
+    def _scope(self):
+        return self.strategy.scope() if self.strategy is not None else contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def _writable_path(self, path: str):
+        """Yield path on the chief and a throwaway file on the other workers."""
+        if self.is_chief:
+            yield path
+            return
+        tmp_dir = tempfile.mkdtemp(prefix="worker-")
+        try:
+            yield os.path.join(tmp_dir, os.path.basename(path))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _compile(self, model: tf.keras.Model) -> None:
+        """Compile with Adam and binary crossentropy in the configured performance mode."""
+        optimizer = tf.keras.optimizers.Adam(learning_rate=self.learning_rate)
+        if self.mixed_precision == 'mixed_float16':
+            # float16 gradients underflow without loss scaling; bfloat16 has float32's range
+            optimizer = tf.keras.mixed_precision.LossScaleOptimizer(optimizer)
+        model.compile(
+            optimizer=optimizer,
+            loss="binary_crossentropy",
+            metrics=["accuracy"],
+            jit_compile=self.jit_compile,
+            steps_per_execution=self.steps_per_execution
+        )
 
     def _build_model(self) -> Sequential:
         """Build transfer learning model with MobileNet backbone."""
+        previous_policy = tf.keras.mixed_precision.global_policy()
         try:
+            # Layers take the global policy when created, so set it only while building
+            if self.mixed_precision:
+                tf.keras.mixed_precision.set_global_policy(self.mixed_precision)
             base_model = MobileNet(
                 input_shape=(self.img_size[0], self.img_size[1], 1),
                 include_top=False,
@@ -46,59 +112,163 @@ def _build_model(self) -> Sequential:
             model = Sequential([
                 base_model,
                 GlobalAveragePooling2D(),
-                Dropout(0.3),
+                Dropout(self.dropout),
                 Flatten(),
                 Dense(140, activation='relu'),
-                Dropout(0.3),
-                Dense(self.n_class, activation='sigmoid')
+                Dropout(self.dropout),
+                # float32 output keeps the sigmoid and the loss numerically stable
+                Dense(self.n_class, activation='sigmoid', dtype='float32')
             ])
-            model.compile(
-                optimizer=tf.keras.optimizers.Adam(learning_rate=self.learning_rate),
-                loss="binary_crossentropy",
-                metrics=["accuracy"]
-            )
-            logging.info("Model built successfully")
+            self._compile(model)
+            logging.info(f"Model built successfully (precision: {self.mixed_precision or 'float32'}, "
+                         f"jit_compile: {self.jit_compile}, steps_per_execution: {self.steps_per_execution})")
             return model
         except Exception as e:
             logging.error("Failed to build model")
             raise CustomException(e, sys)
+        finally:
+            tf.keras.mixed_precision.set_global_policy(previous_policy)
 
-    def train_batch(self, train_gen, valid_gen, batch_num: int):
-        """Train the model on a single batch of images."""
+    def train_batch(self, train_gen, valid_gen, batch_num: int,
+                    steps_per_epoch: Optional[int] = None, validation_steps: Optional[int] = None,
+                    initial_epoch: int = 0, callbacks: Optional[List[tf.keras.callbacks.Callback]] = None):
+        """
+        Train the model on a single batch of images.
+
+        steps_per_epoch and validation_steps are needed for repeated
+        datasets, e.g. the equal-length worker shards of distributed training.
+        initial_epoch continues an interrupted batch; callbacks are added to
+        the checkpoint and early-stopping callbacks.
+        """
         try:
-            checkpoint = ModelCheckpoint(
-                filepath=self.weights_path,
-                monitor="val_loss",
-                save_best_only=True,
-                save_weights_only=True,
-                verbose=1
-            )
+            with self._writable_path(self.weights_path) as weights_path:
+                checkpoint = ModelCheckpoint(
+                    filepath=weights_path,
+                    monitor="val_loss",
+                    save_best_only=True,
+                    save_weights_only=True,
+                    verbose=1 if self.is_chief else 0
+                )
+                earlystopping = EarlyStopping(
+                    monitor="val_loss",
+                    patience=5,
+                    restore_best_weights=True
+                )
+
+                history = self.model.fit(
+                    train_gen,
+                    validation_data=valid_gen,
+                    epochs=self.epochs,
+                    initial_epoch=initial_epoch,
+                    steps_per_epoch=steps_per_epoch,
+                    validation_steps=validation_steps,
+                    callbacks=[earlystopping, checkpoint, *(callbacks or [])],
+                    verbose=1 if self.is_chief else 0
+                )
+            logging.info(f"Batch {batch_num} training completed")
+            return history
+
+        except Exception as e:
+            logging.error(f"Failed training on batch {batch_num}")
+            raise CustomException(e, sys)
+
+    @property
+    def feature_dim(self) -> int:
+        """Size of the pooled backbone embedding."""
+        return int(self.model.layers[0].output.shape[-1])
+
+    def backbone_fingerprint(self) -> str:
+        """Hash of the backbone weights, used to key cached embeddings."""
+        digest = hashlib.sha256(f"{tuple(self.img_size)}{self.mixed_precision}".encode())
+        for weights in self.model.layers[0].get_weights():
+            digest.update(np.ascontiguousarray(weights).tobytes())
+        return digest.hexdigest()
+
+    def _build_feature_models(self) -> None:
+        """Split the model into the backbone with pooling and a head on the embeddings."""
+        try:
+            self._feature_extractor = Sequential(self.model.layers[:2])
+            # The head shares its layers, and so its weights, with self.model
+            self._head = Sequential([Input(shape=(self.feature_dim,)), *self.model.layers[2:]])
+            self._compile(self._head)
+        except Exception as e:
+            logging.error("Failed to build feature extraction models")
+            raise CustomException(e, sys)
+
+    def extract_features(self, dataset: tf.data.Dataset) -> np.ndarray:
+        """
+        Run the frozen backbone once over a dataset.
+
+        Args:
+            dataset: Unaugmented (images, targets) batches
+
+        Returns:
+            np.ndarray: float32 array of shape (n_images, feature_dim)
+        """
+        try:
+            if self._feature_extractor is None:
+                self._build_feature_models()
+            features = self._feature_extractor.predict(dataset.map(lambda images, _: images), verbose=0)
+            return features.astype(np.float32, copy=False)
+        except Exception as e:
+            logging.error("Failed to extract backbone features")
+            raise CustomException(e, sys)
+
+    def train_head(self, train_features: np.ndarray, train_targets: np.ndarray,
+                   valid_features: np.ndarray, valid_targets: np.ndarray,
+                   batch_num: int, batch_size: int = 32):
+        """
+        Train only the dense head on cached backbone embeddings.
+
+        The backbone is not run, so no augmentation is applied. The best head
+        weights are restored and saved with the rest of the model.
+        """
+        try:
+            if self._head is None:
+                self._build_feature_models()
             earlystopping = EarlyStopping(
                 monitor="val_loss",
                 patience=5,
                 restore_best_weights=True
             )
-
-            history = self.model.fit(
-                train_gen,
-                validation_data=valid_gen,
+            history = self._head.fit(
+                train_features,
+                train_targets,
+                validation_data=(valid_features, valid_targets),
+                batch_size=batch_size,
                 epochs=self.epochs,
-                callbacks=[earlystopping, checkpoint],
+                shuffle=True,
+                callbacks=[earlystopping],
                 verbose=1
             )
-            logging.info(f"Batch {batch_num} training completed")
+            self.model.save_weights(self.weights_path)
+            logging.info(f"Batch {batch_num} head training completed")
             return history
 
         except Exception as e:
-            logging.error(f"Failed training on batch {batch_num}")
+            logging.error(f"Failed head training on batch {batch_num}")
             raise CustomException(e, sys)
 
-    def save_model(self, path: str = "artifacts/final_model.keras"):
-        """Save the final model after all batches."""
+    def save_model(self, path: str = "artifacts/final_model.keras",
+                   serving_path: Optional[str] = None, export_serving: bool = True):
+        """
+        Save the final model after all batches.
+
+        With export_serving, serving_path also gets a SavedModel with a traced
+        inference function for fast-starting inference workers (see
+        export_serving_model). It defaults to a serving_model directory next
+        to path.
+        """
         try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            self.model.save(path)
-            logging.info(f"Final model saved at {path}")
+            with self._writable_path(path) as save_path:
+                os.makedirs(os.path.dirname(save_path), exist_ok=True)
+                self.model.save(save_path)
+            if export_serving:
+                serving_path = serving_path or os.path.join(os.path.dirname(path), "serving_model")
+                with self._writable_path(serving_path) as export_path:
+                    export_serving_model(self.model, export_path, self.img_size)
+            if self.is_chief:
+                logging.info(f"Final model saved at {path}")
         except Exception as e:
             logging.error("Failed to save final model")
             raise CustomException(e, sys)
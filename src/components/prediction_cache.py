@@ -0,0 +1,178 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, TypeVar, Union
+import numpy as np
+from src.logger import logging
+
+T = TypeVar('T')
+
+
+def model_fingerprint(model_path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """
+    Hash a model file, or every file of a model directory, by content.
+
+    Args:
+        model_path: .keras/.tflite file or SavedModel directory
+
+    Returns:
+        str: Hex digest
+    """
+    model_path = Path(model_path)
+    files = sorted(p for p in model_path.rglob('*') if p.is_file()) if model_path.is_dir() else [model_path]
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(str(path.relative_to(model_path) if model_path.is_dir() else path.name).encode())
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def model_stat(model_path: Union[str, Path]) -> Tuple[int, int]:
+    """Latest mtime and total size of a model file or directory."""
+    model_path = Path(model_path)
+    if model_path.is_dir():
+        stats = [p.stat() for p in model_path.rglob('*') if p.is_file()]
+        return max(s.st_mtime_ns for s in stats), sum(s.st_size for s in stats)
+    stat = model_path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def load_fingerprinted(model_path: Union[str, Path], load: Callable[[], T], attempts: int = 3) -> Tuple[T, str]:
+    """
+    Load a model and fingerprint the files it was loaded from.
+
+    The model is hashed before loading and its mtime and size are compared
+    after, so a file replaced during loading is caught and loaded again.
+
+    Args:
+        model_path: .keras/.tflite file or SavedModel directory
+        load: Loads and returns the model
+        attempts: Loads to try before giving up
+
+    Returns:
+        Tuple[T, str]: The loaded model and its fingerprint
+    """
+    for _ in range(attempts):
+        stat = model_stat(model_path)
+        fingerprint = model_fingerprint(model_path)
+        model = load()
+        if model_stat(model_path) == stat:
+            return model, fingerprint
+        logging.warning(f"Model {model_path} changed while loading, loading it again")
+    raise RuntimeError(f"Model {model_path} kept changing while loading")
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of prediction vectors.
+
+    Entries are keyed by a hash of the raw image bytes under the fingerprint of
+    the loaded model (see load_fingerprinted). The in-memory tier is an LRU
+    bounded by entry count and TTL; the optional disk tier stores one .npy per
+    entry in a directory named after the fingerprint. The fingerprint is taken
+    from the predictor when its model is loaded, not from the model file later,
+    so a file replaced while serving never mixes old-model outputs into the new
+    model's entries: a restart on the new model starts a fresh directory.
+
+    Attributes:
+        fingerprint (str): Fingerprint of the model whose predictions are cached
+        max_entries (int): Maximum in-memory entries
+        ttl_seconds (float): Lifetime of an in-memory entry, None for no expiry
+        disk_dir (Path): Root of the on-disk tier, None to disable it
+    """
+
+    def __init__(self, fingerprint: str, max_entries: int = 10000,
+                 ttl_seconds: Optional[float] = 3600, disk_dir: Optional[Union[str, Path]] = None):
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0,
+                          'expirations': 0, 'stale_puts': 0}
+
+    @staticmethod
+    def image_key(image_bytes: bytes) -> str:
+        """Hash of the raw image bytes (SHA-256 is hardware accelerated on most CPUs)."""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / self.fingerprint[:16] / key[:2] / f"{key}.npy"
+
+    def _insert(self, key: str, value: np.ndarray) -> None:
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds else float('inf')
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def get(self, image_bytes: bytes) -> Optional[np.ndarray]:
+        """
+        Look up the cached prediction of an image.
+
+        Args:
+            image_bytes: Raw encoded image
+
+        Returns:
+            Optional[np.ndarray]: Cached probabilities, or None on a miss
+        """
+        key = self.image_key(image_bytes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+                self._counters['expirations'] += 1
+
+            path = self._disk_path(key)
+            if path is not None and path.exists():
+                value = np.load(path)
+                self._insert(key, value)
+                self._counters['disk_hits'] += 1
+                return value
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, image_bytes: bytes, probabilities: np.ndarray, fingerprint: str) -> None:
+        """
+        Store the prediction of an image.
+
+        Args:
+            image_bytes: Raw encoded image
+            probabilities: Model output for the image
+            fingerprint: Fingerprint of the model that produced the output;
+                outputs of any other model are not stored
+        """
+        if fingerprint != self.fingerprint:
+            with self._lock:
+                self._counters['stale_puts'] += 1
+            return
+        key = self.image_key(image_bytes)
+        value = np.asarray(probabilities, dtype=np.float32)
+        value.setflags(write=False)
+        with self._lock:
+            self._insert(key, value)
+            path = self._disk_path(key)
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f".{path.name}.{threading.get_ident()}")
+            with open(tmp_path, 'wb') as file:
+                np.save(file, value)
+            os.replace(tmp_path, path)
+
+    def stats(self) -> Dict[str, int]:
+        """Hit, miss, eviction, expiration and stale-put counters."""
+        with self._lock:
+            return {**self._counters, 'entries': len(self._entries)}
@@ -0,0 +1,116 @@
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+
+
+class ShardStore:
+    """
+    Directory of .npy shards with a parquet index mapping names to shard rows.
+
+    Storage shared by the image store and the feature cache. Shards and the
+    index are written to a temporary file and renamed into place, so readers
+    never see a partial file, and shards are read through cached read-only
+    memory maps.
+
+    Attributes:
+        root (Path): Directory holding 'shards/' and 'index.parquet'
+        columns (Dict[str, type]): Index columns and their dtypes; 'Image Index',
+            'shard' and 'row' are required
+        index (pd.DataFrame): One row per stored item
+    """
+
+    def __init__(self, root: Union[str, Path], columns: Dict[str, type]):
+        self.root = Path(root)
+        self.columns = columns
+        self._shards = {}
+        self._lookup = None
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+
+    @property
+    def shard_dir(self) -> Path:
+        return self.root / 'shards'
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / 'index.parquet'
+
+    def _load_index(self) -> pd.DataFrame:
+        if self.index_path.exists():
+            return pd.read_parquet(self.index_path)
+        return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in self.columns.items()})
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def write_shard(self, name: str, array: np.ndarray) -> None:
+        """Write a shard atomically, replacing any shard of the same name."""
+        path = self.shard_dir / f"{name}.npy"
+        tmp_path = path.with_name(f".{path.name}")
+        np.save(tmp_path, array)
+        os.replace(tmp_path, path)
+        self._shards.pop(name, None)
+
+    def shard(self, name: str) -> np.ndarray:
+        """Read-only memory map of a shard."""
+        if name not in self._shards:
+            self._shards[name] = np.load(self.shard_dir / f"{name}.npy", mmap_mode='r')
+        return self._shards[name]
+
+    def update_index(self, added: pd.DataFrame, keep: Optional[pd.Series] = None) -> None:
+        """
+        Add index rows and save the index atomically.
+
+        Args:
+            added: Rows of newly written shards; they replace existing rows of
+                the same 'Image Index'
+            keep: Mask of existing rows to keep, all of them when None
+        """
+        current = self.index if keep is None else self.index[keep]
+        self.index = (pd.concat([current, added], ignore_index=True)
+                      .drop_duplicates('Image Index', keep='last')
+                      .reset_index(drop=True))
+        tmp_path = self.index_path.with_suffix('.tmp')
+        self.index.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.index_path)
+        self._lookup = None
+
+    def locate(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Map names to index positions.
+
+        Args:
+            names: 'Image Index' values
+
+        Returns:
+            np.ndarray: int64 positions into the index, -1 for missing names
+        """
+        if self._lookup is None:
+            self._lookup = pd.Index(self.index['Image Index'])
+        return self._lookup.get_indexer(pd.Index(names)).astype(np.int64)
+
+    def gather(self, positions: np.ndarray, row_shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+        """
+        Read rows by index position.
+
+        Rows are gathered straight from the memory-mapped shards into the
+        returned array with fancy indexing.
+
+        Args:
+            positions: Positions returned by locate, none of them -1
+            row_shape: Shape of one stored row
+            dtype: dtype of the shards
+
+        Returns:
+            np.ndarray: Array of shape (len(positions), *row_shape)
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        shards = self.index['shard'].to_numpy()[positions]
+        rows = self.index['row'].to_numpy()[positions]
+        batch = np.empty((len(positions), *row_shape), dtype=dtype)
+        for shard in np.unique(shards):
+            mask = shards == shard
+            batch[mask] = self.shard(shard)[rows[mask]]
+        return batch
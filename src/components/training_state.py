@@ -0,0 +1,139 @@
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Union
+import tensorflow as tf
+from src.exception import CustomException
+from src.logger import logging
+
+STAGES = ('downloaded', 'extracted', 'trained')
+
+
+class TrainingManifest:
+    """
+    Records which stages of each archive have finished.
+
+    The manifest is a JSON file rewritten atomically after every change, so a
+    crash leaves either the old or the new record, never a partial one.
+
+    Attributes:
+        path (Path): Manifest file
+        archives (Dict[str, Dict[str, float]]): Completion time of each stage per archive
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.archives: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path) as file:
+                self.archives = json.load(file)['archives']
+            logging.info(f"Loaded training manifest {self.path}")
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}")
+        with open(tmp_path, 'w') as file:
+            json.dump({'archives': self.archives}, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def mark(self, archive: str, stage: str) -> None:
+        """Record that a stage of an archive has finished."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage {stage!r}, expected one of {STAGES}")
+        with self._lock:
+            self.archives.setdefault(archive, {})[stage] = time.time()
+            self._save()
+
+    def is_done(self, archive: str, stage: str) -> bool:
+        return stage in self.archives.get(archive, {})
+
+    def all_done(self, archives: List[str], stage: str) -> bool:
+        return all(self.is_done(archive, stage) for archive in archives)
+
+
+class TrainingCheckpoint:
+    """
+    Full training checkpoints: weights, optimizer slots, progress and RNG state.
+
+    Unlike the best-weights file, these checkpoints capture everything needed
+    to continue an interrupted batch from its last finished epoch. With
+    tf.keras 2, writes are asynchronous: variables are copied to host memory
+    and written to disk in the background while training continues.
+
+    Attributes:
+        directory (Path): Checkpoint directory
+        batch_num (tf.Variable): Archive batch the checkpoint belongs to
+        epoch (tf.Variable): Finished epochs of that batch
+    """
+
+    def __init__(self, directory: Union[str, Path], model: tf.keras.Model, max_to_keep: int = 2):
+        self.directory = Path(directory)
+        self.batch_num = tf.Variable(0, dtype=tf.int64, trainable=False)
+        self.epoch = tf.Variable(0, dtype=tf.int64, trainable=False)
+        # Create the optimizer slots now so a restore fills them instead of deferring
+        model.optimizer.build(model.trainable_variables)
+        self.checkpoint = tf.train.Checkpoint(
+            model=model,
+            optimizer=model.optimizer,
+            batch_num=self.batch_num,
+            epoch=self.epoch,
+            rng=tf.random.get_global_generator()
+        )
+        self.manager = tf.train.CheckpointManager(self.checkpoint, str(self.directory), max_to_keep=max_to_keep)
+        # Async writes trace a copy function that Keras 3 variables cannot be captured in
+        keras_major = int(str(getattr(tf.keras, '__version__', '2')).split('.')[0])
+        self._options = tf.train.CheckpointOptions(enable_async=keras_major < 3)
+
+    def restore(self) -> bool:
+        """
+        Restore the latest checkpoint, if any.
+
+        Returns:
+            bool: Whether a checkpoint was restored
+        """
+        try:
+            latest = self.manager.latest_checkpoint
+            if latest is None:
+                return False
+            self.checkpoint.restore(latest).expect_partial()
+            logging.info(f"Restored {latest} (batch {int(self.batch_num)}, epoch {int(self.epoch)})")
+            return True
+        except Exception as e:
+            logging.error("Failed to restore training checkpoint")
+            raise CustomException(e, sys)
+
+    def save(self, batch_num: int, epoch: int) -> None:
+        """Start an asynchronous checkpoint after `epoch` finished epochs of a batch."""
+        self.batch_num.assign(batch_num)
+        self.epoch.assign(epoch)
+        path = self.manager.save(options=self._options)
+        logging.info(f"Checkpoint {path} started (batch {batch_num}, epoch {epoch})")
+
+    def resume_epoch(self, batch_num: int) -> int:
+        """Finished epochs to skip when training batch_num."""
+        return int(self.epoch) if int(self.batch_num) == batch_num else 0
+
+    def sync(self) -> None:
+        """Wait for pending asynchronous writes."""
+        self.checkpoint.sync()
+
+    def callback(self, batch_num: int) -> tf.keras.callbacks.Callback:
+        """Keras callback that checkpoints after every epoch of a batch."""
+        return _EpochCheckpoint(self, batch_num)
+
+
+class _EpochCheckpoint(tf.keras.callbacks.Callback):
+    def __init__(self, state: TrainingCheckpoint, batch_num: int):
+        super().__init__()
+        self.state = state
+        self.batch_num = batch_num
+
+    def on_epoch_end(self, epoch, logs=None):
+        self.state.save(self.batch_num, epoch + 1)
+
+    def on_train_end(self, logs=None):
+        self.state.sync()
@@ -1,66 +1,244 @@
 from src.exception import CustomException
 from src.logger import logging
 import sys
-import requests
+import hashlib
+import threading
+import time
 import tarfile
 import shutil
-from tqdm import tqdm
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 import os
 
+_thread_local = threading.local()
+
+
+def _retryable_errors() -> Tuple[type, ...]:
+    """Errors after which a download is resumed from its partial file"""
+    import requests
+    return (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
 class DatasetUtils:
     """Utility class for handling dataset operations like download, extraction, and cleanup."""
 
     @staticmethod
-    def download_file(url: str, save_path: Union[str, Path], chunk_size: int = 1024) -> None:
+    def _session(pool_size: int = 8) -> "requests.Session":
+        """Return this thread's pooled HTTP session."""
+        session = getattr(_thread_local, "session", None)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            from urllib3.util.retry import Retry
+
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _thread_local.session = session
+        return session
+
+    @staticmethod
+    def file_sha256(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+        """Compute the SHA-256 hex digest of a file."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _download_to_part(url: str, part_path: Path, chunk_size: int, desc: str) -> Tuple[int, Optional[int]]:
+        """
+        Stream a URL into a partial file, resuming with a Range request when it exists.
+        
+        Returns:
+            Tuple[int, Optional[int]]: Bytes transferred and expected total size, if known
+        """
+        from tqdm import tqdm
+
+        offset = part_path.stat().st_size if part_path.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        with DatasetUtils._session().get(url, stream=True, headers=headers, timeout=60) as response:
+            content_range = response.headers.get('content-range', '')
+            if offset and response.status_code == 416:
+                # The partial file already holds the whole body
+                total = content_range.rsplit('/', 1)[-1]
+                return 0, int(total) if total.isdigit() else None
+            response.raise_for_status()
+
+            if offset and response.status_code != 206:
+                logging.info(f"Server ignored Range request, restarting {part_path.name}")
+                offset = 0
+            if response.status_code == 206 and '/' in content_range:
+                total = content_range.rsplit('/', 1)[-1]
+                total_size = int(total) if total.isdigit() else None
+            elif 'content-length' in response.headers:
+                total_size = offset + int(response.headers['content-length'])
+            else:
+                total_size = None
+
+            transferred = 0
+            with (tqdm(total=total_size, initial=offset, unit='B', unit_scale=True, desc=desc) as pbar,
+                open(part_path, 'ab' if offset else 'wb') as file):
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        file.write(chunk)
+                        transferred += len(chunk)
+                        pbar.update(len(chunk))
+        return transferred, total_size
+
+    @staticmethod
+    def download_file(url: str,
+                      save_path: Union[str, Path],
+                      chunk_size: int = 1 << 20,
+                      expected_sha256: Optional[str] = None,
+                      max_attempts: int = 5) -> int:
         """
-        Download a file from URL with progress bar.
+        Download a file from URL with progress bar, resuming interrupted downloads.
+        
+        Data is written to '<save_path>.part' and only renamed to save_path once
+        its size matches the server's and, when given, its SHA-256 matches, so an
+        existing save_path is always complete.
         
         Args:
             url: Source URL
             save_path: Destination path
             chunk_size: Size of chunks to download
+            expected_sha256: Checksum the finished file must match
+            max_attempts: Connection attempts before giving up
+        
+        Returns:
+            int: Bytes transferred
         """
-        if not os.path.exists(save_path):
-            try:
-                with requests.get(url, stream=True) as response:
-                    response.raise_for_status()
-                    total_size = int(response.headers.get('content-length', 0))
-                    
-                    with (tqdm(total=total_size, unit='B', unit_scale=True, desc=str(save_path)) as pbar,
-                        open(save_path, 'wb') as file):
-                        for chunk in response.iter_content(chunk_size=chunk_size):
-                            if chunk:
-                                file.write(chunk)
-                                pbar.update(len(chunk))
-                logging.info(f"Successfully downloaded: {save_path}")
-            except Exception as e:
-                logging.error(f"Failed to download file: {url}")
-                raise CustomException(e, sys)
-        else:
+        save_path = Path(save_path)
+        if save_path.exists():
             logging.info(f"Skipping download, {save_path} already exists")
+            return 0
+
+        part_path = save_path.with_name(save_path.name + '.part')
+        transferred = 0
+        try:
+            for attempt in range(1, max_attempts + 1):
+                try:
+                    count, total_size = DatasetUtils._download_to_part(
+                        url, part_path, chunk_size, str(save_path)
+                    )
+                    transferred += count
+                    break
+                except _retryable_errors() as e:
+                    if attempt == max_attempts:
+                        raise
+                    logging.warning(f"Download of {save_path} interrupted ({e}), resuming")
+
+            size = part_path.stat().st_size
+            if total_size is not None and size != total_size:
+                raise IOError(f"Size mismatch for {save_path}: got {size} bytes, expected {total_size}")
+            if expected_sha256 is not None:
+                digest = DatasetUtils.file_sha256(part_path)
+                if digest != expected_sha256.lower():
+                    part_path.unlink()
+                    raise IOError(f"Checksum mismatch for {save_path}: got {digest}")
+
+            os.replace(part_path, save_path)
+            logging.info(f"Successfully downloaded: {save_path}")
+            return transferred
+        except Exception as e:
+            logging.error(f"Failed to download file: {url}")
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def download_files(jobs: List[Tuple[str, Union[str, Path]]],
+                       max_workers: int = 4,
+                       chunk_size: int = 1 << 20,
+                       checksums: Optional[Dict[str, str]] = None) -> int:
+        """
+        Download several files concurrently from a bounded worker pool.
         
+        Args:
+            jobs: (url, save_path) pairs
+            max_workers: Maximum concurrent downloads
+            chunk_size: Size of chunks to download
+            checksums: Expected SHA-256 per file name
+
+        Returns:
+            int: Bytes transferred
+        """
+        checksums = checksums or {}
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+            futures = [
+                pool.submit(DatasetUtils.download_file, url, path, chunk_size,
+                            checksums.get(Path(path).name))
+                for url, path in jobs
+            ]
+            transferred = sum(future.result() for future in futures)
+        elapsed = time.perf_counter() - start
+        if transferred:
+            logging.info(
+                f"Downloaded {transferred / 1e6:.1f} MB in {elapsed:.1f}s "
+                f"({transferred / 1e6 / elapsed:.1f} MB/s across {len(jobs)} files)"
+            )
+        return transferred
+
     @staticmethod
-    def extract_tar_gz(tar_path: Union[str, Path], extract_to: Union[str, Path]) -> None:
+    def extract_tar_gz(tar_path: Union[str, Path], extract_to: Union[str, Path]) -> List[str]:
         """
         Extract tar.gz file to specified directory.
         
         Args:
             tar_path: Path to tar.gz file
             extract_to: Extraction destination
+
+        Returns:
+            List[str]: Base names of the extracted files
         """
+        from tqdm import tqdm
+
         try:
             logging.info(f"Extracting {tar_path}")
-            with tarfile.open(tar_path, "r:gz") as tar:
-                members = tar.getmembers()
-                for member in tqdm(members, desc=f"Extracting {Path(tar_path).name}", unit="file"):
+            names = []
+            # Stream mode reads the gzip stream once instead of indexing it first
+            with tarfile.open(tar_path, "r|gz") as tar:
+                for member in tqdm(tar, desc=f"Extracting {Path(tar_path).name}", unit="file"):
                     tar.extract(member, path=extract_to)
+                    if member.isfile():
+                        names.append(Path(member.name).name)
             logging.info(f"Successfully extracted to: {extract_to}")
+            return names
         except Exception as e:
             logging.error(f"Failed to extract: {tar_path}")
             raise CustomException(e, sys)
         
+    @staticmethod
+    def iter_tar_files(tar_path: Union[str, Path], suffix: str = ".png") -> Iterator[Tuple[str, bytes]]:
+        """
+        Stream the files of a tar.gz in a single sequential pass.
+        
+        Args:
+            tar_path: Path to tar.gz file
+            suffix: Only yield members with this file suffix
+        
+        Yields:
+            Tuple[str, bytes]: Member base name and content
+        """
+        from tqdm import tqdm
+
+        try:
+            with tarfile.open(tar_path, "r|gz") as tar:
+                for member in tqdm(tar, desc=f"Streaming {Path(tar_path).name}", unit="file"):
+                    if not member.isfile() or not member.name.endswith(suffix):
+                        continue
+                    yield Path(member.name).name, tar.extractfile(member).read()
+        except Exception as e:
+            logging.error(f"Failed to stream: {tar_path}")
+            raise CustomException(e, sys)
+
     @staticmethod
     def cleanup_files(paths: List[Union[str, Path]]) -> None:
         """
@@ -1,15 +1,31 @@
 import logging
 import os
 from datetime import datetime
+from typing import Optional
 
-LOG_FILE=f"{datetime.now().strftime('%m_%d_%Y')}.log"
-logs_path=os.path.join(os.getcwd(),"logs")
-os.makedirs(logs_path,exist_ok=True)
+LOG_FORMAT = "[ %(asctime)s ] %(filename)s:%(lineno)d %(name)s - %(levelname)s - %(message)s"
 
-LOG_FILE_PATH=os.path.join(logs_path,LOG_FILE)
+_log_file_path: Optional[str] = None
 
-logging.basicConfig(
-    filename=LOG_FILE_PATH,
-    format="[ %(asctime)s ] %(filename)s:%(lineno)d %(name)s - %(levelname)s - %(message)s",
-    level=logging.INFO
-    )
\ No newline at end of file
+
+def configure_logging(logs_dir: Optional[str] = None, level: int = logging.INFO) -> str:
+    """
+    Send log records to a dated file in logs_dir.
+
+    Importing this module has no side effects; entry points call this once
+    before doing any work. Later calls return the file already in use.
+
+    Args:
+        logs_dir: Log directory, default ./logs
+        level: Root logger level
+
+    Returns:
+        str: Path of the log file
+    """
+    global _log_file_path
+    if _log_file_path is None:
+        logs_path = logs_dir or os.path.join(os.getcwd(), "logs")
+        os.makedirs(logs_path, exist_ok=True)
+        _log_file_path = os.path.join(logs_path, f"{datetime.now().strftime('%m_%d_%Y')}.log")
+        logging.basicConfig(filename=_log_file_path, format=LOG_FORMAT, level=level)
+    return _log_file_path
@@ -0,0 +1,230 @@
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+import glob
+import numpy as np
+import pandas as pd
+from src.components.utils import DatasetUtils
+from src.exception import CustomException
+from src.logger import configure_logging, logging
+from src.pipeline.predict_pipeline import Predictor, decode_image, load_predictor
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg')
+
+Source = Union[str, Path, bytes]
+
+
+def iter_inputs(source: str, image_dir: Optional[str] = None) -> Iterator[Tuple[str, Source]]:
+    """
+    List the images to score in a deterministic order.
+
+    Args:
+        source: Image directory, glob pattern, .tar.gz archive or metadata CSV
+        image_dir: Directory holding the 'Image Index' files of a CSV source
+
+    Yields:
+        Tuple[str, Source]: Image name and its path or encoded bytes
+    """
+    if source.endswith(('.tar.gz', '.tgz')):
+        yield from DatasetUtils.iter_tar_files(source)
+    elif source.endswith('.csv'):
+        df = pd.read_csv(source)
+        base = Path(image_dir) if image_dir else Path(source).parent
+        paths = df['image_path'] if 'image_path' in df else base.as_posix() + '/' + df['Image Index']
+        yield from zip(df['Image Index'], paths)
+    elif os.path.isdir(source):
+        paths = sorted(p for p in Path(source).rglob('*') if p.suffix.lower() in IMAGE_SUFFIXES)
+        yield from ((p.name, p) for p in paths)
+    else:
+        yield from ((Path(p).name, p) for p in sorted(glob.glob(source, recursive=True)))
+
+
+def _decode(source: Source, img_size: Tuple[int, int]) -> np.ndarray:
+    if not isinstance(source, bytes):
+        with open(source, 'rb') as file:
+            source = file.read()
+    return decode_image(source, img_size)
+
+
+class BatchPredictor:
+    """
+    Scores large image collections with bounded memory.
+
+    Images are decoded in a worker pool a few batches ahead of the model,
+    scored in fixed-size batches and written as numbered output shards. A rerun
+    counts the rows of the shards already written, skips that many inputs and
+    continues with the next shard number, so the batch and shard sizes may
+    change between runs and inputs appended since the last run are picked up.
+    It fails if the last skipped input is not the last image written, e.g.
+    because the input order changed.
+
+    Attributes:
+        predictor (Predictor): Loaded model
+        output_dir (Path): Directory of the output shards
+        batch_size (int): Images per model call
+        shard_size (int): Rows per output shard, a multiple of batch_size
+        workers (int): Decode workers
+        use_processes (bool): Decode in processes instead of threads
+        output_format (str): 'parquet' or 'csv'
+    """
+
+    def __init__(self, predictor: Predictor, output_dir: Union[str, Path], batch_size: int = 64,
+                 shard_size: int = 8192, workers: Optional[int] = None, use_processes: bool = False,
+                 output_format: str = 'parquet'):
+        self.predictor = predictor
+        self.output_dir = Path(output_dir)
+        self.batch_size = batch_size
+        self.shard_size = max(batch_size, shard_size // batch_size * batch_size)
+        self.workers = workers or os.cpu_count()
+        self.use_processes = use_processes
+        self.output_format = output_format
+
+    def _shard_path(self, shard: int) -> Path:
+        return self.output_dir / f"part-{shard:05d}.{self.output_format}"
+
+    def _read_names(self, path: Path) -> pd.Series:
+        if self.output_format == 'csv':
+            return pd.read_csv(path, usecols=['Image Index'])['Image Index']
+        return pd.read_parquet(path, columns=['Image Index'])['Image Index']
+
+    def written(self) -> Tuple[int, int, Optional[str]]:
+        """
+        Scan the consecutive shards already written.
+
+        Returns:
+            Tuple[int, int, Optional[str]]: Number of shards, number of rows in
+                them and the last image name written, None without shards
+        """
+        shard = rows = 0
+        last_name = None
+        while self._shard_path(shard).exists():
+            names = self._read_names(self._shard_path(shard))
+            rows += len(names)
+            if len(names):
+                last_name = str(names.iloc[-1])
+            shard += 1
+        return shard, rows, last_name
+
+    @staticmethod
+    def _skip(items: Iterator[Tuple[str, Source]], rows: int, last_name: Optional[str]) -> None:
+        """Advance items past the rows already written, checking they line up."""
+        skipped = None
+        count = 0
+        for skipped, _ in islice(items, rows):
+            count += 1
+        if count < rows:
+            raise ValueError(f"Output has {rows} rows but the input only has {count} images")
+        if rows and str(skipped) != last_name:
+            raise ValueError(f"Input image {rows} is '{skipped}' but the last image written is "
+                             f"'{last_name}'; the input changed since the last run")
+
+    def _write_shard(self, shard: int, names: List[str], probabilities: np.ndarray) -> None:
+        df = pd.DataFrame(probabilities, columns=self.predictor.labels)
+        df.insert(0, 'Image Index', names)
+        path = self._shard_path(shard)
+        tmp_path = path.with_name(f".{path.name}")
+        if self.output_format == 'csv':
+            df.to_csv(tmp_path, index=False)
+        else:
+            df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def _decoded_batches(self, pool: Executor,
+                         items: Iterator[Tuple[str, Source]]) -> Iterator[Tuple[List[str], np.ndarray]]:
+        """Yield decoded batches, keeping a bounded number in flight."""
+        decode = partial(_decode, img_size=self.predictor.img_size)
+        pending = deque()
+        while True:
+            while len(pending) < 2 * self.workers:
+                chunk = list(islice(items, self.batch_size))
+                if not chunk:
+                    break
+                names = [name for name, _ in chunk]
+                pending.append((names, [pool.submit(decode, source) for _, source in chunk]))
+            if not pending:
+                return
+            names, futures = pending.popleft()
+            yield names, np.stack([future.result() for future in futures])
+
+    def run(self, items: Iterator[Tuple[str, Source]]) -> int:
+        """
+        Score all images and write the output shards.
+
+        Args:
+            items: (name, path or bytes) pairs in a deterministic order
+
+        Returns:
+            int: Number of images scored in this run
+        """
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            shard, rows, last_name = self.written()
+            items = iter(items)
+            if shard:
+                logging.info(f"Resuming after {rows} images in {shard} shards")
+                self._skip(items, rows, last_name)
+
+            executor = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            names: List[str] = []
+            outputs: List[np.ndarray] = []
+            scored = 0
+            start = shard_start = time.perf_counter()
+            with executor(max_workers=self.workers) as pool:
+                for batch_names, images in self._decoded_batches(pool, items):
+                    outputs.append(self.predictor.predict_batch(images))
+                    names.extend(batch_names)
+                    if len(names) >= self.shard_size:
+                        self._write_shard(shard, names, np.concatenate(outputs))
+                        rate = len(names) / (time.perf_counter() - shard_start)
+                        logging.info(f"Wrote shard {shard} ({len(names)} images, {rate:.1f} images/sec)")
+                        scored += len(names)
+                        shard += 1
+                        names, outputs = [], []
+                        shard_start = time.perf_counter()
+                if names:
+                    self._write_shard(shard, names, np.concatenate(outputs))
+                    scored += len(names)
+
+            elapsed = time.perf_counter() - start
+            logging.info(f"Scored {scored} images in {elapsed:.1f}s ({scored / max(elapsed, 1e-9):.1f} images/sec)")
+            return scored
+
+        except Exception as e:
+            logging.error("Batch prediction failed")
+            raise CustomException(e, sys)
+
+
+def main():
+    """Score a directory, glob, archive or metadata CSV of images"""
+    parser = argparse.ArgumentParser(description="Offline batch scoring")
+    parser.add_argument("source", help="Image directory, glob pattern, .tar.gz archive or metadata CSV")
+    parser.add_argument("output_dir", help="Directory for the output shards")
+    parser.add_argument("--image-dir", help="Directory of the images listed in a CSV source")
+    parser.add_argument("--model-path", default="artifacts/final_model.keras",
+                        help=".keras model, .tflite model or serving SavedModel directory")
+    parser.add_argument("--img-size", type=int, nargs=2, default=(128, 128))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--shard-size", type=int, default=8192)
+    parser.add_argument("--workers", type=int, default=None, help="Decode workers (default: all cores)")
+    parser.add_argument("--processes", action="store_true", help="Decode in processes instead of threads")
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    args = parser.parse_args()
+    configure_logging()
+
+    predictor = load_predictor(args.model_path, img_size=tuple(args.img_size))
+    scorer = BatchPredictor(predictor, args.output_dir, batch_size=args.batch_size,
+                            shard_size=args.shard_size, workers=args.workers,
+                            use_processes=args.processes, output_format=args.format)
+    scored = scorer.run(iter_inputs(args.source, args.image_dir))
+    print(f"Scored {scored} images into {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
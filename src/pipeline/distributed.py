@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from src.exception import CustomException
+from src.logger import configure_logging, logging
+
+
+@dataclass
+class WorkerContext:
+    """Position of this process in a multi-worker cluster"""
+    num_workers: int = 1
+    index: int = 0
+
+    @property
+    def is_chief(self) -> bool:
+        return self.index == 0
+
+    @property
+    def is_distributed(self) -> bool:
+        return self.num_workers > 1
+
+
+def worker_context() -> WorkerContext:
+    """
+    Read the cluster layout from the TF_CONFIG environment variable.
+
+    Returns:
+        WorkerContext: Single-worker context when TF_CONFIG is unset
+    """
+    tf_config = json.loads(os.environ.get('TF_CONFIG') or '{}')
+    workers = tf_config.get('cluster', {}).get('worker', [])
+    task = tf_config.get('task', {})
+    return WorkerContext(num_workers=max(len(workers), 1), index=int(task.get('index', 0)))
+
+
+def _free_ports(count: int) -> List[int]:
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(('localhost', 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def local_tf_config(num_workers: int, index: int, ports: List[int]) -> str:
+    """TF_CONFIG of worker `index` in a cluster of local processes"""
+    return json.dumps({
+        'cluster': {'worker': [f"localhost:{port}" for port in ports[:num_workers]]},
+        'task': {'type': 'worker', 'index': index}
+    })
+
+
+def launch_local(num_workers: int, command: List[str], base_port: Optional[int] = None) -> int:
+    """
+    Run a command as a cluster of local worker processes.
+
+    Each process gets a localhost TF_CONFIG; worker 0 is the chief.
+
+    Args:
+        num_workers: Number of processes
+        command: Command line each worker runs
+        base_port: First port of the cluster, free ports are picked when None
+
+    Returns:
+        int: First non-zero exit code of the workers, 0 when all succeeded
+    """
+    try:
+        ports = list(range(base_port, base_port + num_workers)) if base_port else _free_ports(num_workers)
+        processes = []
+        for index in range(num_workers):
+            env = {**os.environ, 'TF_CONFIG': local_tf_config(num_workers, index, ports)}
+            processes.append(subprocess.Popen(command, env=env))
+        logging.info(f"Launched {num_workers} local workers on ports {ports}")
+
+        return_code = 0
+        running = list(processes)
+        while running:
+            for process in list(running):
+                code = process.poll()
+                if code is None:
+                    continue
+                running.remove(process)
+                if code and not return_code:
+                    return_code = code
+                    # The other workers would block forever in their next collective op
+                    for other in running:
+                        other.terminate()
+            time.sleep(0.2)
+        return return_code
+
+    except Exception as e:
+        logging.error("Failed to launch local workers")
+        raise CustomException(e, sys)
+
+
+def main():
+    """Launch a module as several local workers, e.g. `-- python -m src.pipeline.main --distributed`"""
+    parser = argparse.ArgumentParser(description="Run a training command as local multi-worker processes")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--base-port", type=int, default=None)
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Command each worker runs, after --")
+    args = parser.parse_args()
+    configure_logging()
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        parser.error("no command given")
+    sys.exit(launch_local(args.workers, command, args.base_port))
+
+
+if __name__ == "__main__":
+    main()
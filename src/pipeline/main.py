@@ -1,15 +1,25 @@
-from dataclasses import dataclass
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+import math
 import os
+import queue
+import threading
 from pathlib import Path
-from typing import List, Dict, Any
-import pandas as pd
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from src.exception import CustomException
-from src.logger import logging
+from src.logger import configure_logging, logging
 import sys
-from src.components.data_transformations import DataTransformations
-from src.components.data_ingestion import DataIngestionPipeline
-from src.components.utils import DatasetUtils
-from src.components.model_trainer import ModelTrainer
+from src.pipeline.distributed import worker_context
+from src.utils.instrumentation import get_tracer, span
+
+# TensorFlow, pandas and the components are imported where they are first
+# needed, so parsing arguments and importing this module stay fast
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
 
 
 @dataclass
@@ -18,12 +28,39 @@ class PipelineConfig:
     batch_size: int = 1
     extract_dir: Path = Path("nih_images")
     meta_csv_path: Path = Path("dataset") / "Data_Entry_2017_v2020.csv"
+    metadata_cache_dir: Path = Path("artifacts") / "metadata_cache"
+    sample_size: int = 40000
+    metadata_chunk_size: Optional[int] = None  # read the metadata CSV in chunks of this many rows, out of core
     img_size: tuple = (128, 128)
     train_batch_size: int = 32
+    sampling_temperature: Optional[float] = None  # label-balanced training batches (inf: equal shares), None shuffles
     epochs: int = 5
+    learning_rate: float = 1e-3
+    dropout: float = 0.3
+    training_mode: str = "full"  # "full", or "head" to train the dense head on cached backbone embeddings
+    feature_cache_dir: Path = Path("artifacts") / "feature_cache"
+    jit_compile: bool = False  # compile the train step with XLA
+    mixed_precision: Optional[str] = None  # "mixed_bfloat16" or "mixed_float16"
+    steps_per_execution: int = 1
+    distributed: bool = False  # data-parallel training over the workers in TF_CONFIG
+    state_dir: Path = Path("artifacts") / "training_state"  # manifest and full checkpoints for resuming
+    evaluation_epochs: int = 0  # per-label ROC/PR-AUC on the validation split every n epochs, 0 to disable
+    instrumentation: bool = True  # timing/resource spans as JSON log lines
+    mlflow_experiment: Optional[str] = None  # also log spans as per-batch MLflow metrics
+    input_backend: str = "keras"  # "keras" (ImageDataGenerator), "tf.data" or "store"
+    image_store_dir: Path = Path("artifacts") / "image_store"
+    stream_extract: bool = False  # decode archives into the image store without extracting
+    download_workers: int = 4  # concurrent archive downloads, shared across upcoming batches
+    download_chunk_size: int = 1 << 20
+    checksums: Dict[str, str] = None  # expected SHA-256 per archive file name
+    seed: int = 42
+    prefetch_depth: int = 1  # archive batches staged ahead of the one training
+    disk_budget_bytes: Optional[int] = None  # cap on bytes held by staged batches
     links: List[str] = None
 
     def __post_init__(self):
+        if self.links is not None:
+            return
         self.links = [
             'https://nihcc.box.com/shared/static/vfk49d74nhbxq3nqjg0900w5nvkorp5c.gz',
             # 'https://nihcc.box.com/shared/static/i28rlmbvmfjbl8p2n3ril0pptcmcu9d1.gz',
@@ -40,99 +77,495 @@ def __post_init__(self):
         ]
 
 
+@dataclass
+class StagedBatch:
+    """Downloaded and extracted archives of one batch"""
+    batch_num: int
+    archives: List[str]
+    files: List[str] = field(default_factory=list)
+    stage_dir: Optional[Path] = None
+
+    @property
+    def image_dir(self) -> Path:
+        return self.stage_dir / "images"
+
+    def disk_usage(self) -> int:
+        """Bytes currently held on disk by this batch"""
+        total = sum(os.path.getsize(f) for f in self.files if os.path.exists(f))
+        if self.stage_dir is not None:
+            for root, _, files in os.walk(self.stage_dir):
+                total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+        return total
+
+
+class BatchPrefetcher:
+    """
+    Stages upcoming archive batches in a background thread.
+
+    While the caller trains on one batch, up to `depth` further batches are
+    downloaded and extracted. A new batch is only started while the bytes held
+    by staged batches, plus the size of the last staged batch as an estimate,
+    stay within the disk budget. The caller hands finished batches back with
+    release() once they are cleaned up.
+
+    With a download_fn, the downloads of the batch about to be staged and of
+    the next download_ahead batches are queued before staging it, so archives
+    of several batches download at once.
+    """
+
+    _DONE = object()
+
+    def __init__(self,
+                 stage_fn: Callable[[int], StagedBatch],
+                 batch_starts: Iterable[int],
+                 depth: int = 1,
+                 disk_budget: Optional[int] = None,
+                 download_fn: Optional[Callable[[int], None]] = None,
+                 download_ahead: int = 0):
+        self.stage_fn = stage_fn
+        self.batch_starts = list(batch_starts)
+        self.disk_budget = disk_budget
+        self.download_fn = download_fn
+        self.download_ahead = download_ahead
+        self._slots = threading.Semaphore(depth + 1)
+        self._queue = queue.Queue()
+        self._cond = threading.Condition()
+        self._staged_bytes: Dict[int, int] = {}
+        self._estimate = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="batch-prefetcher", daemon=True)
+
+    def _within_budget(self) -> bool:
+        if self._stop.is_set() or self.disk_budget is None or not self._staged_bytes:
+            return True
+        return sum(self._staged_bytes.values()) + self._estimate <= self.disk_budget
+
+    def _run(self) -> None:
+        try:
+            for index, batch_start in enumerate(self.batch_starts):
+                while not self._slots.acquire(timeout=0.1):
+                    if self._stop.is_set():
+                        return
+                with self._cond:
+                    self._cond.wait_for(self._within_budget)
+                if self._stop.is_set():
+                    return
+                if self.download_fn is not None:
+                    for upcoming in self.batch_starts[index:index + 1 + self.download_ahead]:
+                        self.download_fn(upcoming)
+                staged = self.stage_fn(batch_start)
+                with self._cond:
+                    self._estimate = self._staged_bytes[staged.batch_num] = staged.disk_usage()
+                self._queue.put(staged)
+        except BaseException as e:
+            self._queue.put(e)
+        finally:
+            self._queue.put(self._DONE)
+
+    def __enter__(self) -> "BatchPrefetcher":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if exc_type is None:
+            self._thread.join()
+
+    def __iter__(self) -> Iterator[StagedBatch]:
+        while True:
+            item = self._queue.get()
+            if item is self._DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def release(self, staged: StagedBatch) -> None:
+        """Free the slot and disk budget held by a cleaned-up batch"""
+        with self._cond:
+            self._staged_bytes.pop(staged.batch_num, None)
+            self._cond.notify_all()
+        self._slots.release()
+
+
 class DataPipeline:
     """Main pipeline for handling data processing and model training"""
     
     def __init__(self, config: PipelineConfig):
         """Initialize pipeline with configuration"""
+        import tensorflow as tf
+        from src.components.data_ingestion import DataIngestionPipeline
+        from src.components.data_transformations import DataTransformations
+        from src.components.feature_cache import FeatureCache
+        from src.components.image_index import ImageIndex
+        from src.components.image_store import ImageStore
+        from src.components.model_trainer import ModelTrainer
+        from src.components.training_state import TrainingCheckpoint, TrainingManifest
+
         self.config = config
+        self.tracer = get_tracer()
+        # Shared by all batches, so download concurrency does not depend on batch_size
+        self.download_pool = ThreadPoolExecutor(max_workers=max(1, config.download_workers),
+                                                thread_name_prefix="download")
+        self._downloads: Dict[int, List[Tuple[str, str, Future]]] = {}
+        self.mlflow_logger = None
+        self.tracer.enabled = config.instrumentation
+        self.worker = worker_context()
+        strategy = None
+        if config.distributed:
+            # The strategy must exist before any other TensorFlow op runs
+            strategy = tf.distribute.MultiWorkerMirroredStrategy()
+            if config.training_mode == "head":
+                raise ValueError("training_mode='head' does not support distributed training")
+            if self.worker.is_distributed:
+                # Local workers must not share staging directories or image stores
+                suffix = f"worker_{self.worker.index}"
+                config.extract_dir = config.extract_dir / suffix
+                config.image_store_dir = config.image_store_dir / suffix
+                config.state_dir = config.state_dir / suffix
+            logging.info(f"Distributed training as worker {self.worker.index} of {self.worker.num_workers}")
         self.transformer = DataTransformations(
-            meta_csv_path=str(config.meta_csv_path)
+            meta_csv_path=str(config.meta_csv_path),
+            cache_dir=str(config.metadata_cache_dir) if config.metadata_cache_dir else None,
+            chunk_size=config.metadata_chunk_size
         )
+        if config.stream_extract and config.input_backend != "store":
+            raise ValueError("stream_extract requires input_backend='store'")
+        if config.training_mode not in ("full", "head"):
+            raise ValueError(f"Unknown training_mode {config.training_mode!r}")
+        self.image_store = None
+        self.image_index = None
+        if config.input_backend == "store":
+            self.image_store = ImageStore(config.image_store_dir, img_size=config.img_size)
+        else:
+            # Paths of extracted images, kept up to date as archives are extracted and cleaned up
+            self.image_index = ImageIndex(config.state_dir / "image_index.parquet")
         self.ingestion = DataIngestionPipeline(
             img_size=config.img_size,
-            batch_size=config.train_batch_size
+            batch_size=config.train_batch_size,
+            backend=config.input_backend,
+            seed=config.seed,
+            image_store=self.image_store,
+            image_index=self.image_index,
+            num_shards=self.worker.num_workers if config.distributed else 1,
+            shard_index=self.worker.index if config.distributed else 0,
+            sampling_temperature=config.sampling_temperature
         )
         self.model_trainer = ModelTrainer(
             img_size=config.img_size,
-            epochs=config.epochs
+            epochs=config.epochs,
+            learning_rate=config.learning_rate,
+            dropout=config.dropout,
+            jit_compile=config.jit_compile,
+            mixed_precision=config.mixed_precision,
+            steps_per_execution=config.steps_per_execution,
+            strategy=strategy,
+            is_chief=self.worker.is_chief
         )
+        self.manifest = TrainingManifest(config.state_dir / "manifest.json")
+        self.training_checkpoint = None
+        if config.training_mode == "full":
+            self.training_checkpoint = TrainingCheckpoint(config.state_dir / "checkpoints",
+                                                          self.model_trainer.model)
+        self.feature_cache = None
+        if config.training_mode == "head":
+            self.feature_cache = FeatureCache(
+                config.feature_cache_dir,
+                self.model_trainer.backbone_fingerprint(),
+                self.model_trainer.feature_dim
+            )
         
-    def process_batch(self, 
-                     batch_start: int, 
-                     train_df: pd.DataFrame, 
-                     test_df: pd.DataFrame, 
-                     labels: List[str]) -> None:
-        """Process a single batch of data"""
+    def batch_archives(self, batch_start: int) -> List[str]:
+        """Archive names of the batch starting at link batch_start"""
+        n_links = len(self.config.links[batch_start:batch_start + self.config.batch_size])
+        return [f"images_{batch_start+idx+1:02d}" for idx in range(n_links)]
+
+    def start_downloads(self, batch_start: int) -> None:
+        """
+        Queue the archive downloads of a batch on the shared download pool.
+
+        Archives already in the image store are skipped, and so are batches
+        whose downloads are already queued.
+        """
+        from src.components.utils import DatasetUtils
+
+        if batch_start in self._downloads:
+            return
+        checksums = self.config.checksums or {}
+        batch_links = self.config.links[batch_start:batch_start + self.config.batch_size]
+        downloads = []
+        for archive, link in zip(self.batch_archives(batch_start), batch_links):
+            if self.image_store is not None and self.image_store.has_archive(archive):
+                logging.info(f"Skipping download, {archive} already in image store")
+                continue
+            filename = f"{archive}.tar.gz"
+            if self.config.distributed and self.worker.is_distributed:
+                filename = str(self.config.extract_dir / filename)
+            future = self.download_pool.submit(DatasetUtils.download_file, link, filename,
+                                               self.config.download_chunk_size,
+                                               checksums.get(Path(filename).name))
+            downloads.append((archive, filename, future))
+        self._downloads[batch_start] = downloads
+
+    def stage_batch(self, batch_start: int) -> StagedBatch:
+        """
+        Download and extract the archives of a batch into its own directory.
+
+        Stages the manifest records as finished, and whose output is still on
+        disk, are skipped; interrupted downloads resume from their .part file.
+        """
+        from src.components.utils import DatasetUtils
+
+        batch_num = batch_start//self.config.batch_size + 1
         try:
-            batch_links = self.config.links[batch_start:batch_start + self.config.batch_size]
-            batch_files = []
-            batch_num = batch_start//self.config.batch_size + 1
+            staged = StagedBatch(
+                batch_num=batch_num,
+                archives=self.batch_archives(batch_start),
+                stage_dir=self.config.extract_dir / f"batch_{batch_num:02d}"
+            )
+
+            # Download batch, waiting for downloads the prefetcher may have queued earlier
+            self.start_downloads(batch_start)
+            downloads = self._downloads.pop(batch_start)
+            pending = [(archive, filename) for archive, filename, _ in downloads]
+            staged.files.extend(filename for _, filename in pending)
+            with span("download", batch=batch_num, archives=len(pending)) as attrs:
+                attrs["bytes"] = sum(future.result() for _, _, future in downloads)
+            for archive, _ in pending:
+                self.manifest.mark(archive, "downloaded")
+
+            # Extract batch, decoding into the image store when enabled
+            for archive, tar_file in pending:
+                if self.manifest.is_done(archive, "extracted") and staged.image_dir.exists():
+                    logging.info(f"Skipping extraction, {archive} already extracted")
+                    if self.image_index is not None and not self.image_index.has_archive(archive):
+                        self.image_index.add(archive, staged.image_dir,
+                                             [path.name for path in staged.image_dir.glob('*.png')])
+                    continue
+                with span("extract", batch=batch_num, archive=archive):
+                    if self.config.stream_extract:
+                        self.image_store.add_from_tar(tar_file, archive)
+                    else:
+                        names = DatasetUtils.extract_tar_gz(tar_file, staged.stage_dir)
+                        if self.image_index is not None:
+                            self.image_index.add(archive, staged.image_dir, names)
+                        if self.image_store is not None:
+                            self.image_store.add_images(sorted(staged.image_dir.glob('*.png')), archive)
+                            DatasetUtils.cleanup_files([staged.stage_dir])
+                self.manifest.mark(archive, "extracted")
+            logging.info(f"Batch {batch_num} extracted to {staged.stage_dir}")
+            return staged
+
+        except Exception as e:
+            logging.error(f"Error staging batch {batch_num}")
+            raise CustomException(e, sys)
+
+    def cached_features(self, batch_df: pd.DataFrame, labels: List[str]) -> np.ndarray:
+        """Embeddings of the selected rows, running the backbone only on uncached images"""
+        missing = batch_df[self.feature_cache.locate(batch_df['Image Index']) < 0]
+        if len(missing):
+            features = self.model_trainer.extract_features(
+                self.ingestion.create_ordered_dataset(missing, labels)
+            )
+            self.feature_cache.add(missing['Image Index'], features)
+        return self.feature_cache.read(batch_df['Image Index'])
+
+    def train_head_on_batch(self,
+                            staged: StagedBatch,
+                            train_df: pd.DataFrame,
+                            test_df: pd.DataFrame,
+                            labels: List[str]) -> None:
+        """Train the dense head of a staged batch from cached backbone embeddings"""
+        from src.components.data_transformations import encode_multi_hot
+
+        try:
+            batch_train, batch_test = (
+                self.ingestion.select_images(df, staged.image_dir, staged.batch_num, staged.archives)
+                for df in (train_df, test_df)
+            )
+            if len(batch_train) == 0 or len(batch_test) == 0:
+                logging.warning(f"No images found for batch {staged.batch_num}")
+                return
+            self.model_trainer.train_head(
+                self.cached_features(batch_train, labels),
+                encode_multi_hot(batch_train['Finding Labels'], labels),
+                self.cached_features(batch_test, labels),
+                encode_multi_hot(batch_test['Finding Labels'], labels),
+                staged.batch_num,
+                batch_size=self.config.train_batch_size
+            )
+
+        except Exception as e:
+            logging.error(f"Error training head on batch {staged.batch_num}")
+            raise CustomException(e, sys)
 
-            # Download batch
-            for idx, link in enumerate(batch_links):
-                filename = f"images_{batch_start+idx+1:02d}.tar.gz"
-                DatasetUtils.download_file(link, filename)
-                batch_files.append(filename)
+    def _training_callbacks(self, batch_num: int, generators: Dict, labels: List[str]) -> List[Any]:
+        """Checkpointing, evaluation and, with MLflow enabled, metric logging callbacks"""
+        from src.components.evaluation import EvaluationCallback
 
-            # Extract batch
-            for tar_file in batch_files:
-                DatasetUtils.extract_tar_gz(tar_file, self.config.extract_dir)
-            logging.info(f"Batch {batch_num} extracted to {self.config.extract_dir}")
+        callbacks = [self.training_checkpoint.callback(batch_num)]
+        # Workers only see their shard of the validation split, so distributed runs skip evaluation
+        if self.config.evaluation_epochs and not self.config.distributed:
+            callbacks.append(EvaluationCallback(generators['valid_generator'], labels,
+                                                every_n_epochs=self.config.evaluation_epochs))
+        if self.mlflow_logger is not None:
+            from src.utils.mlflow_utils import MlflowMetricsCallback
+            callbacks.append(MlflowMetricsCallback(self.mlflow_logger, prefix=f"batch_{batch_num:02d}/"))
+        return callbacks
 
+    def train_staged_batch(self,
+                           staged: StagedBatch,
+                           train_df: pd.DataFrame,
+                           test_df: pd.DataFrame,
+                           labels: List[str]) -> None:
+        """Train the model on a staged batch"""
+        if self.config.training_mode == "head":
+            return self.train_head_on_batch(staged, train_df, test_df, labels)
+        try:
             # Create generators for current batch
             generators = self.ingestion.create_generators(
                 train_df=train_df,
                 test_df=test_df,
-                image_dir=self.config.extract_dir / "images",
-                batch_num=batch_num,
-                labels=labels
+                image_dir=staged.image_dir,
+                batch_num=staged.batch_num,
+                labels=labels,
+                archives=staged.archives
             )
 
             if generators:
-                # Train model on current batch
-                self.model_trainer.train_batch(
-                    generators['train_generator'],
-                    generators['valid_generator'],
-                    batch_num
-                )
+                from src.utils.instrumentation import StepTimingCallback
 
-            # Cleanup batch
-            DatasetUtils.cleanup_files(batch_files)
-            DatasetUtils.cleanup_files([self.config.extract_dir])
-            logging.info(f"Batch {batch_num} processed and cleaned up")
+                step_timing = StepTimingCallback(self.tracer, batch=staged.batch_num)
+                train_data = generators['train_generator']
+                # Distribution adds its own input stages after the timing map, and
+                # multi-step executions call the batch hooks once per execution
+                if not self.config.distributed and self.config.steps_per_execution == 1:
+                    train_data = step_timing.time_input(train_data)
+                # Train model on current batch
+                with span("fit", batch=staged.batch_num):
+                    self.model_trainer.train_batch(
+                        train_data,
+                        generators['valid_generator'],
+                        staged.batch_num,
+                        steps_per_epoch=generators['steps_per_epoch'],
+                        validation_steps=generators['validation_steps'],
+                        initial_epoch=self.training_checkpoint.resume_epoch(staged.batch_num),
+                        callbacks=[step_timing, *self._training_callbacks(staged.batch_num, generators, labels)]
+                    )
+                # Final state of the batch, after early stopping restored the best weights
+                self.training_checkpoint.save(staged.batch_num, self.config.epochs)
+                self.training_checkpoint.sync()
 
         except Exception as e:
-            logging.error(f"Error processing batch {batch_num}")
+            logging.error(f"Error training on batch {staged.batch_num}")
             raise CustomException(e, sys)
 
+    def cleanup_batch(self, staged: StagedBatch) -> None:
+        """Remove the archives and extracted images of a batch"""
+        from src.components.utils import DatasetUtils
+
+        with span("cleanup", batch=staged.batch_num):
+            DatasetUtils.cleanup_files(staged.files)
+            DatasetUtils.cleanup_files([staged.stage_dir])
+            if self.image_index is not None:
+                self.image_index.remove(staged.archives)
+        logging.info(f"Batch {staged.batch_num} processed and cleaned up")
+
+    def process_batch(self, 
+                     batch_start: int, 
+                     train_df: pd.DataFrame, 
+                     test_df: pd.DataFrame, 
+                     labels: List[str]) -> None:
+        """Process a single batch of data"""
+        staged = self.stage_batch(batch_start)
+        try:
+            self.train_staged_batch(staged, train_df, test_df, labels)
+        finally:
+            self.cleanup_batch(staged)
+
     def run(self) -> None:
         """Execute the complete pipeline"""
+        mlflow_utils = None
         try:
+            if self.config.mlflow_experiment and self.worker.is_chief:
+                from src.utils import mlflow_utils
+                mlflow_utils.setup_mlflow(self.config.mlflow_experiment)
+                self.mlflow_logger = mlflow_utils.start_async_logging()
+                self.mlflow_logger.log_params({
+                    key: value for key, value in vars(self.config).items() if key != "links"
+                })
+
             # Process metadata
-            train_df, test_df, labels = self.transformer.process_pipeline()
+            train_df, test_df, labels = self.transformer.process_pipeline(self.config.sample_size)
             logging.info("Metadata processed successfully")
 
             # Create extraction directory
             os.makedirs(self.config.extract_dir, exist_ok=True)
 
-            # Process batches
-            for batch_start in range(0, len(self.config.links), self.config.batch_size):
-                self.process_batch(batch_start, train_df, test_df, labels)
+            # Resume from the last checkpoint and skip batches that finished training
+            if self.training_checkpoint is not None:
+                self.training_checkpoint.restore()
+            batch_starts = [start for start in range(0, len(self.config.links), self.config.batch_size)
+                            if not self.manifest.all_done(self.batch_archives(start), "trained")]
+            skipped = len(range(0, len(self.config.links), self.config.batch_size)) - len(batch_starts)
+            if skipped:
+                logging.info(f"Resuming: skipping {skipped} batches already trained")
+
+            # Process batches, staging the next ones while the current one trains.
+            # A failed batch keeps its files so a rerun does not download them again.
+            # Downloads run ahead until download_workers archives are in flight,
+            # except under a disk budget, which only counts staged batches.
+            download_ahead = 0
+            if self.config.disk_budget_bytes is None:
+                download_ahead = math.ceil(self.config.download_workers / self.config.batch_size) - 1
+            with BatchPrefetcher(self.stage_batch,
+                                 batch_starts,
+                                 depth=self.config.prefetch_depth,
+                                 disk_budget=self.config.disk_budget_bytes,
+                                 download_fn=self.start_downloads,
+                                 download_ahead=download_ahead) as prefetcher:
+                for staged in prefetcher:
+                    try:
+                        self.train_staged_batch(staged, train_df, test_df, labels)
+                        for archive in staged.archives:
+                            self.manifest.mark(archive, "trained")
+                        self.cleanup_batch(staged)
+                    finally:
+                        prefetcher.release(staged)
+                        self.tracer.flush_to_mlflow()
 
             # Save final model
-            self.model_trainer.save_model()
+            with span("save_model"):
+                self.model_trainer.save_model()
+            self.tracer.flush_to_mlflow()
             logging.info("Pipeline completed successfully")
 
         except Exception as e:
             logging.error("Pipeline failed")
             raise CustomException(e, sys)
+        finally:
+            self.download_pool.shutdown(wait=False, cancel_futures=True)
+            if mlflow_utils is not None:
+                mlflow_utils.end_run()
 
 def main():
     """Main entry point"""
+    parser = argparse.ArgumentParser(description="Train the model on the NIH archives")
+    parser.add_argument("--input-backend", choices=("keras", "tf.data", "store"), default="keras")
+    parser.add_argument("--distributed", action="store_true",
+                        help="Data-parallel training over the workers in TF_CONFIG "
+                             "(see python -m src.pipeline.distributed)")
+    parser.add_argument("--evaluation-epochs", type=int, default=0,
+                        help="Per-label validation metrics every n epochs, each costing an extra "
+                             "pass over the validation split; 0 disables them")
+    args = parser.parse_args()
+    configure_logging()
     try:
         # Initialize and run pipeline
-        config = PipelineConfig()
+        config = PipelineConfig(input_backend=args.input_backend, distributed=args.distributed,
+                                evaluation_epochs=args.evaluation_epochs)
         pipeline = DataPipeline(config)
         pipeline.run()
 
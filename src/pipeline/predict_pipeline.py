@@ -0,0 +1,261 @@
+import io
+import os
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from PIL import Image
+from src.components.prediction_cache import load_fingerprinted
+from src.exception import CustomException
+from src.logger import logging
+
+# TensorFlow is imported by the predictors themselves, so decode_image and
+# LABELS load quickly in decode workers and CLIs
+
+# Output order of the trained model (most to least frequent NIH finding)
+LABELS = ['Infiltration', 'Effusion', 'Atelectasis', 'Nodule', 'Mass', 'Pneumothorax',
+          'Consolidation', 'Pleural_Thickening', 'Cardiomegaly', 'Emphysema', 'Edema',
+          'Fibrosis', 'Pneumonia', 'Hernia']
+
+
+def decode_image(data: bytes, img_size: Tuple[int, int] = (128, 128)) -> np.ndarray:
+    """
+    Decode an encoded image into the model's input layout.
+
+    Pixels stay in 0-255 like the training generators, which apply no rescaling.
+
+    Args:
+        data: Encoded image bytes (PNG, JPEG, ...)
+        img_size: Target height and width
+
+    Returns:
+        np.ndarray: float32 array of shape (height, width, 1)
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = image.convert('L').resize(img_size[::-1], Image.NEAREST)
+        return np.asarray(image, dtype=np.float32)[..., None]
+
+
+class Predictor:
+    """
+    Interface shared by the inference backends.
+
+    A backend loads its model in __init__, sets img_size, labels and
+    fingerprint, and implements predict_batch; decoding and labelling of
+    encoded images is shared.
+    """
+
+    img_size: Tuple[int, int]
+    labels: List[str]
+    fingerprint: str
+
+    def predict_batch(self, images: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of preprocessed images.
+
+        Args:
+            images: float32 array of shape (n, height, width, 1)
+
+        Returns:
+            np.ndarray: (n, len(labels)) sigmoid probabilities
+        """
+        raise NotImplementedError
+
+    def predict(self, images: List[bytes]) -> List[Dict[str, float]]:
+        """
+        Score encoded images.
+
+        Args:
+            images: Encoded image bytes
+
+        Returns:
+            List[Dict[str, float]]: Probability per label for each image
+        """
+        batch = np.stack([decode_image(data, self.img_size) for data in images])
+        return [dict(zip(self.labels, row.tolist())) for row in self.predict_batch(batch)]
+
+
+class PredictPipeline(Predictor):
+    """
+    Loads the trained model once and scores batches of images.
+
+    Attributes:
+        model_path (str): Path to the saved Keras model
+        img_size (Tuple[int, int]): Model input height and width
+        labels (List[str]): Label of each model output
+        fingerprint (str): Content hash of the model files as loaded
+    """
+
+    def __init__(self, model_path: str = "artifacts/final_model.keras",
+                 img_size: Tuple[int, int] = (128, 128), labels: Sequence[str] = LABELS):
+        self.model_path = model_path
+        self.img_size = tuple(img_size)
+        self.labels = list(labels)
+        import tensorflow as tf
+
+        try:
+            self.model, self.fingerprint = load_fingerprinted(
+                model_path, lambda: tf.keras.models.load_model(model_path, compile=False)
+            )
+            self._predict_fn = tf.function(
+                lambda images: self.model(images, training=False),
+                input_signature=[tf.TensorSpec([None, *self.img_size, 1], tf.float32)]
+            )
+            logging.info(f"Loaded model for inference from {model_path}")
+        except Exception as e:
+            logging.error(f"Failed to load model from {model_path}")
+            raise CustomException(e, sys)
+
+    def predict_batch(self, images: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of preprocessed images.
+
+        Args:
+            images: float32 array of shape (n, height, width, 1)
+
+        Returns:
+            np.ndarray: (n, len(labels)) sigmoid probabilities
+        """
+        import tensorflow as tf
+
+        return self._predict_fn(tf.convert_to_tensor(images, tf.float32)).numpy()
+
+
+class TFLitePredictor(Predictor):
+    """
+    Scores batches with a TFLite model, including int8 full-integer variants.
+
+    A Predictor like PredictPipeline, so serving and batch scoring can
+    use either backend.
+
+    Attributes:
+        model_path (str): Path to the .tflite model
+        img_size (Tuple[int, int]): Model input height and width
+        labels (List[str]): Label of each model output
+        fingerprint (str): Content hash of the model files as loaded
+    """
+
+    def __init__(self, model_path: str, img_size: Tuple[int, int] = (128, 128),
+                 labels: Sequence[str] = LABELS, num_threads: Optional[int] = None):
+        self.model_path = model_path
+        self.img_size = tuple(img_size)
+        self.labels = list(labels)
+        self._lock = threading.Lock()
+        import tensorflow as tf
+
+        try:
+            self.interpreter, self.fingerprint = load_fingerprinted(
+                model_path, lambda: tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+            )
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = None
+            logging.info(f"Loaded TFLite model for inference from {model_path}")
+        except Exception as e:
+            logging.error(f"Failed to load TFLite model from {model_path}")
+            raise CustomException(e, sys)
+
+    def _quantize(self, images: np.ndarray) -> np.ndarray:
+        dtype = self._input['dtype']
+        if dtype == np.float32:
+            return images.astype(np.float32)
+        scale, zero_point = self._input['quantization']
+        info = np.iinfo(dtype)
+        return np.clip(np.round(images / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, outputs: np.ndarray) -> np.ndarray:
+        if self._output['dtype'] == np.float32:
+            return outputs
+        scale, zero_point = self._output['quantization']
+        return (outputs.astype(np.float32) - zero_point) * scale
+
+    def predict_batch(self, images: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of preprocessed images.
+
+        Args:
+            images: float32 array of shape (n, height, width, 1)
+
+        Returns:
+            np.ndarray: (n, len(labels)) sigmoid probabilities
+        """
+        with self._lock:
+            if len(images) != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input['index'], [len(images), *self.img_size, 1])
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(images)
+            self.interpreter.set_tensor(self._input['index'], self._quantize(images))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self._output['index']))
+
+
+class SavedModelPredictor(Predictor):
+    """
+    Scores batches with the serving SavedModel written by ModelTrainer.save_model.
+
+    The traced inference graph is restored as is, so loading skips Keras
+    deserialization, compilation and tracing. A warm-up batch at startup runs
+    the graph once, so the first request does not pay for its one-off setup.
+    A Predictor like PredictPipeline.
+
+    Attributes:
+        model_path (str): SavedModel directory
+        img_size (Tuple[int, int]): Model input height and width
+        labels (List[str]): Label of each model output
+        fingerprint (str): Content hash of the model files as loaded
+    """
+
+    def __init__(self, model_path: str = "artifacts/serving_model",
+                 img_size: Tuple[int, int] = (128, 128), labels: Sequence[str] = LABELS,
+                 warmup_batch_size: int = 1):
+        self.model_path = model_path
+        self.img_size = tuple(img_size)
+        self.labels = list(labels)
+        import tensorflow as tf
+
+        try:
+            self.model, self.fingerprint = load_fingerprinted(model_path,
+                                                              lambda: tf.saved_model.load(str(model_path)))
+            input_shape = tuple(self.model.serve.input_signature[0].shape[1:3])
+            if input_shape != self.img_size:
+                raise ValueError(f"{model_path} expects {input_shape} images, not {self.img_size}")
+            if warmup_batch_size:
+                self.predict_batch(np.zeros((warmup_batch_size, *self.img_size, 1), dtype=np.float32))
+            logging.info(f"Loaded serving model for inference from {model_path}")
+        except Exception as e:
+            logging.error(f"Failed to load serving model from {model_path}")
+            raise CustomException(e, sys)
+
+    def predict_batch(self, images: np.ndarray) -> np.ndarray:
+        """
+        Score a batch of preprocessed images.
+
+        Args:
+            images: float32 array of shape (n, height, width, 1)
+
+        Returns:
+            np.ndarray: (n, len(labels)) sigmoid probabilities
+        """
+        import tensorflow as tf
+
+        return self.model.serve(tf.convert_to_tensor(images, tf.float32)).numpy()
+
+
+def load_predictor(model_path: str, img_size: Tuple[int, int] = (128, 128),
+                   labels: Sequence[str] = LABELS) -> Predictor:
+    """
+    Load the inference backend matching the model file.
+
+    Args:
+        model_path: .keras model, .tflite model or serving SavedModel directory
+        img_size: Model input height and width
+        labels: Label of each model output
+
+    Returns:
+        PredictPipeline, TFLitePredictor or SavedModelPredictor
+    """
+    if str(model_path).endswith('.tflite'):
+        return TFLitePredictor(model_path, img_size=img_size, labels=labels)
+    if os.path.isdir(model_path):
+        return SavedModelPredictor(model_path, img_size=img_size, labels=labels)
+    return PredictPipeline(model_path, img_size=img_size, labels=labels)
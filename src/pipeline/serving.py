@@ -0,0 +1,188 @@
+import argparse
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from flask import Flask, jsonify, request
+from src.components.prediction_cache import PredictionCache
+from src.exception import CustomException
+from src.logger import configure_logging, logging
+from src.pipeline.predict_pipeline import Predictor, decode_image, load_predictor
+
+
+class LatencyTracker:
+    """Keeps the latencies and completion times of recent requests."""
+
+    def __init__(self, window: int = 10000):
+        self._records = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._records.append((time.perf_counter(), seconds))
+            self._count += 1
+
+    def summary(self) -> Dict[str, float]:
+        """p50/p99 latency in ms and requests/sec over the recent window."""
+        with self._lock:
+            records = np.array(self._records)
+            count = self._count
+        if len(records) < 2:
+            return {'requests': count, 'requests_per_sec': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0}
+        finished, latencies = records[:, 0], records[:, 1]
+        span = finished[-1] - (finished[0] - latencies[0])
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        return {
+            'requests': count,
+            'requests_per_sec': len(records) / span,
+            'p50_ms': float(p50),
+            'p99_ms': float(p99),
+        }
+
+
+class MicroBatcher:
+    """
+    Gathers concurrent requests into dynamic micro-batches.
+
+    A worker thread takes the first waiting image, then keeps collecting until
+    max_batch_size images are queued or max_wait_ms has passed, and scores them
+    in one model call.
+
+    Attributes:
+        predictor (Predictor): Loaded model
+        max_batch_size (int): Largest batch sent to the model
+        max_wait_ms (float): Longest time the first request of a batch waits for others
+    """
+
+    def __init__(self, predictor: Predictor, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.latency = LatencyTracker()
+        self.batch_sizes = deque(maxlen=10000)
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future, float]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image: np.ndarray) -> Future:
+        """Queue one preprocessed image; the future resolves to its probabilities."""
+        future = Future()
+        self._queue.put((image, future, time.perf_counter()))
+        return future
+
+    def _collect(self) -> List[Tuple[np.ndarray, Future, float]]:
+        items = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self) -> None:
+        while True:
+            items = self._collect()
+            try:
+                probabilities = self.predictor.predict_batch(np.stack([image for image, _, _ in items]))
+                self.batch_sizes.append(len(items))
+                now = time.perf_counter()
+                for (_, future, submitted), row in zip(items, probabilities):
+                    future.set_result(row)
+                    self.latency.record(now - submitted)
+            except Exception as e:
+                logging.error(f"Micro-batch of {len(items)} images failed: {e}")
+                for _, future, _ in items:
+                    future.set_exception(e)
+
+    def stats(self) -> Dict[str, float]:
+        stats = self.latency.summary()
+        stats['mean_batch_size'] = float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0
+        return stats
+
+
+def create_app(batcher: MicroBatcher, cache: Optional[PredictionCache] = None) -> Flask:
+    """
+    Build the Flask app.
+
+    POST /predict takes the encoded image as the request body or as an 'image'
+    file field and returns the probability of each label. With a cache,
+    repeated images are answered without decoding or running the model.
+    """
+    app = Flask(__name__)
+    predictor = batcher.predictor
+
+    @app.post("/predict")
+    def predict():
+        data = request.files['image'].read() if 'image' in request.files else request.get_data()
+        if not data:
+            return jsonify({'error': 'no image in request'}), 400
+        probabilities = cache.get(data) if cache is not None else None
+        if probabilities is None:
+            try:
+                image = decode_image(data, predictor.img_size)
+            except Exception:
+                return jsonify({'error': 'could not decode image'}), 400
+            probabilities = batcher.submit(image).result()
+            if cache is not None:
+                cache.put(data, probabilities, predictor.fingerprint)
+        return jsonify({'predictions': dict(zip(predictor.labels, probabilities.tolist()))})
+
+    @app.get("/health")
+    def health():
+        return jsonify({'status': 'ok'})
+
+    @app.get("/metrics")
+    def metrics():
+        stats = batcher.stats()
+        if cache is not None:
+            stats['cache'] = cache.stats()
+        return jsonify(stats)
+
+    return app
+
+
+def main():
+    """Serve the trained model with Waitress"""
+    parser = argparse.ArgumentParser(description="Micro-batching inference server")
+    parser.add_argument("--model-path", default="artifacts/final_model.keras",
+                        help=".keras model, .tflite model or serving SavedModel directory")
+    parser.add_argument("--img-size", type=int, nargs=2, default=(128, 128))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-batch-size", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--threads", type=int, default=32, help="Waitress request threads")
+    parser.add_argument("--cache-size", type=int, default=10000, help="In-memory cached predictions, 0 to disable")
+    parser.add_argument("--cache-ttl", type=float, default=3600, help="Seconds a cached prediction stays valid")
+    parser.add_argument("--cache-dir", default=None, help="Directory of the on-disk prediction cache")
+    args = parser.parse_args()
+    configure_logging()
+
+    try:
+        from waitress import serve
+
+        predictor = load_predictor(args.model_path, img_size=tuple(args.img_size))
+        batcher = MicroBatcher(predictor, args.max_batch_size, args.max_wait_ms)
+        cache = None
+        if args.cache_size > 0:
+            # Keyed by the model as loaded; replacing the file takes effect on restart
+            cache = PredictionCache(predictor.fingerprint, max_entries=args.cache_size,
+                                    ttl_seconds=args.cache_ttl, disk_dir=args.cache_dir)
+        logging.info(f"Serving {args.model_path} on {args.host}:{args.port}")
+        serve(create_app(batcher, cache), host=args.host, port=args.port, threads=args.threads)
+    except Exception as e:
+        logging.error("Inference server failed")
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    main()
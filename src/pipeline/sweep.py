@@ -0,0 +1,294 @@
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.exception import CustomException
+from src.logger import configure_logging, logging
+from src.pipeline.main import PipelineConfig
+
+# PipelineConfig fields a sweep can vary
+SWEEP_PARAMS = ('learning_rate', 'epochs', 'dropout', 'img_size', 'train_batch_size', 'sampling_temperature')
+
+
+def _parse_value(text: str) -> Any:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_grid(specs: List[str]) -> Dict[str, List[Any]]:
+    """
+    Parse 'name=v1,v2' specs into a parameter grid.
+
+    img_size values are square sizes, e.g. img_size=96,128.
+
+    Args:
+        specs: One spec per parameter, names from SWEEP_PARAMS
+
+    Returns:
+        Dict[str, List[Any]]: Values per parameter
+    """
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition('=')
+        if name not in SWEEP_PARAMS or not values:
+            raise ValueError(f"Invalid sweep parameter {spec!r}, expected name=v1,v2 with name in {SWEEP_PARAMS}")
+        parsed = [_parse_value(value) for value in values.split(',')]
+        grid[name] = [(value, value) for value in parsed] if name == 'img_size' else parsed
+    return grid
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """Every combination of the grid values, in a stable order."""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+@dataclass
+class SweepData:
+    """Metadata splits and the image store every sweep run reads"""
+    store_dir: str
+    store_size: Tuple[int, int]
+    train_df: Any
+    test_df: Any
+    labels: List[str]
+
+
+# Set once per worker process by _init_worker
+_worker_data: Optional[SweepData] = None
+
+
+def _init_worker(data: SweepData, threads: int) -> None:
+    """Limit TensorFlow's thread pools before the runtime starts and keep the shared data."""
+    global _worker_data
+    configure_logging()
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(min(threads, 2))
+    _worker_data = data
+
+
+def _run_config(run: int, settings: Dict[str, Any], output_dir: str,
+                experiment: Optional[str]) -> Dict[str, Any]:
+    """Train one configuration in a worker process and report its validation loss."""
+    from src.components.data_ingestion import DataIngestionPipeline
+    from src.components.image_store import ImageStore
+    from src.components.model_trainer import ModelTrainer
+
+    data = _worker_data
+    start = time.perf_counter()
+    result = {'run': run, **settings, 'status': 'ok', 'mlflow_run_id': None}
+    mlflow_utils = None
+    try:
+        # Every run trains from scratch, even when an earlier sweep left weights behind
+        weights_path = Path(output_dir) / f"run_{run:03d}" / "best_model.weights.h5"
+        weights_path.unlink(missing_ok=True)
+        store = ImageStore(data.store_dir, img_size=data.store_size)
+        ingestion = DataIngestionPipeline(img_size=settings['img_size'],
+                                          batch_size=settings['train_batch_size'],
+                                          backend='store', seed=settings['seed'], image_store=store,
+                                          sampling_temperature=settings['sampling_temperature'])
+        generators = ingestion.create_generators(data.train_df, data.test_df, Path(data.store_dir), 1,
+                                                 data.labels)
+        trainer = ModelTrainer(img_size=settings['img_size'], epochs=settings['epochs'],
+                               learning_rate=settings['learning_rate'], dropout=settings['dropout'],
+                               weights_path=str(weights_path))
+
+        callbacks = []
+        if experiment:
+            from src.utils import mlflow_utils
+            result['mlflow_run_id'] = mlflow_utils.setup_mlflow(experiment)
+            logger = mlflow_utils.start_async_logging()
+            logger.log_params({'sweep_run': run, **settings})
+            callbacks.append(mlflow_utils.MlflowMetricsCallback(logger, log_every_n_steps=10))
+
+        history = trainer.train_batch(generators['train_generator'], generators['valid_generator'], run,
+                                      callbacks=callbacks)
+        val_loss = history.history['val_loss']
+        result.update({
+            'best_val_loss': float(min(val_loss)),
+            'best_epoch': int(val_loss.index(min(val_loss))) + 1,
+            'epochs_run': len(val_loss),
+            'wall_s': time.perf_counter() - start,
+        })
+        if mlflow_utils is not None:
+            mlflow_utils.log_metrics({'best_val_loss': result['best_val_loss'], 'wall_s': result['wall_s']})
+    except Exception as e:
+        logging.error(f"Sweep run {run} failed: {e}")
+        result.update({'status': f"failed: {e}", 'best_val_loss': float('nan'),
+                       'wall_s': time.perf_counter() - start})
+    finally:
+        if mlflow_utils is not None:
+            mlflow_utils.end_run()
+    return result
+
+
+class SweepRunner:
+    """
+    Trains a grid of configurations on data prepared once.
+
+    The archives are downloaded once and decoded straight into a memory-mapped
+    image store at the largest image size of the sweep; the metadata splits
+    are computed once and handed to every worker process. Runs train in a
+    spawn-started process pool, each with its own TensorFlow thread limit, so
+    parallel runs share the cores instead of oversubscribing them. Smaller
+    image sizes are resized from the stored images on read.
+
+    Attributes:
+        config (PipelineConfig): Data settings and the defaults of unswept parameters
+        grid (Dict[str, List[Any]]): Values per swept parameter
+        parallel (int): Concurrent runs
+        threads_per_run (int): intra-op threads per run
+        output_dir (Path): Run weights, downloads and summary.csv
+        experiment (Optional[str]): MLflow experiment, one MLflow run per configuration
+    """
+
+    def __init__(self, config: PipelineConfig, grid: Dict[str, List[Any]], parallel: int = 2,
+                 threads_per_run: Optional[int] = None, output_dir: Path = Path("artifacts") / "sweep",
+                 experiment: Optional[str] = None):
+        self.config = config
+        self.grid = grid
+        self.parallel = parallel
+        self.threads_per_run = threads_per_run or max(1, (os.cpu_count() or 1) // parallel)
+        self.output_dir = Path(output_dir)
+        self.experiment = experiment
+
+    def _store_size(self) -> Tuple[int, int]:
+        sizes = self.grid.get('img_size', [tuple(self.config.img_size)])
+        return max(sizes, key=lambda size: size[0] * size[1])
+
+    def prepare_data(self) -> SweepData:
+        """Process the metadata and decode every archive into the image store, once."""
+        from src.components.data_transformations import DataTransformations
+        from src.components.image_store import ImageStore
+        from src.components.utils import DatasetUtils
+
+        try:
+            train_df, test_df, labels = DataTransformations(
+                meta_csv_path=str(self.config.meta_csv_path),
+                cache_dir=str(self.config.metadata_cache_dir) if self.config.metadata_cache_dir else None,
+                chunk_size=self.config.metadata_chunk_size
+            ).process_pipeline(self.config.sample_size)
+
+            store_size = self._store_size()
+            store_dir = Path(self.config.image_store_dir) / f"{store_size[0]}x{store_size[1]}"
+            store = ImageStore(store_dir, img_size=store_size)
+            download_dir = self.output_dir / "downloads"
+            download_dir.mkdir(parents=True, exist_ok=True)
+            for index, link in enumerate(self.config.links):
+                archive = f"images_{index + 1:02d}"
+                if store.has_archive(archive):
+                    logging.info(f"Sweep reuses {archive} from {store_dir}")
+                    continue
+                tar_file = download_dir / f"{archive}.tar.gz"
+                DatasetUtils.download_files([(link, tar_file)],
+                                            max_workers=self.config.download_workers,
+                                            chunk_size=self.config.download_chunk_size,
+                                            checksums=self.config.checksums)
+                store.add_from_tar(tar_file, archive)
+                DatasetUtils.cleanup_files([tar_file])
+            return SweepData(str(store_dir), store_size, train_df, test_df, labels)
+
+        except Exception as e:
+            logging.error("Failed to prepare sweep data")
+            raise CustomException(e, sys)
+
+    def _create_experiment(self) -> None:
+        """Create the MLflow experiment up front so concurrent runs do not race to create it."""
+        import mlflow
+
+        mlflow.set_tracking_uri("file:" + os.path.join(os.getcwd(), "mlruns"))
+        if mlflow.get_experiment_by_name(self.experiment) is None:
+            mlflow.create_experiment(self.experiment)
+
+    def run(self):
+        """
+        Run every configuration of the grid.
+
+        Returns:
+            pd.DataFrame: One row per configuration, ranked by best validation
+                loss and then wall time; also written to output_dir/summary.csv
+        """
+        import pandas as pd
+
+        try:
+            start = time.perf_counter()
+            data = self.prepare_data()
+            prepare_s = time.perf_counter() - start
+            logging.info(f"Sweep data prepared in {prepare_s:.1f}s")
+            if self.experiment:
+                self._create_experiment()
+
+            defaults = {name: getattr(self.config, name) for name in SWEEP_PARAMS}
+            defaults['img_size'] = tuple(defaults['img_size'])
+            runs = [{**defaults, 'seed': self.config.seed, **params} for params in expand_grid(self.grid)]
+            results = []
+            with ProcessPoolExecutor(max_workers=self.parallel,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker,
+                                     initargs=(data, self.threads_per_run)) as pool:
+                futures = [pool.submit(_run_config, run, settings, str(self.output_dir), self.experiment)
+                           for run, settings in enumerate(runs)]
+                for future in as_completed(futures):
+                    result = future.result()
+                    logging.info(f"Sweep run {result['run']} finished: {result['status']}, "
+                                 f"val_loss {result['best_val_loss']:.4f}")
+                    results.append(result)
+
+            summary = (pd.DataFrame(results)
+                       .sort_values(['best_val_loss', 'wall_s'], na_position='last')
+                       .reset_index(drop=True))
+            summary.insert(0, 'rank', range(1, len(summary) + 1))
+            summary['img_size'] = summary['img_size'].map(lambda size: f"{size[0]}x{size[1]}")
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            summary.to_csv(self.output_dir / "summary.csv", index=False)
+            logging.info(f"Sweep of {len(runs)} runs finished in {time.perf_counter() - start:.1f}s "
+                         f"(data preparation {prepare_s:.1f}s)")
+            return summary
+
+        except Exception as e:
+            logging.error("Sweep failed")
+            raise CustomException(e, sys)
+
+
+def main():
+    """Train a hyperparameter grid in parallel on data prepared once"""
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter sweep")
+    parser.add_argument("--grid", nargs="+", required=True,
+                        help="Swept parameters as name=v1,v2, e.g. learning_rate=1e-3,3e-4 dropout=0.2,0.4")
+    parser.add_argument("--parallel", type=int, default=2, help="Concurrent training processes")
+    parser.add_argument("--threads-per-run", type=int, default=None,
+                        help="TensorFlow intra-op threads per run, default cores / parallel")
+    parser.add_argument("--sample-size", type=int, default=PipelineConfig.sample_size)
+    parser.add_argument("--epochs", type=int, default=PipelineConfig.epochs)
+    parser.add_argument("--output-dir", default="artifacts/sweep")
+    parser.add_argument("--mlflow-experiment", default=None)
+    args = parser.parse_args()
+    configure_logging()
+    try:
+        runner = SweepRunner(
+            PipelineConfig(sample_size=args.sample_size, epochs=args.epochs),
+            parse_grid(args.grid),
+            parallel=args.parallel,
+            threads_per_run=args.threads_per_run,
+            output_dir=Path(args.output_dir),
+            experiment=args.mlflow_experiment
+        )
+        summary = runner.run()
+        print(summary.to_string(index=False))
+    except Exception as e:
+        logging.error("Failed to execute sweep")
+        raise CustomException(e, sys)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import functools
+import json
+import logging as std_logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import psutil
+from src.logger import logging
+
+# Span records go to their own logger so they can be filtered or routed separately
+span_logger = std_logging.getLogger("instrumentation")
+
+
+@dataclass
+class ResourceSnapshot:
+    """Process-wide counters at one point in time"""
+    wall: float
+    cpu_seconds: float
+    rss_bytes: int
+    read_bytes: int
+    write_bytes: int
+
+    @classmethod
+    def take(cls, process: psutil.Process) -> "ResourceSnapshot":
+        with process.oneshot():
+            cpu = process.cpu_times()
+            rss = process.memory_info().rss
+            try:
+                io = process.io_counters()
+                read_bytes, write_bytes = io.read_bytes, io.write_bytes
+            except (AttributeError, psutil.Error):  # not available on macOS
+                read_bytes = write_bytes = 0
+        return cls(time.perf_counter(), cpu.user + cpu.system, rss, read_bytes, write_bytes)
+
+
+@dataclass
+class Span:
+    """Timing and resource usage of one pipeline stage"""
+    name: str
+    seconds: float
+    cpu_seconds: float
+    cpu_percent: float
+    rss_mb: float
+    rss_delta_mb: float
+    read_mb: float
+    write_mb: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def between(cls, name: str, start: ResourceSnapshot, end: ResourceSnapshot,
+                attributes: Dict[str, Any]) -> "Span":
+        seconds = end.wall - start.wall
+        cpu_seconds = end.cpu_seconds - start.cpu_seconds
+        return cls(
+            name=name,
+            seconds=seconds,
+            cpu_seconds=cpu_seconds,
+            cpu_percent=100 * cpu_seconds / seconds if seconds > 0 else 0.0,
+            rss_mb=end.rss_bytes / 2**20,
+            rss_delta_mb=(end.rss_bytes - start.rss_bytes) / 2**20,
+            read_mb=(end.read_bytes - start.read_bytes) / 2**20,
+            write_mb=(end.write_bytes - start.write_bytes) / 2**20,
+            attributes=attributes,
+        )
+
+
+class Tracer:
+    """
+    Records timing spans with psutil resource deltas.
+
+    Each span is logged as one JSON line on the 'instrumentation' logger and
+    kept until flush_to_mlflow() sends it as a batch of MLflow metrics. The
+    resource counters are process-wide, so spans that overlap in time (e.g. a
+    prefetch thread downloading while the main thread trains) share them.
+    Resources are sampled only at span boundaries, which keeps the overhead to
+    a few tens of microseconds per span.
+
+    Attributes:
+        enabled (bool): Record spans; when False span() only runs the body
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._process = psutil.Process()
+        self._pending: List[Span] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block of code.
+
+        Yields the span's attributes, so the block can add results such as
+        byte or image counts.
+
+        Args:
+            name: Stage name, e.g. 'download'
+            **attributes: Context logged with the span, e.g. batch=3
+        """
+        if not self.enabled:
+            yield attributes
+            return
+        start = ResourceSnapshot.take(self._process)
+        status = 'ok'
+        try:
+            yield attributes
+        except BaseException:
+            status = 'error'
+            raise
+        finally:
+            self.record(Span.between(name, start, ResourceSnapshot.take(self._process),
+                                     {**attributes, 'status': status}))
+
+    def record(self, span: Span) -> None:
+        """Log a span as JSON and queue it for MLflow."""
+        span_logger.info(json.dumps({'span': span.name, **asdict(span)}, default=str))
+        with self._lock:
+            self._pending.append(span)
+
+    def timed(self, name: Optional[str] = None) -> Callable:
+        """Decorator that wraps every call of a function in a span."""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def drain(self) -> List[Span]:
+        """Remove and return the spans not yet sent to MLflow."""
+        with self._lock:
+            spans, self._pending = self._pending, []
+        return spans
+
+    def flush_to_mlflow(self) -> int:
+        """
+        Send pending spans to the active MLflow run in one log_batch call.
+
+        Spans are summed per name and logged at the step of their 'batch'
+        attribute, so every archive batch gets its own point per stage.
+
+        Returns:
+            int: Number of metrics logged
+        """
+        spans = self.drain()
+        try:
+            import mlflow
+            from mlflow.entities import Metric
+
+            run = mlflow.active_run()
+            if run is None or not spans:
+                return 0
+            totals: Dict[tuple, float] = defaultdict(float)
+            for span in spans:
+                step = int(span.attributes.get('batch', 0))
+                for metric in ('seconds', 'cpu_seconds', 'read_mb', 'write_mb'):
+                    totals[(f"{span.name}.{metric}", step)] += getattr(span, metric)
+                totals[(f"{span.name}.rss_mb", step)] = max(totals[(f"{span.name}.rss_mb", step)], span.rss_mb)
+            timestamp = int(time.time() * 1000)
+            metrics = [Metric(key, value, timestamp, step) for (key, step), value in totals.items()]
+            for i in range(0, len(metrics), 1000):  # MLflow accepts at most 1000 metrics per batch
+                mlflow.MlflowClient().log_batch(run.info.run_id, metrics=metrics[i:i + 1000])
+            return len(metrics)
+        except Exception as e:
+            logging.warning(f"Could not log spans to MLflow: {e}")
+            return 0
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """The process-wide tracer used by span() and timed()"""
+    return _tracer
+
+
+def span(name: str, **attributes):
+    """Time a block with the process-wide tracer (see Tracer.span)"""
+    return _tracer.span(name, **attributes)
+
+
+def timed(name: Optional[str] = None) -> Callable:
+    """Decorate a function with a span of the process-wide tracer"""
+    return _tracer.timed(name)
+
+
+def _step_timing_callback_class() -> type:
+    import tensorflow as tf
+
+    class TimedSequence(tf.keras.utils.Sequence):
+        """Keras Sequence that adds the time spent in __getitem__ to a callback."""
+
+        def __init__(self, sequence, callback):
+            super().__init__()
+            self.sequence = sequence
+            self.callback = callback
+
+        def __len__(self) -> int:
+            return len(self.sequence)
+
+        def __getitem__(self, index: int):
+            start = time.perf_counter()
+            batch = self.sequence[index]
+            with self.callback._lock:
+                self.callback._fetch += time.perf_counter() - start
+            return batch
+
+        def on_epoch_end(self):
+            self.sequence.on_epoch_end()
+
+    class StepTimingCallback(tf.keras.callbacks.Callback):
+        """
+        Splits training steps into input wait and compute time.
+
+        Keras fetches the next batch inside the step, between on_train_batch_begin
+        and on_train_batch_end, so the training input has to be wrapped with
+        time_input() for the split:
+
+        - tf.data datasets get a final map that stamps the moment a batch is
+          handed to the step. input_wait_s is the time from the start of each
+          step to that stamp and compute_s the rest of the step; an input-bound
+          run shows a high input_wait_fraction. The split assumes one step per
+          execution (steps_per_execution=1); the stamp is a Python call and
+          costs a fraction of a millisecond per batch.
+        - Keras Sequences are prefetched on a background thread, so only the
+          time spent producing batches is known: input_fetch_s is the total time
+          in __getitem__, which overlaps with compute.
+
+        step_s, the total time inside steps, is always reported. Per-epoch
+        totals are recorded as a 'fit_epoch' span and logged to the epoch's logs.
+        """
+
+        def __init__(self, tracer: Optional[Tracer] = None, **attributes):
+            super().__init__()
+            self.tracer = tracer or _tracer
+            self.attributes = attributes
+            self._lock = threading.Lock()
+            self._input = None
+            self._delivered = self._fetch = 0.0
+
+        def time_input(self, data):
+            """
+            Wrap the training input so its fetch time is measured.
+
+            Args:
+                data: tf.data.Dataset or Keras Sequence passed to fit
+
+            Returns:
+                The wrapped input; anything else is returned unchanged
+            """
+            if isinstance(data, tf.data.Dataset):
+                self._input = 'dataset'
+                return data.map(self._mark_delivery)
+            if isinstance(data, tf.keras.utils.Sequence):
+                self._input = 'sequence'
+                return TimedSequence(data, self)
+            return data
+
+        def _mark_delivery(self, *batch):
+            # Not parallel and not followed by a prefetch, so the stamp is
+            # taken when the step itself pulls the batch
+            stamp = tf.py_function(self._stamp, [], tf.float64)
+            with tf.control_dependencies([stamp]):
+                batch = tuple(tf.identity(element) for element in batch)
+            return batch if len(batch) > 1 else batch[0]
+
+        def _stamp(self):
+            self._delivered = time.perf_counter()
+            return self._delivered
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self._epoch_start = ResourceSnapshot.take(self.tracer._process)
+            self._step = self._wait = 0.0
+            self._steps = 0
+            with self._lock:
+                self._fetch = 0.0
+
+        def on_train_batch_begin(self, batch, logs=None):
+            self._step_start = time.perf_counter()
+
+        def on_train_batch_end(self, batch, logs=None):
+            end = time.perf_counter()
+            self._step += end - self._step_start
+            if self._input == 'dataset' and self._delivered >= self._step_start:
+                self._wait += self._delivered - self._step_start
+            self._steps += 1
+
+        def on_epoch_end(self, epoch, logs=None):
+            stats = {'steps': self._steps, 'step_s': self._step}
+            if self._input == 'dataset':
+                stats.update({
+                    'input_wait_s': self._wait,
+                    'compute_s': self._step - self._wait,
+                    'input_wait_fraction': self._wait / self._step if self._step > 0 else 0.0,
+                })
+            elif self._input == 'sequence':
+                stats['input_fetch_s'] = self._fetch
+            if logs is not None:
+                logs.update({key: value for key, value in stats.items() if key != 'steps'})
+            if self.tracer.enabled:
+                self.tracer.record(Span.between('fit_epoch', self._epoch_start,
+                                                ResourceSnapshot.take(self.tracer._process),
+                                                {**self.attributes, 'epoch': epoch, **stats}))
+
+    return StepTimingCallback
+
+
+def __getattr__(name: str):
+    # The Keras callback is defined on first access, so spans can be used
+    # without importing TensorFlow
+    if name == 'StepTimingCallback':
+        globals()[name] = _step_timing_callback_class()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
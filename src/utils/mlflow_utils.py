@@ -2,6 +2,16 @@
 import mlflow.tensorflow
 from datetime import datetime
 import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+import tensorflow as tf
+from mlflow import MlflowClient
+from mlflow.entities import Metric, Param
+
+# Background logger used by log_metrics/log_params while one is started
+_async_logger = None
 
 def setup_mlflow(experiment_name: str = "lung_cancer_detection"):
     """
@@ -49,16 +59,182 @@ def log_model_parameters(model, **kwargs):
 def log_metrics(metrics: dict, step: int = None):
     """
     Log metrics to MLflow
+    
+    Goes through the background logger when one was started with
+    start_async_logging, otherwise writes synchronously.
     Args:
         metrics (dict): Dictionary of metrics to log
         step (int): Step number (optional)
     """
+    if _async_logger is not None:
+        _async_logger.log_metrics(metrics, step=step)
+        return
     try:
         for metric_name, value in metrics.items():
             mlflow.log_metric(metric_name, value, step=step)
     except Exception as e:
         print(f"Error logging metrics: {e}")
 
+
+class AsyncMlflowLogger:
+    """
+    Logs MLflow metrics and params from a background thread.
+
+    Callers only enqueue records. The worker thread coalesces them into
+    log_batch calls of up to batch_size entries, written when a batch is
+    full, when flush_interval seconds have passed or when flush() is called.
+    When the bounded queue is full, callers block (back-pressure) or, with
+    drop_when_full, the record is dropped and counted.
+
+    Attributes:
+        run_id (str): Run the records are logged to
+        max_queue (int): Maximum records waiting to be written
+        batch_size (int): Maximum entries per log_batch call (MLflow allows 1000)
+        flush_interval (float): Longest time a record waits before being written
+        drop_when_full (bool): Drop records instead of blocking when the queue is full
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(self, run_id: Optional[str] = None, max_queue: int = 10000, batch_size: int = 1000,
+                 flush_interval: float = 1.0, drop_when_full: bool = False):
+        active = mlflow.active_run()
+        self.run_id = run_id or (active.info.run_id if active else None)
+        if self.run_id is None:
+            raise ValueError("AsyncMlflowLogger needs a run_id or an active MLflow run")
+        self.batch_size = min(batch_size, 1000)
+        self.flush_interval = flush_interval
+        self.drop_when_full = drop_when_full
+        self.stats = {'logged': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+        self._client = MlflowClient()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="mlflow-logger", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> None:
+        if not self.drop_when_full:
+            self._queue.put(item)
+            return
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    def log_metric(self, key: str, value: float, step: Optional[int] = None) -> None:
+        self._put(Metric(key, float(value), int(time.time() * 1000), step or 0))
+
+    def log_metrics(self, metrics: Dict[str, float], step: Optional[int] = None) -> None:
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self._put(Metric(key, float(value), timestamp, step or 0))
+
+    def log_param(self, key: str, value) -> None:
+        self._put(Param(key, str(value)))
+
+    def log_params(self, params: Dict) -> None:
+        for key, value in params.items():
+            self.log_param(key, value)
+
+    def _write(self, records: List) -> None:
+        metrics = [r for r in records if isinstance(r, Metric)]
+        # A param can only be set once per run, so keep one value per key
+        params = list({r.key: r for r in records if isinstance(r, Param)}.values())
+        # log_batch takes at most 1000 metrics and 100 params per call
+        chunks = [{'metrics': metrics[i:i + self.batch_size]} for i in range(0, len(metrics), self.batch_size)]
+        chunks += [{'params': params[i:i + 100]} for i in range(0, len(params), 100)]
+        for chunk in chunks:
+            try:
+                self._client.log_batch(self.run_id, **chunk)
+                self.stats['batches'] += 1
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Error logging batch: {e}")
+        self.stats['logged'] += len(metrics) + len(params)
+
+    def _run(self) -> None:
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                item = None
+            markers = []
+            if item is self._FLUSH or item is self._STOP:
+                markers.append(item)
+            elif item is not None:
+                pending.append(item)
+            if markers or len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                if pending:
+                    self._write(pending)
+                for _ in range(len(pending) + len(markers)):
+                    self._queue.task_done()
+                pending = []
+                deadline = time.monotonic() + self.flush_interval
+            if self._STOP in markers:
+                return
+
+    def flush(self) -> None:
+        """Block until every record enqueued so far is written."""
+        self._queue.put(self._FLUSH)
+        self._queue.join()
+
+    def close(self) -> None:
+        """Write the remaining records and stop the worker thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+
+def start_async_logging(**kwargs) -> AsyncMlflowLogger:
+    """
+    Route log_metrics through a background AsyncMlflowLogger until end_run.
+    Args:
+        **kwargs: AsyncMlflowLogger options
+    Returns:
+        AsyncMlflowLogger: The started logger
+    """
+    global _async_logger
+    if _async_logger is None:
+        _async_logger = AsyncMlflowLogger(**kwargs)
+    return _async_logger
+
+
+class MlflowMetricsCallback(tf.keras.callbacks.Callback):
+    """
+    Feeds Keras training logs to an AsyncMlflowLogger.
+
+    Step metrics are prefixed with 'step_' and logged every log_every_n_steps
+    steps; epoch metrics keep their names and are logged at the epoch index.
+    """
+
+    def __init__(self, logger: AsyncMlflowLogger, log_every_n_steps: int = 1, prefix: str = ""):
+        super().__init__()
+        self.logger = logger
+        self.log_every_n_steps = log_every_n_steps
+        self.prefix = prefix
+        self._step = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._step += 1
+        if logs and self._step % self.log_every_n_steps == 0:
+            self.logger.log_metrics({f"{self.prefix}step_{k}": v for k, v in logs.items()
+                                     if _is_number(v)}, step=self._step)
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs:
+            self.logger.log_metrics({f"{self.prefix}{k}": v for k, v in logs.items() if _is_number(v)},
+                                    step=epoch)
+
+
+def _is_number(value) -> bool:
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
 def save_model(model, run_id: str = None):
     """
     Save model to MLflow
@@ -76,7 +252,11 @@ def save_model(model, run_id: str = None):
         print(f"Error saving model: {e}")
 
 def end_run():
-    """End the current MLflow run"""
+    """Flush and stop the background logger, then end the current MLflow run"""
+    global _async_logger
+    if _async_logger is not None:
+        _async_logger.close()
+        _async_logger = None
     try:
         mlflow.end_run()
     except Exception as e: